@@ -2,6 +2,7 @@ from importlib import import_module
 
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models.signals import post_migrate
 from django.utils.module_loading import import_string
 
 
@@ -12,6 +13,8 @@ class DefaultConfig(AppConfig):
         from .mutation import Mutation
         from .types import Node
         from .serializers import ModelSerializer
+        from . import dispatch
+        from .indexes import sync_meta_indexes_after_migrate
 
         # to avoid recursive import error, load extension classes
         # only once the app is ready
@@ -24,5 +27,14 @@ class DefaultConfig(AppConfig):
         Node.visibility_classes = [
             import_string(cls) for cls in settings.VISIBILITY_CLASSES
         ]
+
+        # resolve handlers of extension classes for all mutations and nodes
+        # of the schema once, which also reports misconfigured extension
+        # classes on startup instead of on the first request
+        import_string(settings.GRAPHENE["SCHEMA"])
+        dispatch.build(dispatch.all_subclasses(Mutation), dispatch.all_subclasses(Node))
+
         for module in settings.EVENT_RECEIVER_MODULES:
             import_module(module)
+
+        post_migrate.connect(sync_meta_indexes_after_migrate, sender=self)
@@ -0,0 +1,18 @@
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache():
+    """Return whether the default cache is shared between processes.
+
+    Entries of a process local cache like `LocMemCache` can't be invalidated
+    by other processes, so they may be stale until they expire.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def local_cache_timeout(timeout):
+    """Return given timeout for a process local cache, the default otherwise."""
+    return DEFAULT_TIMEOUT if is_shared_cache() else timeout
@@ -0,0 +1,136 @@
+"""Dispatch of configured extension classes to mutations and nodes.
+
+Permission, validation and visibility classes register their handlers with
+decorators such as `permission_for`. Resolving which handler applies to a
+mutation or node requires reflection and walking the MRO, which is why the
+handlers of every extension class are collected once per class, and the
+handlers resolved for the mutations and nodes of the schema are computed in
+`caluma_core.apps.DefaultConfig.ready` and looked up in a table afterwards.
+
+Extension classes are still instantiated on every use, so they may keep
+state on `self`.
+"""
+import inspect
+from functools import lru_cache
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .collections import list_duplicates
+
+
+def resolve_for(handlers, target):
+    """Return handler registered for the most specific class of given target."""
+    for cls in target.mro():
+        if cls in handlers:
+            return handlers[cls]
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def decorated_functions(cls, attr):
+    """Return tuple of name and function of given class decorated with `attr`."""
+    return tuple(inspect.getmembers(cls, lambda member: hasattr(member, attr)))
+
+
+@lru_cache(maxsize=None)
+def collect_handlers(cls, attr, decorator):
+    """Return dict of target to function of given class decorated with `attr`.
+
+    `ImproperlyConfigured` is raised when the `decorator` is used multiple
+    times for the same target.
+    """
+    functions = decorated_functions(cls, attr)
+    duplicates = list_duplicates(
+        [target.__name__ for _, fn in functions for target in getattr(fn, attr)]
+    )
+    if duplicates:
+        raise ImproperlyConfigured(
+            f"`{decorator}` defined multiple times for "
+            f"{', '.join(duplicates)} in {cls}"
+        )
+
+    return MappingProxyType(
+        {target: fn for _, fn in functions for target in getattr(fn, attr)}
+    )
+
+
+def all_subclasses(cls):
+    """Return all subclasses of given class, recursively."""
+    subclasses = set(cls.__subclasses__())
+    for subclass in list(subclasses):
+        subclasses |= all_subclasses(subclass)
+    return subclasses
+
+
+class DispatchTable(object):
+    """Immutable map of target class and extension classes to their handlers.
+
+    `resolver` is the name of the method of the extension classes returning
+    the handler of a target class as bound method, or `None` when the
+    extension doesn't handle it.
+
+    Targets which are not known when the table is built (e.g. types defined
+    at runtime or patched extension classes) are resolved on first lookup
+    and added to a copy of the table.
+    """
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self._table = MappingProxyType({})
+
+    def _resolve(self, target, extension_classes):
+        resolved = []
+        for extension_class in extension_classes:
+            handler = getattr(extension_class(), self.resolver)(target)
+            if handler is not None:
+                resolved.append((extension_class, handler.__func__))
+        return tuple(resolved)
+
+    def build(self, targets):
+        """Build table for given iterable of target and extension classes."""
+        table = {}
+        for target, extension_classes in targets:
+            if extension_classes is not None:
+                key = (target, tuple(extension_classes))
+                table[key] = self._resolve(*key)
+        self._table = MappingProxyType(table)
+
+    def get(self, target, extension_classes):
+        """Return tuple of handlers of extension classes for given target.
+
+        The handlers are bound to new instances of the extension classes.
+        """
+        key = (target, tuple(extension_classes))
+        try:
+            resolved = self._table[key]
+        except KeyError:
+            resolved = self._resolve(*key)
+            self._table = MappingProxyType({**self._table, key: resolved})
+
+        return tuple(fn.__get__(extension_class()) for extension_class, fn in resolved)
+
+
+permissions = DispatchTable("get_permission_handler")
+object_permissions = DispatchTable("get_object_permission_handler")
+validations = DispatchTable("get_validation_handler")
+visibilities = DispatchTable("get_visibility_handler")
+
+
+def build(mutations, nodes):
+    """Build dispatch tables of given mutation and node classes."""
+    mutations = [
+        mutation
+        for mutation in mutations
+        if getattr(getattr(mutation, "_meta", None), "serializer_class", None)
+    ]
+    permissions.build((mutation, mutation.permission_classes) for mutation in mutations)
+    object_permissions.build(
+        (mutation, mutation.permission_classes) for mutation in mutations
+    )
+    validations.build(
+        (mutation, getattr(mutation._meta.serializer_class, "validation_classes", None))
+        for mutation in mutations
+    )
+    visibilities.build((node, node.visibility_classes) for node in nodes)
@@ -1,9 +1,33 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib import import_module
 
-from django.dispatch import receiver as on  # noqa
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, models
+from django.dispatch import Signal, receiver as on  # noqa
+from django.utils import timezone
+from django.utils.module_loading import import_string, module_has_submodule
+
+from .models import OutboxEvent
 
 logger = logging.getLogger(__name__)
 
+# name of the advisory lock held while dispatching the outbox
+DISPATCH_LOCK = "caluma_core.outbox"
+
+
+def _log_errors(result):
+    errors = [(func, exc) for func, exc in result if exc is not None]
+    for func, exc in errors:
+        logger.error(
+            f'Error in event handler "{func.__module__}.{func.__name__}":', exc_info=exc
+        )
+    return errors
+
 
 def send_event(signal, **kwargs):
     """
@@ -12,17 +36,214 @@ def send_event(signal, **kwargs):
     This wrapper handles the sending of signals as well as handling of any Exceptions that
     occur. Exceptions are logged with `ERROR` level, but not raised, in order to prevent
     rollback of the transaction.
+
+    With `EVENT_OUTBOX` enabled, the event is written to the outbox instead
+    and dispatched to the receivers by the `dispatch_events` command. This
+    only applies to signals defined in the `events` module of an app, as
+    others can't be imported by the dispatcher.
     """
+    if settings.EVENT_OUTBOX and signal in get_events():
+        write_outbox_event(signal, **kwargs)
+        return []
+
     result = signal.send_robust(**kwargs)
-    for func, exc in result:
-        if exc is not None:
-            logger.error(
-                f'Error in event handler "{func.__module__}.{func.__name__}":',
-                exc_info=exc,
-            )
+    _log_errors(result)
     return result
 
 
+@lru_cache(maxsize=None)
+def get_events():
+    """Return dict of signal to dotted path of the `events` modules of all apps."""
+    events = {}
+    for app_config in apps.get_app_configs():
+        if not module_has_submodule(app_config.module, "events"):
+            continue
+
+        module = import_module(f"{app_config.name}.events")
+        for name, value in vars(module).items():
+            if isinstance(value, Signal):
+                events[value] = f"{module.__name__}.{name}"
+
+    return events
+
+
+def _serialize(value):
+    if isinstance(value, models.Model):
+        return {"__model__": value._meta.label, "pk": value.pk}
+    if isinstance(value, (list, tuple)):
+        return [_serialize(item) for item in value]
+    return value
+
+
+def _is_reference(value):
+    return isinstance(value, dict) and "__model__" in value
+
+
+def _deserialize(value):
+    if _is_reference(value):
+        return apps.get_model(value["__model__"]).objects.get(pk=value["pk"])
+    if (
+        value
+        and isinstance(value, list)
+        and all(_is_reference(item) for item in value)
+        and len({item["__model__"] for item in value}) == 1
+    ):
+        # load lists of objects of batched events with one query
+        model = apps.get_model(value[0]["__model__"])
+        pks = [model._meta.pk.to_python(item["pk"]) for item in value]
+        objects = model.objects.in_bulk(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            raise model.DoesNotExist(
+                f"{model._meta.object_name} {missing[0]} does not exist."
+            )
+        return [objects[pk] for pk in pks]
+    if isinstance(value, list):
+        return [_deserialize(item) for item in value]
+    return value
+
+
+def _event_group(kwargs):
+    """Return group of event, which is the case the first model argument belongs to."""
+    for value in kwargs.values():
+        if isinstance(value, (list, tuple)) and value:
+            value = value[0]
+        if isinstance(value, models.Model):
+            return str(getattr(value, "case_id", None) or value.pk)
+
+
+def write_outbox_event(signal, sender=None, **kwargs):
+    """Write event to the outbox, to be dispatched after commit."""
+    return OutboxEvent.objects.create(
+        event=get_events()[signal],
+        sender=(
+            {"class": f"{sender.__module__}.{sender.__qualname__}"}
+            if isinstance(sender, type)
+            else {"value": sender}
+        ),
+        payload={key: _serialize(value) for key, value in kwargs.items()},
+        group=_event_group(kwargs),
+    )
+
+
+def dispatch_outbox_event(outbox_event):
+    """
+    Send outbox event to its receivers.
+
+    Returns a list of (receiver, exception) tuples of failed receivers.
+    Raises `ObjectDoesNotExist` if an object passed to the event has been
+    deleted in the meantime.
+    """
+    signal = import_string(outbox_event.event)
+    if "class" in outbox_event.sender:
+        sender = import_string(outbox_event.sender["class"])
+    else:
+        sender = outbox_event.sender["value"]
+
+    kwargs = {key: _deserialize(value) for key, value in outbox_event.payload.items()}
+    return _log_errors(signal.send_robust(sender=sender, **kwargs))
+
+
+def _dispatch_group(outbox_events, max_attempts):
+    """
+    Dispatch events of a group in order.
+
+    The remaining events of the group are left for the next run when an event
+    fails, unless it has failed `max_attempts` times and is given up. Events
+    of deleted objects are given up right away, as they can't succeed anymore.
+    """
+    dispatched = 0
+    for outbox_event in outbox_events:
+        given_up = False
+        try:
+            errors = [exc for _, exc in dispatch_outbox_event(outbox_event)]
+        except ObjectDoesNotExist as exc:
+            logger.error(f"Giving up event {outbox_event.pk}:", exc_info=exc)
+            errors = [exc]
+            given_up = True
+        except Exception as exc:
+            logger.error(f"Error dispatching event {outbox_event.pk}:", exc_info=exc)
+            errors = [exc]
+
+        if not errors:
+            outbox_event.dispatched_at = timezone.now()
+            outbox_event.save(update_fields=["dispatched_at"])
+            dispatched += 1
+            continue
+
+        outbox_event.attempts += 1
+        outbox_event.last_error = repr(errors[0])
+        if given_up or outbox_event.attempts >= max_attempts:
+            outbox_event.failed_at = timezone.now()
+        outbox_event.save(update_fields=["attempts", "last_error", "failed_at"])
+        if outbox_event.failed_at is None:
+            break
+
+    return dispatched
+
+
+def _dispatch_group_in_thread(outbox_events, max_attempts):
+    try:
+        return _dispatch_group(outbox_events, max_attempts)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def _dispatch_lock():
+    """Try to acquire the dispatch lock, yield whether it has been acquired."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", [DISPATCH_LOCK])
+        (locked,) = cursor.fetchone()
+
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_unlock(hashtext(%s))", [DISPATCH_LOCK]
+                )
+
+
+def dispatch_outbox_events(workers=1, max_attempts=5, limit=1000):
+    """
+    Dispatch pending events of the outbox, oldest first.
+
+    Groups of events are dispatched concurrently by up to `workers` threads,
+    the events within a group one after the other. Only one process dispatches
+    at a time, so no event is sent twice. While the outbox is dispatched by
+    another process, no events are dispatched.
+
+    Returns the number of dispatched events.
+    """
+    with _dispatch_lock() as locked:
+        if not locked:
+            return 0
+
+        return _dispatch_pending(workers, max_attempts, limit)
+
+
+def _dispatch_pending(workers, max_attempts, limit):
+    groups = {}
+    for outbox_event in OutboxEvent.objects.filter(
+        dispatched_at__isnull=True, failed_at__isnull=True
+    ).order_by("pk")[:limit]:
+        groups.setdefault(outbox_event.group or outbox_event.pk, []).append(
+            outbox_event
+        )
+
+    if workers == 1:
+        return sum(_dispatch_group(group, max_attempts) for group in groups.values())
+
+    with ThreadPoolExecutor(workers) as executor:
+        return sum(
+            executor.map(
+                _dispatch_group_in_thread, groups.values(), [max_attempts] * len(groups)
+            )
+        )
+
+
 class SendEventSerializerMixin:
     def send_event(self, event, **kwargs):
         send_event(event, sender=self.context["mutation"], **kwargs)  # noqa
@@ -6,11 +6,12 @@ from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.fields.hstore import KeyTransform
 from django.contrib.postgres.fields.jsonb import KeyTextTransform
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchQuery, SearchVector
 from django.db import models
 from django.db.models.constants import LOOKUP_SEP
 from django.db.models.expressions import OrderBy, RawSQL
 from django.db.models.functions import Cast
+from django.db.models.sql.where import AND
 from django.utils import translation
 from django_filters.constants import EMPTY_VALUES
 from django_filters.fields import ChoiceField
@@ -71,7 +72,56 @@ class AscDesc(Enum):
     DESC = "DESC"
 
 
+def filter_by_predicate(qs, predicate, negate=False):
+    """Filter queryset by a `Q` object or boolean expression such as `Exists`.
+
+    With `negate`, the rows not matching the predicate are returned.
+    """
+    if isinstance(predicate, models.Q):
+        return qs.exclude(predicate) if negate else qs.filter(predicate)
+
+    if negate:
+        predicate = ~predicate
+
+    # Django 2.2 doesn't accept expressions in `filter()`. Comparing an
+    # annotation with a boolean instead would keep Postgres from planning
+    # `NOT EXISTS` as an anti-join, so the expression is added as is.
+    qs = qs.all()
+    qs.query.where.add(
+        predicate.resolve_expression(qs.query, allow_joins=True, reuse=None), AND
+    )
+    return qs
+
+
 class FilterCollectionFilter(Filter):
+    """Chain a list of filters, each of which may be inverted.
+
+    Filters can provide a predicate for a given value by implementing
+    `get_predicate(qs, value)`, returning a `Q` object or a boolean
+    expression correlated with the rows of the queryset (or `None` if not
+    possible). Inverted filters use the negated predicate. Otherwise, rows
+    are excluded with a `NOT EXISTS` correlated on the primary key, or with
+    `pk__in` for querysets which cannot be filtered any further.
+    """
+
+    def _invert(self, qs, filter, value):
+        get_predicate = getattr(filter, "get_predicate", None)
+        predicate = get_predicate(qs, value) if get_predicate else None
+        if predicate is not None:
+            return filter_by_predicate(qs, predicate, negate=True)
+
+        new_qs = filter.filter(qs, value)
+        if new_qs.query.combinator or not new_qs.query.can_filter():
+            return qs.exclude(pk__in=new_qs.values("pk"))
+
+        return filter_by_predicate(
+            qs,
+            models.Exists(
+                new_qs.order_by().filter(pk=models.OuterRef("pk")).values("pk")
+            ),
+            negate=True,
+        )
+
     def filter(self, qs, value):
         if value in EMPTY_VALUES:
             return qs
@@ -83,12 +133,10 @@ class FilterCollectionFilter(Filter):
             flt_val = flt[flt_key]
             filter = filter_coll.get_filters()[flt_key]
 
-            new_qs = filter.filter(qs, flt_val)
-
             if invert:
-                qs = qs.exclude(pk__in=new_qs)
+                qs = self._invert(qs, filter, flt_val)
             else:
-                qs = new_qs
+                qs = filter.filter(qs, flt_val)
 
         return qs
 
@@ -306,11 +354,18 @@ class SearchFilter(Filter):
     """
     Enable fulltext search on queryset.
 
-    Define fields which need to be searched in.
+    Define fields which need to be searched in, or a `search_vector` field
+    storing a precomputed vector of the model to search in instead. In the
+    latter case `search_config` is the text search configuration (or a
+    callable returning it) the vector has been built with.
     """
 
-    def __init__(self, *args, fields, **kwargs):
+    def __init__(
+        self, *args, fields=(), search_vector=None, search_config=None, **kwargs
+    ):
         self.fields = fields
+        self.search_vector = search_vector
+        self.search_config = search_config
         super().__init__(*args, **kwargs)
 
     def _get_model_field(self, model, field):
@@ -337,6 +392,12 @@ class SearchFilter(Filter):
         if value in EMPTY_VALUES:
             return qs
 
+        if self.search_vector:
+            config = self.search_config
+            if callable(config):
+                config = config()
+            return qs.filter(**{self.search_vector: SearchQuery(value, config=config)})
+
         qs = qs.annotate(
             search=SearchVector(
                 *[self._build_search_expression(field) for field in self.fields]
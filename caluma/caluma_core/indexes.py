@@ -0,0 +1,131 @@
+"""Expression indexes on the values of configured meta fields.
+
+For each key in `META_FIELDS`, every model with a `meta` field gets a btree
+index on `meta -> key`, used when ordering by the key or comparing non-string
+values, and one on `meta ->> key`, used when comparing string values.
+"""
+from hashlib import md5
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+
+META_INDEX_PREFIX = "caluma_meta_"
+META_INDEX_OPERATORS = {"json": "->", "text": "->>"}
+
+CREATE_META_INDEX = (
+    'CREATE INDEX {concurrently} "{name}" ON "{table}" ((meta {operator} %s))'
+)
+DROP_META_INDEX = 'DROP INDEX {concurrently} IF EXISTS "{name}"'
+
+EXISTING_META_INDEXES = """
+SELECT index.relname, pg_index.indisvalid
+FROM pg_index
+JOIN pg_class index ON index.oid = pg_index.indexrelid
+WHERE index.relname LIKE %s AND pg_table_is_visible(index.oid)
+"""
+
+META_INDEX_USAGE = """
+SELECT relname, indexrelname, idx_scan, pg_size_pretty(pg_relation_size(indexrelid))
+FROM pg_stat_user_indexes
+WHERE indexrelname LIKE %s
+ORDER BY relname, indexrelname
+"""
+
+
+def _like_prefix(prefix):
+    return prefix.replace("_", r"\_") + "%"
+
+
+def get_meta_models():
+    """Return all models with a `meta` field, except historical models."""
+    models = []
+    for model in apps.get_models():
+        try:
+            field = model._meta.get_field("meta")
+        except FieldDoesNotExist:
+            continue
+
+        # models of simple history refer to the model they track
+        if isinstance(field, JSONField) and not hasattr(model, "instance_type"):
+            models.append(model)
+
+    return models
+
+
+def get_meta_indexes():
+    """Return configured indexes as dict of name to table, operator and key."""
+    indexes = {}
+    for model in get_meta_models():
+        table = model._meta.db_table
+        for key in settings.META_FIELDS:
+            digest = md5(f"{table}.{key}".encode()).hexdigest()[:16]
+            for kind, operator in META_INDEX_OPERATORS.items():
+                indexes[f"{META_INDEX_PREFIX}{digest}_{kind}"] = (table, operator, key)
+
+    return indexes
+
+
+def sync_meta_indexes(using="default", dry_run=False):
+    """Create missing indexes of configured meta fields and drop obsolete ones.
+
+    Invalid indexes left over by an interrupted concurrent build are
+    recreated. Indexes are built concurrently, unless called within a
+    transaction. Returns tuple of lists of created and dropped index names.
+    """
+    connection = connections[using]
+    indexes = get_meta_indexes()
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY"
+
+    with connection.cursor() as cursor:
+        cursor.execute(EXISTING_META_INDEXES, [_like_prefix(META_INDEX_PREFIX)])
+        existing = dict(cursor.fetchall())
+
+        dropped = sorted(
+            name for name, valid in existing.items() if name not in indexes or not valid
+        )
+        created = sorted(
+            name for name in indexes if name in dropped or name not in existing
+        )
+        if dry_run:
+            return created, dropped
+
+        for name in dropped:
+            cursor.execute(DROP_META_INDEX.format(concurrently=concurrently, name=name))
+
+        for name in created:
+            table, operator, key = indexes[name]
+            cursor.execute(
+                CREATE_META_INDEX.format(
+                    concurrently=concurrently, name=name, table=table, operator=operator
+                ),
+                [key],
+            )
+
+    return created, dropped
+
+
+def get_meta_index_usage(using="default"):
+    """Return list of table, operator, key, number of scans and size of indexes.
+
+    Operator and key are `None` for indexes which are no longer configured.
+    """
+    indexes = get_meta_indexes()
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(META_INDEX_USAGE, [_like_prefix(META_INDEX_PREFIX)])
+        rows = cursor.fetchall()
+
+    usage = []
+    for table, name, scans, size in rows:
+        _, operator, key = indexes.get(name, (table, None, None))
+        usage.append((table, operator, key, scans, size))
+
+    return usage
+
+
+def sync_meta_indexes_after_migrate(using, **kwargs):
+    if settings.META_FIELDS_INDEX:
+        sync_meta_indexes(using)
@@ -1,7 +1,7 @@
 from itertools import count
 
 import pyjexl
-from pyjexl.analysis import ValidatingAnalyzer
+from pyjexl.analysis import JEXLAnalyzer, ValidatingAnalyzer
 from pyjexl.exceptions import ParseError
 from rest_framework import exceptions
 
@@ -90,3 +90,25 @@ class ExtractTransformSubjectAnalyzer(ValidatingAnalyzer):
             if not isinstance(transform.subject, type(transform)):
                 yield transform.subject.value
         yield from self.generic_visit(transform)
+
+
+class ContextReferenceAnalyzer(JEXLAnalyzer):
+    """Extract the names of all context variables an expression references."""
+
+    def visit_Identifier(self, identifier):
+        if identifier.subject is None:
+            yield identifier.value
+        else:
+            yield from self.generic_visit(identifier)
+
+    def visit_ArrayLiteral(self, array_literal):
+        for value in array_literal.value:
+            yield from self.visit(value)
+
+    def visit_ObjectLiteral(self, object_literal):
+        for value in object_literal.value.values():
+            yield from self.visit(value)
+
+    def generic_visit(self, expression):
+        for child in expression.children:
+            yield from self.visit(child)
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...events import dispatch_outbox_events
+
+
+class Command(BaseCommand):
+    """Dispatch events of the outbox to their receivers."""
+
+    help = "Dispatch events of the outbox to their receivers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of event groups dispatched concurrently.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Number of attempts after which a failing event is given up.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="Seconds to wait before polling the outbox again when it's empty.",
+        )
+        parser.add_argument(
+            "--once",
+            default=False,
+            action="store_true",
+            help="Dispatch pending events once and exit.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            dispatched = dispatch_outbox_events(
+                workers=options["workers"], max_attempts=options["max_attempts"]
+            )
+            if dispatched:
+                self.stdout.write(f"Dispatched {dispatched} events")
+            if options["once"]:
+                break
+            if not dispatched:
+                time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from ...indexes import get_meta_index_usage, get_meta_indexes, sync_meta_indexes
+
+
+class Command(BaseCommand):
+    """Create and drop expression indexes of configured meta fields."""
+
+    help = (
+        "Create expression indexes on the keys configured in `META_FIELDS` for "
+        "all models with meta, drop indexes of keys no longer configured and "
+        "report how often the indexes have been used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", dest="dry_run", default=False, action="store_true"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        indexes = get_meta_indexes()
+
+        created, dropped = sync_meta_indexes(dry_run=dry_run)
+
+        drop_str, create_str = (
+            ("Would drop", "Would create") if dry_run else ("Dropped", "Created")
+        )
+        for name in dropped:
+            self.stdout.write(f"{drop_str} index {name}")
+        for name in created:
+            table, operator, key = indexes[name]
+            self.stdout.write(
+                f"{create_str} index {name} on {table} (meta {operator} '{key}')"
+            )
+
+        for table, operator, key, scans, size in get_meta_index_usage():
+            expression = f"meta {operator} '{key}'" if key else "obsolete"
+            self.stdout.write(f"{table} ({expression}): {scans} scans, {size}")
@@ -1,6 +1,9 @@
 import uuid
 
+from django.contrib.postgres.fields import JSONField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
 from graphene.utils.str_converters import to_camel_case
 from simple_history.models import HistoricalRecords
 
@@ -87,6 +90,41 @@ class NaturalKeyModel(BaseModel):
         abstract = True
 
 
+class OutboxEvent(models.Model):
+    """
+    Event waiting to be dispatched to its receivers.
+
+    Events are written to the outbox in the transaction they happen in when
+    `EVENT_OUTBOX` is enabled, and dispatched by the `dispatch_events`
+    management command once committed.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    event = models.CharField(max_length=255)
+    sender = JSONField(encoder=DjangoJSONEncoder)
+    payload = JSONField(encoder=DjangoJSONEncoder, default=dict)
+    group = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text="Events of the same group are dispatched in order.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    dispatched_at = models.DateTimeField(blank=True, null=True)
+    failed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="caluma_core_outbox_pending",
+                condition=Q(dispatched_at__isnull=True, failed_at__isnull=True),
+            )
+        ]
+
+
 class ChoicesCharField(models.CharField):
     """
     Choices char field type with specific form field.
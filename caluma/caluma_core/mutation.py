@@ -16,6 +16,7 @@ from graphql.language import ast
 from localized_fields.fields import LocalizedField
 from rest_framework import exceptions
 
+from . import dispatch
 from .relay import extract_global_id
 
 
@@ -231,14 +232,14 @@ class Mutation(ClientIDMutation):
                 "or custom mutation has `permission_classes` properly assigned."
             )
 
-        for permission_class in cls.permission_classes:
-            if not permission_class().has_permission(cls, info):
+        for handler in dispatch.permissions.get(cls, cls.permission_classes):
+            if not handler(cls, info):
                 raise exceptions.PermissionDenied()
 
     @classmethod
     def check_object_permissions(cls, root, info, instance):
-        for permission_class in cls.permission_classes:
-            if not permission_class().has_object_permission(cls, info, instance):
+        for handler in dispatch.object_permissions.get(cls, cls.permission_classes):
+            if not handler(cls, info, instance):
                 raise exceptions.PermissionDenied()
 
     @classmethod
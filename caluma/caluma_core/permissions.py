@@ -1,8 +1,4 @@
-import inspect
-
-from django.core.exceptions import ImproperlyConfigured
-
-from .collections import list_duplicates
+from .dispatch import collect_handlers, resolve_for
 
 
 def permission_for(mutation):
@@ -59,54 +55,43 @@ class BasePermission(object):
     ...         return instance.slug != 'protected-form'
     """
 
-    def __init__(self):
-        perm_fns = inspect.getmembers(self, lambda m: hasattr(m, "_permissions"))
-        perm_muts = [
-            permission.__name__ for _, fn in perm_fns for permission in fn._permissions
-        ]
-        perm_muts_dups = list_duplicates(perm_muts)
-        if perm_muts_dups:
-            raise ImproperlyConfigured(
-                f"`permission_for` defined multiple times for "
-                f"{', '.join(perm_muts_dups)} in {str(self)}"
-            )
-        self._permissions = {
-            permission: fn for _, fn in perm_fns for permission in fn._permissions
-        }
-
-        obj_perm_fns = inspect.getmembers(
-            self, lambda m: hasattr(m, "_object_permissions")
-        )
-        obj_perm_muts = [
-            permission.__name__
-            for _, fn in obj_perm_fns
-            for permission in fn._object_permissions
-        ]
-        obj_perm_muts_dups = list_duplicates(obj_perm_muts)
-        if obj_perm_muts_dups:
-            raise ImproperlyConfigured(
-                f"`object_permission_for` defined multiple times for "
-                f"{', '.join(obj_perm_muts_dups)} in {str(self)}"
-            )
-        self._object_permissions = {
-            permission: fn
-            for _, fn in obj_perm_fns
-            for permission in fn._object_permissions
-        }
+    @classmethod
+    def get_permissions(cls):
+        """Return dict of mutation to `permission_for` function of the class."""
+        return collect_handlers(cls, "_permissions", "permission_for")
 
-    def has_permission(self, mutation, info):
-        for cls in mutation.mro():
-            if cls in self._permissions:
-                return self._permissions[cls](mutation, info)
+    @classmethod
+    def get_object_permissions(cls):
+        """Return dict of mutation to `object_permission_for` function of the class."""
+        return collect_handlers(cls, "_object_permissions", "object_permission_for")
 
-        return True
+    def has_permission(self, mutation, info):
+        handler = resolve_for(self.get_permissions(), mutation)
+        return handler(self, mutation, info) if handler else True
 
     def has_object_permission(self, mutation, info, instance):
-        for cls in mutation.mro():
-            if cls in self._object_permissions:
-                return self._object_permissions[cls](mutation, info, instance)
-
-        return True
+        handler = resolve_for(self.get_object_permissions(), mutation)
+        return handler(self, mutation, info, instance) if handler else True
+
+    def get_permission_handler(self, mutation):
+        """Return callable checking permission of given mutation.
+
+        `None` is returned when this class doesn't restrict the mutation.
+        """
+        if type(self).has_permission is not BasePermission.has_permission:
+            return self.has_permission
+        handler = resolve_for(self.get_permissions(), mutation)
+        return handler and handler.__get__(self)
+
+    def get_object_permission_handler(self, mutation):
+        """Return callable checking object permission of given mutation.
+
+        `None` is returned when this class doesn't restrict the mutation.
+        """
+        if type(self).has_object_permission is not BasePermission.has_object_permission:
+            return self.has_object_permission
+        handler = resolve_for(self.get_object_permissions(), mutation)
+        return handler and handler.__get__(self)
 
 
 class AllowAny(BasePermission):
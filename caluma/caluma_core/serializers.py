@@ -7,6 +7,7 @@ from graphql_relay import to_global_id
 from localized_fields.fields import LocalizedField
 from rest_framework import relations, serializers
 
+from . import dispatch
 from .jexl import JexlValidator
 from .relay import extract_global_id
 
@@ -62,8 +63,8 @@ class ModelSerializer(serializers.ModelSerializer):
                 "or custom mutation has `validation_classes` properly assigned."
             )
 
-        for validation_class in self.validation_classes:
-            data = validation_class().validate(mutation, data, info)
+        for handler in dispatch.validations.get(mutation, self.validation_classes):
+            data = handler(mutation, data, info)
 
         return data
 
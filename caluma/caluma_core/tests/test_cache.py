@@ -0,0 +1,19 @@
+import pytest
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from ..cache import is_shared_cache, local_cache_timeout
+
+
+@pytest.mark.parametrize(
+    "backend,shared",
+    [
+        ("django.core.cache.backends.locmem.LocMemCache", False),
+        ("django.core.cache.backends.dummy.DummyCache", False),
+        ("django.core.cache.backends.db.DatabaseCache", True),
+    ],
+)
+def test_local_cache_timeout(settings, backend, shared):
+    settings.CACHES = {"default": {"BACKEND": backend, "LOCATION": "cache"}}
+
+    assert is_shared_cache() == shared
+    assert local_cache_timeout(10) == (DEFAULT_TIMEOUT if shared else 10)
@@ -0,0 +1,123 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+
+from ...caluma_form.models import Form as FormModel
+from ...caluma_form.schema import Form, SaveForm, SaveQuestion
+from .. import dispatch
+from ..mutation import Mutation
+from ..permissions import BasePermission, permission_for
+from ..validations import BaseValidation, validation_for
+from ..visibilities import BaseVisibility, predicate_for
+
+
+class CountingPermission(BasePermission):
+    instances = 0
+
+    def __init__(self):
+        super().__init__()
+        CountingPermission.instances += 1
+
+    @permission_for(Mutation)
+    def has_permission_default(self, mutation, info):
+        return True
+
+    @permission_for(SaveForm)
+    def has_permission_for_save_form(self, mutation, info):
+        return False
+
+
+class OverridingPermission(BasePermission):
+    def has_permission(self, mutation, info):
+        return False
+
+
+def test_dispatch_table_resolves_handlers(info):
+    table = dispatch.DispatchTable("get_permission_handler")
+    table.get(SaveForm, [CountingPermission, BasePermission])
+    CountingPermission.instances = 0
+
+    handlers = set()
+    for _ in range(3):
+        (handler,) = table.get(SaveForm, [CountingPermission, BasePermission])
+        assert not handler(SaveForm, info)
+        handlers.add(handler.__self__)
+
+    # resolved once, but instantiated on every use
+    assert CountingPermission.instances == len(handlers) == 3
+
+
+def test_dispatch_table_unknown_target(info):
+    table = dispatch.DispatchTable("get_permission_handler")
+
+    class CustomMutation(Mutation):
+        class Meta:
+            abstract = True
+
+    (handler,) = table.get(CustomMutation, [CountingPermission])
+    assert handler(CustomMutation, info)
+    assert table.get(CustomMutation, [CountingPermission])[0].__func__ is (
+        handler.__func__
+    )
+
+    (handler,) = table.get(CustomMutation, [OverridingPermission])
+    assert not handler(CustomMutation, info)
+
+
+def test_dispatch_table_build():
+    class DuplicatePermission(BasePermission):
+        @permission_for(SaveForm)
+        def has_permission_for_save_form(self, mutation, info):  # pragma: no cover
+            return True
+
+        @permission_for(SaveForm)
+        def has_permission_for_save_form_2(self, mutation, info):  # pragma: no cover
+            return True
+
+    table = dispatch.DispatchTable("get_permission_handler")
+    table.build([(SaveForm, [CountingPermission])])
+    # handlers are collected once per class
+    assert CountingPermission.get_permissions() is CountingPermission.get_permissions()
+
+    # misconfigured extension classes are reported when the table is built
+    with pytest.raises(ImproperlyConfigured):
+        table.build([(SaveForm, [DuplicatePermission])])
+
+
+def test_dispatch_table_visibilities(db, info, form_factory):
+    visible = form_factory()
+    form_factory()
+
+    class PredicateVisibility(BaseVisibility):
+        @predicate_for(Form)
+        def predicate_for_form(self, node, queryset, info):
+            return Q(pk=visible.pk)
+
+    class OverridingVisibility(BaseVisibility):
+        def filter_queryset(self, node, queryset, info):
+            return queryset.none()
+
+    table = dispatch.DispatchTable("get_visibility_handler")
+    queryset = FormModel.objects.all()
+
+    (handler,) = table.get(Form, [PredicateVisibility])
+    assert list(handler(Form, queryset, info)) == [visible]
+    (handler,) = table.get(Form, [OverridingVisibility])
+    assert not handler(Form, queryset, info).exists()
+
+    # visibilities without a filter for the node are left out
+    assert table.get(Form, [BaseVisibility]) == ()
+    assert BaseVisibility().filter_queryset(Form, queryset, info) is queryset
+
+
+def test_dispatch_table_validations(info):
+    class CustomValidation(BaseValidation):
+        @validation_for(SaveForm)
+        def validate_save_form(self, mutation, data, info):
+            return {**data, "validated": True}
+
+    table = dispatch.DispatchTable("get_validation_handler")
+
+    (handler,) = table.get(SaveForm, [CustomValidation])
+    assert handler(SaveForm, {}, info) == {"validated": True}
+    assert table.get(SaveQuestion, [CustomValidation]) == ()
@@ -0,0 +1,225 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.dispatch import Signal
+
+from ...caluma_workflow import events as workflow_events
+from ...caluma_workflow.schema import CompleteWorkItem
+from .. import events
+from ..models import OutboxEvent
+
+
+@pytest.fixture
+def received():
+    received = []
+
+    def receiver(sender, **kwargs):
+        received.append((sender, kwargs))
+        if kwargs.get("fail"):
+            raise ValueError("receiver failed")
+
+    workflow_events.completed_work_item.connect(receiver)
+    yield received
+    workflow_events.completed_work_item.disconnect(receiver)
+
+
+def test_send_event(db, received, work_item, settings):
+    settings.EVENT_OUTBOX = False
+    events.send_event(
+        workflow_events.completed_work_item, sender="test", work_item=work_item
+    )
+    assert received == [
+        (
+            "test",
+            {"signal": workflow_events.completed_work_item, "work_item": work_item},
+        )
+    ]
+    assert not OutboxEvent.objects.exists()
+
+
+def test_outbox_event(db, received, work_item, settings):
+    settings.EVENT_OUTBOX = True
+    events.send_event(
+        workflow_events.completed_work_item,
+        sender=CompleteWorkItem,
+        work_item=work_item,
+    )
+    assert received == []
+
+    outbox_event = OutboxEvent.objects.get()
+    assert outbox_event.event == "caluma.caluma_workflow.events.completed_work_item"
+    assert outbox_event.group == str(work_item.case_id)
+
+    call_command("dispatch_events", "--once", workers=1)
+
+    assert received == [
+        (
+            CompleteWorkItem,
+            {"signal": workflow_events.completed_work_item, "work_item": work_item},
+        )
+    ]
+    outbox_event.refresh_from_db()
+    assert outbox_event.dispatched_at is not None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_outbox_retry(transactional_db, received, work_item_factory, settings, workers):
+    settings.EVENT_OUTBOX = True
+    work_item, other_work_item = work_item_factory.create_batch(2)
+    for kwargs in [
+        {"work_item": work_item, "fail": True},
+        {"work_item": work_item},
+        {"work_item": other_work_item},
+    ]:
+        events.send_event(workflow_events.completed_work_item, sender="test", **kwargs)
+
+    # following events of the same case wait for the failed one
+    assert events.dispatch_outbox_events(workers=workers, max_attempts=2) == 1
+    assert {kwargs["work_item"] for _, kwargs in received} == {
+        work_item,
+        other_work_item,
+    }
+    failed = OutboxEvent.objects.order_by("pk").first()
+    assert failed.attempts == 1
+    assert "receiver failed" in failed.last_error
+
+    # after the last attempt, the event is given up
+    assert events.dispatch_outbox_events(workers=workers, max_attempts=2) == 1
+    failed.refresh_from_db()
+    assert failed.failed_at is not None
+    assert [kwargs["work_item"] for _, kwargs in received][-1] == work_item
+    assert not OutboxEvent.objects.filter(dispatched_at__isnull=True, failed_at=None)
+
+
+def test_outbox_batch_event(db, work_item_factory, settings, django_assert_num_queries):
+    settings.EVENT_OUTBOX = True
+    work_items = work_item_factory.create_batch(3)
+    received = []
+
+    def receiver(sender, work_items, **kwargs):
+        received.append(work_items)
+
+    events.send_event(
+        workflow_events.completed_work_items, sender="test", work_items=work_items
+    )
+    workflow_events.completed_work_items.connect(receiver)
+    try:
+        # lock, load of the event and its work items, update of the event, unlock
+        with django_assert_num_queries(5):
+            events.dispatch_outbox_events()
+    finally:
+        workflow_events.completed_work_items.disconnect(receiver)
+
+    assert received == [work_items]
+
+
+def test_send_event_outbox_other_signal(db, settings):
+    settings.EVENT_OUTBOX = True
+    signal = Signal()
+    received = []
+
+    def receiver(sender, **kwargs):
+        received.append(sender)
+
+    signal.connect(receiver)
+    # signals outside of the `events` modules of the apps are sent directly
+    events.send_event(signal, sender="test")
+
+    assert received == ["test"]
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_outbox_deleted_object(db, received, work_item_factory, settings, batch):
+    settings.EVENT_OUTBOX = True
+    work_item = work_item_factory()
+    other_work_item = work_item_factory(case=work_item.case)
+    if batch:
+        events.send_event(
+            workflow_events.completed_work_items,
+            sender="test",
+            work_items=[work_item, other_work_item],
+        )
+    else:
+        events.send_event(
+            workflow_events.completed_work_item, sender="test", work_item=work_item
+        )
+    events.send_event(
+        workflow_events.completed_work_item, sender="test", work_item=other_work_item
+    )
+    work_item.delete()
+
+    # the event of the deleted work item is given up without blocking its case
+    assert events.dispatch_outbox_events(max_attempts=5) == 1
+    assert [kwargs["work_item"] for _, kwargs in received] == [other_work_item]
+    given_up = OutboxEvent.objects.order_by("pk").first()
+    assert given_up.failed_at is not None
+    assert "does not exist" in given_up.last_error
+
+
+def test_outbox_single_dispatcher(db, received, work_item, settings):
+    settings.EVENT_OUTBOX = True
+    events.send_event(
+        workflow_events.completed_work_item, sender="test", work_item=work_item
+    )
+
+    # another dispatcher holding the lock
+    other_connection = connection.copy()
+    try:
+        with other_connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_lock(hashtext(%s))", [events.DISPATCH_LOCK]
+            )
+            assert events.dispatch_outbox_events() == 0
+            cursor.execute(
+                "SELECT pg_advisory_unlock(hashtext(%s))", [events.DISPATCH_LOCK]
+            )
+    finally:
+        other_connection.close()
+
+    assert events.dispatch_outbox_events() == 1
+    assert len(received) == 1
+
+
+def test_outbox_plain_list(db, received, work_item, settings):
+    settings.EVENT_OUTBOX = True
+    events.send_event(
+        workflow_events.completed_work_item,
+        sender="test",
+        work_item=work_item,
+        values=[1, "a", [work_item]],
+    )
+
+    assert events.dispatch_outbox_events() == 1
+    assert received[0][1]["values"] == [1, "a", [work_item]]
+
+
+def test_outbox_dispatch_error(db, settings):
+    settings.EVENT_OUTBOX = True
+    outbox_event = OutboxEvent.objects.create(
+        event="caluma.caluma_workflow.events.unknown", sender={"value": "test"}
+    )
+
+    # unexpected errors are retried like failing receivers
+    assert events.dispatch_outbox_events(max_attempts=2) == 0
+    outbox_event.refresh_from_db()
+    assert outbox_event.attempts == 1
+    assert "ImportError" in outbox_event.last_error
+    assert outbox_event.failed_at is None
+
+
+def test_dispatch_events_polling(db, mocker):
+    class Stop(Exception):
+        pass
+
+    dispatch = mocker.patch(
+        "caluma.caluma_core.management.commands.dispatch_events.dispatch_outbox_events",
+        side_effect=[1, 0],
+    )
+    sleep = mocker.patch("time.sleep", side_effect=Stop)
+
+    with pytest.raises(Stop):
+        call_command("dispatch_events", interval=3)
+
+    assert dispatch.call_count == 2
+    sleep.assert_called_once_with(3)
@@ -1,3 +1,12 @@
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+from ...caluma_form.models import Question
+from ...caluma_workflow.filters import CaseFilterSet, WorkItemFilterSet
+from ...caluma_workflow.models import Case, WorkItem
+from ..filters import FilterCollectionFilter
 from ..relay import extract_global_id
 
 
@@ -70,3 +79,188 @@ def test_inversible_inline(db, schema_executor, document_factory):
     assert str(nope.pk) not in result_ids
     assert str(found.pk) in result_ids
     assert str(excluded.pk) not in result_ids
+
+
+INVERTED_WORK_ITEMS_QUERY = """
+    query ($filter: [WorkItemFilterSetType]) {
+      allWorkItems(filter: $filter) {
+        edges {
+          node {
+            id
+          }
+        }
+      }
+    }
+"""
+
+
+@pytest.mark.parametrize("question__type", [Question.TYPE_TEXT])
+@pytest.mark.parametrize("filter_key", ["documentHasAnswer", "caseDocumentHasAnswer"])
+def test_inversible_has_answer(
+    db, schema_executor, work_item_factory, question, filter_key
+):
+    answered, unanswered = work_item_factory.create_batch(2)
+    without_document = work_item_factory(document=None, case__document=None)
+
+    for work_item, value in [(answered, "yes"), (unanswered, "no")]:
+        document = (
+            work_item.document
+            if filter_key == "documentHasAnswer"
+            else work_item.case.document
+        )
+        document.answers.create(question=question, value=value)
+
+    variables = {
+        "filter": [
+            {filter_key: [{"question": question.slug, "value": "yes"}], "invert": True}
+        ]
+    }
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(INVERTED_WORK_ITEMS_QUERY, variable_values=variables)
+
+    assert not result.errors
+    assert {
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allWorkItems"]["edges"]
+    } == {str(unanswered.pk), str(without_document.pk)}
+    assert any("NOT EXISTS" in query["sql"] for query in context.captured_queries)
+
+
+def test_inversible_fallback(db, schema_executor, work_item_factory):
+    ready, completed, suspended = (
+        work_item_factory(status=status)
+        for status in ["ready", "completed", "suspended"]
+    )
+    assert not hasattr(WorkItemFilterSet.base_filters["status"], "get_predicate")
+
+    variables = {"filter": [{"status": "READY", "invert": True}]}
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(INVERTED_WORK_ITEMS_QUERY, variable_values=variables)
+
+    assert not result.errors
+    assert {
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allWorkItems"]["edges"]
+    } == {str(completed.pk), str(suspended.pk)}
+    assert any("NOT EXISTS" in query["sql"] for query in context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    "filter_qs,expected",
+    [
+        (
+            lambda qs: qs.filter(status="ready").union(qs.filter(status="suspended")),
+            {"completed"},
+        ),
+        (lambda qs: qs.order_by("status")[:1], {"ready", "suspended"}),
+    ],
+)
+def test_inversible_fallback_pk_in(db, work_item_factory, filter_qs, expected):
+    for status in ["ready", "completed", "suspended"]:
+        work_item_factory(status=status)
+
+    class CombinedFilter:
+        def filter(self, qs, value):
+            return filter_qs(qs)
+
+    qs = FilterCollectionFilter()._invert(WorkItem.objects.all(), CombinedFilter(), 1)
+
+    assert "NOT EXISTS" not in str(qs.query)
+    assert {work_item.status for work_item in qs} == expected
+
+
+def test_inversible_q_predicate(db, work_item_factory):
+    for status in ["ready", "completed", "suspended"]:
+        work_item_factory(status=status)
+
+    class PredicateFilter:
+        def get_predicate(self, qs, value):
+            return Q(status=value)
+
+    qs = FilterCollectionFilter()._invert(
+        WorkItem.objects.all(), PredicateFilter(), "ready"
+    )
+
+    assert {work_item.status for work_item in qs} == {"completed", "suspended"}
+
+
+INVERTED_CASES_QUERY = """
+    query ($filter: [CaseFilterSetType]) {
+      allCases(filter: $filter) {
+        edges {
+          node {
+            id
+          }
+        }
+      }
+    }
+"""
+
+
+@pytest.mark.parametrize("question__type", [Question.TYPE_TEXT])
+@pytest.mark.parametrize(
+    "filter_key,filter_name,has_predicate",
+    [
+        ("hasAnswer", "has_answer", True),
+        ("searchAnswers", "search_answers", True),
+        # correlating a to-many path would duplicate rows, so the matching
+        # cases are excluded by the fallback instead
+        ("workItemDocumentHasAnswer", "work_item_document_has_answer", False),
+    ],
+)
+def test_inversible_case_answers(
+    db,
+    schema_executor,
+    case_factory,
+    work_item_factory,
+    question,
+    filter_key,
+    filter_name,
+    has_predicate,
+):
+    answered, unanswered = case_factory.create_batch(2)
+    for case, value in [(answered, "yes"), (unanswered, "no")]:
+        case.document.answers.create(question=question, value=value)
+        work_item_factory(case=case, child_case=None).document.answers.create(
+            question=question, value=value
+        )
+
+    if filter_key == "searchAnswers":
+        value = [{"questions": [question.slug], "value": "yes"}]
+    else:
+        value = [{"question": question.slug, "value": "yes"}]
+
+    filter = CaseFilterSet.base_filters[filter_name]
+    predicate = filter.get_predicate(Case.objects.all(), value)
+    assert (predicate is not None) == has_predicate
+
+    variables = {"filter": [{filter_key: value, "invert": True}]}
+    result = schema_executor(INVERTED_CASES_QUERY, variable_values=variables)
+
+    assert not result.errors
+    assert [
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allCases"]["edges"]
+    ] == [str(unanswered.pk)]
+
+
+@pytest.mark.parametrize(
+    "filter_key,value",
+    [
+        ("hasAnswer", []),
+        ("searchAnswers", []),
+        ("searchAnswers", [{"questions": ["question"], "value": " "}]),
+    ],
+)
+def test_inversible_case_answers_empty(
+    db, schema_executor, case_factory, question_factory, filter_key, value
+):
+    case_factory()
+    question_factory(slug="question", type=Question.TYPE_TEXT)
+
+    # without any conditions, the filters match all cases
+    variables = {"filter": [{filter_key: value, "invert": True}]}
+    result = schema_executor(INVERTED_CASES_QUERY, variable_values=variables)
+
+    assert not result.errors
+    assert result.data["allCases"]["edges"] == []
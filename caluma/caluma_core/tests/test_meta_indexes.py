@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from ...caluma_form.models import Document
+from .. import indexes
+
+
+def _index_definitions():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE indexname LIKE %s",
+            [f"{indexes.META_INDEX_PREFIX}%"],
+        )
+        return dict(cursor.fetchall())
+
+
+def test_get_meta_indexes(settings):
+    settings.META_FIELDS = ["foo"]
+
+    tables = {table for table, _, _ in indexes.get_meta_indexes().values()}
+    assert Document._meta.db_table in tables
+    assert "caluma_form_historicaldocument" not in tables
+    assert len(indexes.get_meta_indexes()) == len(tables) * 2
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_sync_meta_indexes_command(db, settings, dry_run):
+    settings.META_FIELDS = ["foo-bar"]
+
+    out = StringIO()
+    call_command("sync_meta_indexes", dry_run=dry_run, stdout=out)
+
+    definitions = _index_definitions()
+    if dry_run:
+        assert not definitions
+        assert "Would create index" in out.getvalue()
+        return
+
+    assert len(definitions) == len(indexes.get_meta_indexes())
+    assert any(
+        "caluma_form_document" in definition and "->> 'foo-bar'" in definition
+        for definition in definitions.values()
+    )
+    assert "caluma_form_document (meta -> 'foo-bar'): 0 scans" in out.getvalue()
+
+    # nothing to do when in sync
+    assert indexes.sync_meta_indexes() == ([], [])
+
+    settings.META_FIELDS = []
+    out = StringIO()
+    call_command("sync_meta_indexes", stdout=out)
+    assert all(f"Dropped index {name}" in out.getvalue() for name in definitions)
+    assert "Created index" not in out.getvalue()
+    assert not _index_definitions()
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_sync_meta_indexes_after_migrate(db, settings, enabled):
+    settings.META_FIELDS = ["foo"]
+    settings.META_FIELDS_INDEX = enabled
+
+    indexes.sync_meta_indexes_after_migrate(using="default")
+
+    assert bool(_index_definitions()) == enabled
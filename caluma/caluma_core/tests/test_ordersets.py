@@ -118,3 +118,42 @@ def test_order_by_case_document_answer(
         assert work_items == [str(w1.id), str(w2.id)]
     else:
         assert work_items == [str(w2.id), str(w1.id)]
+
+
+@pytest.mark.parametrize("question__type", [Question.TYPE_INTEGER])
+def test_order_by_multiple_document_answers(
+    db, schema_executor, work_item_factory, document_factory, question
+):
+    w1, w2, w3 = work_item_factory.create_batch(3)
+
+    for work_item, case_value, value in [(w1, 1, 3), (w2, 2, 1), (w3, 1, 2)]:
+        work_item.document = document_factory()
+        work_item.save()
+        work_item.case.document.answers.create(question=question, value=case_value)
+        work_item.document.answers.create(question=question, value=value)
+
+    query = """
+        query workitems {
+          allWorkItems(order: [
+            {caseDocumentAnswer: "%s", direction: DESC},
+            {documentAnswer: "%s"}
+          ]) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """ % (
+        question.slug,
+        question.slug,
+    )
+
+    result = schema_executor(query)
+
+    assert not result.errors
+    assert [
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allWorkItems"]["edges"]
+    ] == [str(w2.id), str(w3.id), str(w1.id)]
@@ -61,7 +61,7 @@ def test_custom_permission_override_has_permission_with_duplicates(db, info):
             return False
 
     with pytest.raises(ImproperlyConfigured):
-        CustomPermission()
+        CustomPermission.get_permissions()
 
 
 def test_custom_permission_override_has_object_permission_with_duplicates(db, info):
@@ -90,7 +90,7 @@ def test_custom_permission_override_has_object_permission_with_duplicates(db, in
             return False
 
     with pytest.raises(ImproperlyConfigured):
-        CustomPermission()
+        CustomPermission.get_object_permissions()
 
 
 def test_custom_permission_override_has_permission_with_multiple_mutations(
@@ -51,7 +51,7 @@ def test_custom_validation_override_validate_with_duplicates(db, info):
             return data
 
     with pytest.raises(ImproperlyConfigured):
-        CustomValidation()
+        CustomValidation.get_validations()
 
 
 def test_custom_validation_override_validate_no_class_match(db, info):
@@ -1,10 +1,20 @@
+from types import SimpleNamespace
+
 import pytest
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import CharField
+from django.db.models import CharField, Q
 
 from .. import models
 from ..types import DjangoObjectType, Node
-from ..visibilities import BaseVisibility, Union, filter_queryset_for
+from ..visibilities import (
+    Any,
+    BaseVisibility,
+    Union,
+    VisibilityContext,
+    cached_for_request,
+    filter_queryset_for,
+    predicate_for,
+)
 from .fake_model import get_fake_model
 
 
@@ -49,7 +59,7 @@ def test_custom_visibility_override_filter_queryset_with_duplicates(db, history_
             return queryset.none()
 
     with pytest.raises(ImproperlyConfigured):
-        CustomVisibility()
+        CustomVisibility.get_filters()
 
 
 def test_custom_node_filter_queryset_improperly_configured(db, history_mock):
@@ -207,3 +217,144 @@ def test_custom_visibility_chained_decorators(db, history_mock):
     assert queryset.count() == 1
     queryset = CustomVisibility().filter_queryset(CustomNode2, FakeModel2.objects, None)
     assert queryset.count() == 1
+
+
+def test_cached_for_request(db, admin_info):
+    calls = []
+
+    class CustomVisibility(BaseVisibility):
+        @cached_for_request
+        def get_visible(self, node, queryset, info):
+            calls.append(node)
+            return queryset
+
+    CustomVisibility().get_visible(Node, None, admin_info)
+    CustomVisibility().get_visible(Node, None, admin_info)
+    assert len(calls) == 1
+
+    # without a request, nothing is cached
+    CustomVisibility().get_visible(Node, None, None)
+    CustomVisibility().get_visible(Node, None, None)
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "operation,limit,materialized",
+    [
+        ("query", 2, True),
+        ("query", 1, False),
+        ("mutation", 2, False),
+        ("query", 0, False),
+    ],
+)
+def test_visibility_context_materialize(
+    db, history_mock, settings, admin_info, operation, limit, materialized
+):
+    settings.VISIBILITY_MATERIALIZE_LIMIT = limit
+    admin_info.operation = SimpleNamespace(operation=operation)
+    FakeModel = get_fake_model(model_base=models.UUIDModel)
+    FakeModel.objects.create()
+    FakeModel.objects.create()
+
+    context = VisibilityContext.for_info(admin_info)
+    assert VisibilityContext.for_info(admin_info) is context
+
+    queryset = FakeModel.objects.all()
+    result = context.materialize(queryset, admin_info)
+    assert isinstance(result, list) == materialized
+    assert FakeModel.objects.filter(pk__in=result).count() == 2
+
+
+def test_visibility_context_pages(db, schema_executor, anonymous_request, form):
+    query = "query { allForms { edges { node { slug } } } }"
+    assert not schema_executor(query).errors
+
+    context = VisibilityContext.for_request(anonymous_request)
+    assert context.pop_pages() == [form]
+    assert context.pop_pages() == []
+
+    # pages of mutations are not recorded
+    mutation = """
+        mutation {
+          saveForm(input: {slug: "other", name: "Other"}) {
+            form { questions { edges { node { slug } } } }
+          }
+        }
+    """
+    assert not schema_executor(mutation).errors
+    assert context.pop_pages() == []
+
+
+def test_union_visibility_predicates(db, history_mock):
+    FakeModel = get_fake_model(
+        dict(name=CharField(max_length=255)), model_base=models.UUIDModel
+    )
+    for name in ["Name1", "Name2", "Name3", "Name4"]:
+        FakeModel.objects.create(name=name)
+
+    class CustomNode(DjangoObjectType):
+        class Meta:
+            model = FakeModel
+
+    class Name1Visibility(BaseVisibility):
+        @predicate_for(CustomNode)
+        def predicate_for_custom_node(self, node, queryset, info):
+            return Q(name="Name1")
+
+    class Name2Visibility(BaseVisibility):
+        @predicate_for(CustomNode)
+        def predicate_for_custom_node(self, node, queryset, info):
+            return Q(name="Name2")
+
+    class Name3Visibility(BaseVisibility):
+        @filter_queryset_for(CustomNode)
+        def filter_queryset_for_custom_node(self, node, queryset, info):
+            return queryset.filter(name="Name3")
+
+    class PredicateUnion(Union):
+        visibility_classes = [Name1Visibility, Name2Visibility]
+
+    class MixedUnion(Union):
+        visibility_classes = [Name1Visibility, Name3Visibility]
+
+    class NestedUnion(Union):
+        visibility_classes = [PredicateUnion, Name3Visibility]
+
+    class AnyUnion(Union):
+        visibility_classes = [Name1Visibility, Any]
+
+    class MixedAnyUnion(Union):
+        visibility_classes = [Name3Visibility, Any]
+
+    queryset = FakeModel.objects
+    result = Name1Visibility().filter_queryset(CustomNode, queryset, None)
+    assert list(result.values_list("name", flat=True)) == ["Name1"]
+
+    assert PredicateUnion().get_predicate(CustomNode, queryset, None) == Q(
+        name="Name1"
+    ) | Q(name="Name2")
+    assert MixedUnion().get_predicate(CustomNode, queryset, None) is None
+
+    for union, names in [
+        (PredicateUnion, {"Name1", "Name2"}),
+        (MixedUnion, {"Name1", "Name3"}),
+        (NestedUnion, {"Name1", "Name2", "Name3"}),
+        (AnyUnion, {"Name1", "Name2", "Name3", "Name4"}),
+        (MixedAnyUnion, {"Name1", "Name2", "Name3", "Name4"}),
+    ]:
+        result = union().filter_queryset(CustomNode, queryset, None)
+        assert set(result.values_list("name", flat=True)) == names
+
+
+def test_custom_visibility_predicate_with_duplicates(db):
+    class CustomVisibility(BaseVisibility):
+        @filter_queryset_for(Node)
+        def filter_queryset_for_all(self, node, queryset, info):  # pragma: no cover
+            return queryset
+
+        @predicate_for(Node)
+        def predicate_for_all(self, node, queryset, info):  # pragma: no cover
+            return Q()
+
+    with pytest.raises(ImproperlyConfigured):
+        CustomVisibility.get_filters()
@@ -8,8 +8,11 @@ from graphene.relay.connection import ConnectionField
 from graphene_django import types
 from graphene_django.fields import DjangoConnectionField
 from graphene_django.utils import maybe_queryset
+from promise import Promise
 
+from . import dispatch
 from .pagination import connection_from_list, connection_from_list_slice
+from .visibilities import VisibilityContext
 
 
 class Node(object):
@@ -27,8 +30,8 @@ class Node(object):
                 "or custom node has `visibility_classes` properly assigned."
             )
 
-        for visibility_class in cls.visibility_classes:
-            queryset = visibility_class().filter_queryset(cls, queryset, info)
+        for handler in dispatch.visibilities.get(cls, cls.visibility_classes):
+            queryset = handler(cls, queryset, info)
 
         return queryset.select_related()
 
@@ -94,6 +97,48 @@ class DjangoConnectionField(DjangoConnectionField):
         connection.length = _len
         return connection
 
+    @classmethod
+    def connection_resolver(
+        cls,
+        resolver,
+        connection,
+        default_manager,
+        queryset_resolver,
+        max_limit,
+        enforce_first_or_last,
+        root,
+        info,
+        **args,
+    ):
+        """Record the nodes of each page of a query in the visibility context.
+
+        Mutations may change the nodes after their pages have been resolved,
+        so their pages are not recorded.
+        """
+        resolved = super().connection_resolver(
+            resolver,
+            connection,
+            default_manager,
+            queryset_resolver,
+            max_limit,
+            enforce_first_or_last,
+            root,
+            info,
+            **args,
+        )
+        if info.operation.operation != "query":
+            return resolved
+
+        def record_page(connection):
+            context = VisibilityContext.for_info(info)
+            context.add_page([edge.node for edge in connection.edges])
+            return connection
+
+        if Promise.is_thenable(resolved):  # pragma: no cover
+            return Promise.resolve(resolved).then(record_page)
+
+        return record_page(resolved)
+
 
 class ConnectionField(ConnectionField):
     """
@@ -1,8 +1,4 @@
-import inspect
-
-from django.core.exceptions import ImproperlyConfigured
-
-from .collections import list_duplicates
+from .dispatch import collect_handlers, resolve_for
 
 
 def validation_for(mutation):
@@ -45,26 +41,21 @@ class BaseValidation(object):
     ...         return data
     """
 
-    def __init__(self):
-        validation_fns = inspect.getmembers(self, lambda m: hasattr(m, "_validations"))
-
-        validation_muts = [
-            mutation.__name__
-            for _, fn in validation_fns
-            for mutation in fn._validations
-        ]
-        validation_muts_dups = list_duplicates(validation_muts)
-        if validation_muts_dups:
-            raise ImproperlyConfigured(
-                f"`validation_for` defined multiple times for "
-                f"{', '.join(validation_muts_dups)} in {str(self)}"
-            )
-        self._validations = {
-            mutation: fn for _, fn in validation_fns for mutation in fn._validations
-        }
+    @classmethod
+    def get_validations(cls):
+        """Return dict of mutation to `validation_for` function of the class."""
+        return collect_handlers(cls, "_validations", "validation_for")
 
     def validate(self, mutation, data, info):
-        for cls in mutation.mro():
-            if cls in self._validations:
-                return self._validations[cls](mutation, data, info)
-        return data
+        handler = resolve_for(self.get_validations(), mutation)
+        return handler(self, mutation, data, info) if handler else data
+
+    def get_validation_handler(self, mutation):
+        """Return callable validating data of given mutation.
+
+        `None` is returned when this class doesn't validate the mutation.
+        """
+        if type(self).validate is not BaseValidation.validate:
+            return self.validate
+        handler = resolve_for(self.get_validations(), mutation)
+        return handler and handler.__get__(self)
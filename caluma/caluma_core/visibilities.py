@@ -1,8 +1,12 @@
-import inspect
+from collections import defaultdict
+from functools import lru_cache, reduce, wraps
+from types import MappingProxyType
 
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
 
-from .collections import list_duplicates
+from .dispatch import decorated_functions
 
 
 def filter_queryset_for(node):
@@ -18,6 +22,118 @@ def filter_queryset_for(node):
     return decorate
 
 
+def predicate_for(node):
+    """Decorate function to define filtering of specific node as a `Q` object.
+
+    Other than `filter_queryset_for` this does not filter a queryset directly
+    but returns a predicate which may be combined with other predicates, e.g.
+    by the `Union` visibility. Return an empty `Q()` to not restrict the
+    queryset at all.
+    """
+
+    def decorate(fn):
+        if not hasattr(fn, "_predicates"):
+            fn._predicates = []
+
+        fn._predicates.append(node)
+        return fn
+
+    return decorate
+
+
+class VisibilityContext(object):
+    """Per-request store of computed visibility filters.
+
+    Visibility classes are evaluated for every node type that is resolved,
+    so the same (often deeply nested) subqueries are built over and over
+    within a single request. The context memoizes them on the request, so
+    every filter is only computed once.
+    """
+
+    _attr_name = "_caluma_visibility_context"
+
+    def __init__(self):
+        self._cache = {}
+        self._materialized = {}
+        self._pages = []
+
+    @classmethod
+    def for_info(cls, info):
+        """Return the context of the request `info` belongs to.
+
+        Without a request (e.g. when visibilities are used outside of
+        GraphQL), a fresh context is returned so nothing is cached.
+        """
+        return cls.for_request(getattr(info, "context", None))
+
+    @classmethod
+    def for_request(cls, request):
+        """Return the context of the given request, e.g. of a filterset."""
+        if request is None:
+            return cls()
+
+        context = getattr(request, cls._attr_name, None)
+        if context is None:
+            context = cls()
+            setattr(request, cls._attr_name, context)
+
+        return context
+
+    def get_or_set(self, key, default):
+        if key not in self._cache:
+            self._cache[key] = default()
+        return self._cache[key]
+
+    def add_page(self, nodes):
+        """Record the nodes of a resolved connection page.
+
+        Fields resolved for each of the nodes may then compute their results
+        for the whole page at once (see `pop_pages`).
+        """
+        self._pages.append(nodes)
+
+    def pop_pages(self):
+        """Return the nodes of the pages recorded since the last call."""
+        pages, self._pages = self._pages, []
+        return [node for nodes in pages for node in nodes]
+
+    def materialize(self, queryset, info):
+        """Return visible primary keys as a list if the result set is small.
+
+        Subsequent filters then embed a plain array instead of the whole
+        subquery. This is only done for queries, as mutations may create
+        objects which would then be missing from the materialized list.
+        """
+        limit = settings.VISIBILITY_MATERIALIZE_LIMIT
+        operation = getattr(getattr(info, "operation", None), "operation", None)
+        if not limit or operation != "query":
+            return queryset.values("pk")
+
+        if queryset not in self._materialized:
+            pks = list(queryset.values_list("pk", flat=True)[: limit + 1])
+            self._materialized[queryset] = pks if len(pks) <= limit else None
+
+        pks = self._materialized[queryset]
+        return queryset.values("pk") if pks is None else pks
+
+
+def cached_for_request(fn):
+    """Decorate visibility helper to compute its result only once per request.
+
+    The result of the decorated method must only depend on the `info` object,
+    as it is reused for all nodes resolved within the same request.
+    """
+
+    @wraps(fn)
+    def wrapper(self, node, queryset, info):
+        context = VisibilityContext.for_info(info)
+        return context.get_or_set(
+            (type(self), fn.__name__), lambda: fn(self, node, queryset, info)
+        )
+
+    return wrapper
+
+
 class BaseVisibility(object):
     """Basic visibility classes to be extended by any visibility implementation.
 
@@ -37,32 +153,99 @@ class BaseVisibility(object):
     ...     @filter_queryset_for(Form)
     ...     def filter_queryset_for_form(self, node, queryset, info):
     ...         return queryset.exclude(slug='protected-form')
+
+    Instead of `@filter_queryset_for` the decorator `@predicate_for` may be
+    used to return a `Q` object, which allows combining visibilities
+    efficiently.
     """
 
-    def __init__(self):
-        queryset_fns = inspect.getmembers(self, lambda m: hasattr(m, "_visibilities"))
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_filters(cls):
+        """
+        Return dicts of node to `filter_queryset_for` and `predicate_for` functions.
 
-        queryset_nodes = [
-            node.__name__ for _, fn in queryset_fns for node in fn._visibilities
-        ]
-        queryset_nodes_dups = list_duplicates(queryset_nodes)
-        if queryset_nodes_dups:
+        A filter defined in a subclass takes precedence over filters of the
+        same node defined in a base class, no matter whether it is a
+        `filter_queryset_for` or a `predicate_for` filter. The filters are
+        collected once per class.
+        """
+        mro = cls.__mro__
+        candidates = defaultdict(list)
+        for kind, attr in [("queryset", "_visibilities"), ("predicate", "_predicates")]:
+            for name, fn in decorated_functions(cls, attr):
+                depth = next(i for i, base in enumerate(mro) if name in vars(base))
+                for node in getattr(fn, attr):
+                    candidates[node].append((depth, kind, fn))
+
+        filters = {"queryset": {}, "predicate": {}}
+        duplicates = []
+        for node, entries in candidates.items():
+            depth = min(entry[0] for entry in entries)
+            entries = [entry for entry in entries if entry[0] == depth]
+            if len(entries) > 1:
+                duplicates.append(node.__name__)
+            _, kind, fn = entries[0]
+            filters[kind][node] = fn
+
+        if duplicates:
             raise ImproperlyConfigured(
                 f"`filter_queryset_for` defined multiple times for "
-                f"{', '.join(queryset_nodes_dups)} in {str(self)}"
+                f"{', '.join(duplicates)} in {cls}"
             )
 
-        self._filter_querysets_for = {
-            node: fn for _, fn in queryset_fns for node in fn._visibilities
-        }
+        return (
+            MappingProxyType(filters["queryset"]),
+            MappingProxyType(filters["predicate"]),
+        )
 
-    def filter_queryset(self, node, queryset, info):
+    def _resolve_filter(self, node):
+        """Return kind and bound function of the most specific filter of node."""
+        filter_querysets_for, predicates_for = self.get_filters()
         for cls in node.mro():
-            if cls in self._filter_querysets_for:
-                return self._filter_querysets_for[cls](node, queryset, info)
+            if cls in filter_querysets_for:
+                return "queryset", filter_querysets_for[cls].__get__(self)
+            if cls in predicates_for:
+                return "predicate", predicates_for[cls].__get__(self)
+
+        return None, None
+
+    def filter_queryset(self, node, queryset, info):
+        kind, fn = self._resolve_filter(node)
+        if kind == "queryset":
+            return fn(node, queryset, info)
+        if kind == "predicate":
+            return queryset.filter(fn(node, queryset, info))
 
         return queryset
 
+    def get_predicate(self, node, queryset, info):
+        """Return visibility of given node as `Q` object.
+
+        `None` is returned when the most specific filter of the node is
+        defined with `filter_queryset_for` and can't be expressed as predicate.
+        """
+        kind, fn = self._resolve_filter(node)
+        if kind == "queryset":
+            return None
+        if kind == "predicate":
+            return fn(node, queryset, info)
+
+        return Q()
+
+    def get_visibility_handler(self, node):
+        """Return callable filtering queryset of given node.
+
+        `None` is returned when this class doesn't restrict the node.
+        """
+        if type(self).filter_queryset is not BaseVisibility.filter_queryset:
+            return self.filter_queryset
+
+        kind, fn = self._resolve_filter(node)
+        if kind == "predicate":
+            return self.filter_queryset
+        return fn
+
 
 class Any(BaseVisibility):
     """No restrictions, all nodes are exposed."""
@@ -71,20 +254,59 @@ class Any(BaseVisibility):
 
 
 class Union(BaseVisibility):
-    """Union result of a list of configured visibility classes."""
+    """Union result of a list of configured visibility classes.
+
+    Predicates of visibility classes are OR-ed in a single filter, which lets
+    the database plan the visibility together with the rest of the query.
+    Visibility classes which only implement `filter_queryset_for` are
+    combined with SQL `UNION` instead.
+    """
 
     visibility_classes = []
 
+    @staticmethod
+    def _combine(predicates):
+        # an empty predicate doesn't restrict anything, so neither does the union
+        if not all(predicates):
+            return Q()
+        return reduce(lambda a, b: a | b, predicates)
+
+    def get_predicate(self, node, queryset, info):
+        predicates = [
+            visibility_class().get_predicate(node, queryset, info)
+            for visibility_class in self.visibility_classes
+        ]
+        if any(predicate is None for predicate in predicates):
+            return None
+
+        return self._combine(predicates) if predicates else Q()
+
     def filter_queryset(self, node, queryset, info):
+        predicates = []
         result_queryset = None
         for visibility_class in self.visibility_classes:
-            class_result = visibility_class().filter_queryset(node, queryset, info)
+            visibility = visibility_class()
+            predicate = visibility.get_predicate(node, queryset, info)
+            if predicate is not None:
+                predicates.append(predicate)
+                continue
+
+            class_result = visibility.filter_queryset(node, queryset, info)
             if result_queryset is None:
                 result_queryset = class_result
             else:
                 result_queryset = result_queryset.union(class_result)
 
-        if result_queryset is not None:
-            queryset = queryset.filter(pk__in=result_queryset.values("pk"))
+        if result_queryset is None:
+            return (
+                queryset.filter(self._combine(predicates)) if predicates else queryset
+            )
 
-        return queryset
+        predicate = Q(pk__in=result_queryset.values("pk"))
+        if predicates:
+            combined = self._combine(predicates)
+            if not combined:
+                return queryset
+            predicate |= combined
+
+        return queryset.filter(predicate)
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DefaultConfig(AppConfig):
     name = "caluma.caluma_form"
+
+    def ready(self):
+        from .indexes import sync_indexes_after_migrate
+
+        post_migrate.connect(sync_indexes_after_migrate, sender=self)
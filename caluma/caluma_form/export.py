@@ -0,0 +1,217 @@
+"""Streaming export of documents with their answers flattened into rows.
+
+Documents are read with a server side cursor and their answers are fetched
+for a chunk of documents at a time, so memory usage doesn't depend on the
+number of exported documents.
+
+Every row contains a column per question of the form, including the questions
+of its sub forms, named after the question slug with a `question.` prefix so
+they can't clash with the columns of the document. Table answers are exported
+as a list of row objects holding the answers of each row.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import AnswerDocument, Question
+
+DOCUMENT_COLUMNS = (
+    "id",
+    "form",
+    "created_at",
+    "modified_at",
+    "created_by_user",
+    "created_by_group",
+)
+
+QUESTION_COLUMN_PREFIX = "question."
+
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def get_form_questions(form, seen=None):
+    """Return questions with answers of given form and its sub forms, in form order.
+
+    Questions used in several sub forms are only returned once, as they share
+    the answer of the document.
+    """
+    seen = seen or set()
+    seen.add(form.pk)
+
+    questions = {}
+    for question in form.questions.order_by("-formquestion__sort").select_related(
+        "sub_form", "row_form"
+    ):
+        if question.type == Question.TYPE_FORM:
+            if question.sub_form_id not in seen:
+                for sub_question in get_form_questions(question.sub_form, seen):
+                    questions.setdefault(sub_question.pk, sub_question)
+        elif question.type != Question.TYPE_STATIC:
+            questions.setdefault(question.pk, question)
+
+    return list(questions.values())
+
+
+def question_column(question):
+    return f"{QUESTION_COLUMN_PREFIX}{question.pk}"
+
+
+def _answer_value(question_type, value, date, file_name):
+    if question_type == Question.TYPE_DATE:
+        return date.isoformat() if date else None
+    if question_type == Question.TYPE_FILE:
+        return file_name
+    return value
+
+
+class DocumentExport:
+    """Export of documents of a form, flattened to one row per document.
+
+    Only the given answers are exported, including the answers of table rows.
+    """
+
+    def __init__(self, form, documents, answers, chunk_size=1000):
+        self.form = form
+        self.documents = documents.filter(form=form).order_by("pk")
+        self.answers = answers
+        self.chunk_size = chunk_size
+        self.questions = get_form_questions(form)
+        self.row_questions = {
+            question.pk: get_form_questions(question.row_form)
+            for question in self.questions
+            if question.type == Question.TYPE_TABLE and question.row_form
+        }
+        self.question_types = {
+            question.pk: question.type
+            for questions in [self.questions, *self.row_questions.values()]
+            for question in questions
+        }
+
+    @property
+    def columns(self):
+        return [
+            *DOCUMENT_COLUMNS,
+            *(question_column(question) for question in self.questions),
+        ]
+
+    def _answers(self, document_ids):
+        """Return dict of document id to dict of question slug to value."""
+        answers = defaultdict(dict)
+        for document_id, question_id, value, date, file_name in (
+            self.answers.filter(
+                document_id__in=document_ids, question_id__in=self.question_types
+            )
+            .order_by()
+            .values_list("document_id", "question_id", "value", "date", "file__name")
+        ):
+            answers[document_id][question_id] = _answer_value(
+                self.question_types[question_id], value, date, file_name
+            )
+
+        return answers
+
+    def _tables(self, document_ids):
+        """Return dict of document id to dict of table question slug to rows."""
+        tables = defaultdict(lambda: defaultdict(list))
+        if not self.row_questions:
+            return tables
+
+        row_documents = list(
+            AnswerDocument.objects.filter(
+                answer__document_id__in=document_ids,
+                answer__question_id__in=self.row_questions,
+            )
+            .order_by("answer__document_id", "answer__question_id", "-sort")
+            .values_list("answer__document_id", "answer__question_id", "document_id")
+        )
+        row_answers = self._answers([row_id for _, _, row_id in row_documents])
+
+        for document_id, question_id, row_id in row_documents:
+            tables[document_id][question_id].append(
+                {
+                    row_question.pk: row_answers[row_id].get(row_question.pk)
+                    for row_question in self.row_questions[question_id]
+                }
+            )
+
+        return tables
+
+    def _chunks(self):
+        chunk = []
+        # `iterator()` uses a server side cursor on PostgreSQL
+        for document in self.documents.iterator(chunk_size=self.chunk_size):
+            chunk.append(document)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def rows(self):
+        """Yield a dict of column to value per document.
+
+        All rows contain every column, missing answers are `None`.
+        """
+        for documents in self._chunks():
+            document_ids = [document.pk for document in documents]
+            answers = self._answers(document_ids)
+            tables = self._tables(document_ids)
+
+            for document in documents:
+                row = {
+                    "id": str(document.pk),
+                    "form": document.form_id,
+                    "created_at": document.created_at.isoformat(),
+                    "modified_at": document.modified_at.isoformat(),
+                    "created_by_user": document.created_by_user,
+                    "created_by_group": document.created_by_group,
+                }
+                document_answers = answers.get(document.pk, {})
+                document_tables = tables.get(document.pk, {})
+                for question in self.questions:
+                    column = question_column(question)
+                    if question.pk in self.row_questions:
+                        row[column] = document_tables.get(question.pk, [])
+                    else:
+                        row[column] = document_answers.get(question.pk)
+
+                yield row
+
+    def _jsonl(self):
+        """Yield JSON Lines, one object per document."""
+        for row in self.rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+    def _csv(self):
+        """Yield CSV lines, starting with a header.
+
+        Lists and tables are encoded as JSON.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def line(values):
+            writer.writerow(values)
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value
+
+        yield line(self.columns)
+        for row in self.rows():
+            yield line(
+                [
+                    json.dumps(value, cls=DjangoJSONEncoder)
+                    if isinstance(value, (list, dict))
+                    else value
+                    for value in row.values()
+                ]
+            )
+
+    def lines(self, format):
+        """Yield exported rows encoded in given format, one line at a time."""
+        return {"csv": self._csv, "jsonl": self._jsonl}[format]()
@@ -1,10 +1,13 @@
 from functools import reduce
 
 import graphene
+from django import forms
+from django.conf import settings
 from django.core import exceptions
 from django.db import ProgrammingError
-from django.db.models import Q
-from django.forms import BooleanField
+from django.db.models import Exists, Func, OuterRef, Q, TextField
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.lookups import IContains
 from django_filters.constants import EMPTY_VALUES
 from django_filters.rest_framework import CharFilter, Filter, FilterSet
 from graphene import Enum, InputObjectType, List
@@ -19,8 +22,10 @@ from ..caluma_core.filters import (
     OrderingFilter,
     SearchFilter,
     SlugMultipleChoiceFilter,
+    filter_by_predicate,
 )
 from ..caluma_core.ordering import AttributeOrderingFactory, MetaFieldOrdering
+from ..caluma_core.visibilities import VisibilityContext
 from ..caluma_form.models import Answer, Question
 from ..caluma_form.ordering import AnswerValueOrdering
 from . import models, validators
@@ -135,6 +140,59 @@ class HasAnswerFilterType(InputObjectType):
     hierarchy = AnswerHierarchyMode()
 
 
+def matching_documents(conditions):
+    """Return documents matching all given `Exists` conditions.
+
+    The conditions are correlated with the document primary key.
+    """
+    documents = models.Document.objects.all()
+    for condition in conditions:
+        documents = filter_by_predicate(documents, condition)
+    return documents
+
+
+def _is_multi_valued(qs, document_id):
+    """Return whether `document_id` of given queryset spans a multi-valued relation."""
+    path = qs.query.names_to_path(document_id.split(LOOKUP_SEP), qs.model._meta)[0]
+    return any(info.m2m for info in path)
+
+
+def filter_documents(qs, document_id, conditions):
+    """Filter queryset by documents matching all given `Exists` conditions.
+
+    The matching documents are looked up in a subquery, which the given
+    queryset is filtered by using `document_id`. If `document_id` spans a
+    multi-valued relation, every condition is looked up in a subquery of its
+    own, so each condition may be met by a different related document.
+    """
+    if not conditions:
+        return qs
+
+    if _is_multi_valued(qs, document_id):
+        for condition in conditions:
+            qs = qs.filter(
+                **{f"{document_id}__in": matching_documents([condition]).values("pk")}
+            )
+        return qs
+
+    return qs.filter(
+        **{f"{document_id}__in": matching_documents(conditions).values("pk")}
+    )
+
+
+def documents_predicate(qs, document_id, documents):
+    """Return predicate whether the document of a row is in given documents.
+
+    The predicate is an `Exists` correlated with `document_id`, which can
+    be negated into an anti-join. Returns `None` if `document_id` spans a
+    multi-valued relation, as correlating it would duplicate rows.
+    """
+    if _is_multi_valued(qs, document_id):
+        return None
+
+    return Exists(documents.filter(pk=OuterRef(document_id)))
+
+
 class HasAnswerFilterField(CompositeFieldClass):
     pass
 
@@ -177,15 +235,42 @@ class HasAnswerFilter(Filter):
     VALID_LOOKUPS["textarea"] = VALID_LOOKUPS["text"]
     VALID_LOOKUPS["datetime"] = VALID_LOOKUPS["integer"]
 
+    NUMBER_LOOKUPS = (
+        AnswerLookupMode.EXACT,
+        AnswerLookupMode.LT,
+        AnswerLookupMode.LTE,
+        AnswerLookupMode.GT,
+        AnswerLookupMode.GTE,
+    )
+    TEXT_LOOKUPS = (AnswerLookupMode.EXACT, AnswerLookupMode.STARTSWITH)
+
     def filter(self, qs, value):
         if value in EMPTY_VALUES:
             return qs
 
-        for expr in value:
-            qs = self.apply_expr(qs, expr)
-        return qs
+        question_types = models.Question.objects.get_types(
+            expr["question"] for expr in value
+        )
+        conditions = [
+            self._answer_exists(expr, question_types[expr["question"]])
+            for expr in value
+        ]
+        return filter_documents(qs, self.document_id, conditions)
 
-    def apply_expr(self, qs, expr):
+    def get_predicate(self, qs, value):
+        if value in EMPTY_VALUES:
+            return None
+
+        question_types = models.Question.objects.get_types(
+            expr["question"] for expr in value
+        )
+        conditions = [
+            self._answer_exists(expr, question_types[expr["question"]])
+            for expr in value
+        ]
+        return documents_predicate(qs, self.document_id, matching_documents(conditions))
+
+    def _answer_exists(self, expr, question_type):
         lookup = expr.get("lookup", self.lookup_expr)
 
         question_slug = expr["question"]
@@ -195,59 +280,74 @@ class HasAnswerFilter(Filter):
 
         hierarchy = expr.get("hierarchy", AnswerHierarchyMode.FAMILY)
 
-        question = models.Question.objects.get(slug=question_slug)
-        self._validate_lookup(question, lookup)
-
-        answer_value = "value"
-        if question.type == models.Question.TYPE_DATE:
-            answer_value = "date"
+        self._validate_lookup(question_slug, question_type, lookup)
 
-        answers = models.Answer.objects.all()
+        answers = models.Answer.objects.filter(question_id=question_slug)
 
         if lookup == AnswerLookupMode.INTERSECTS:
-            inner_lookup = "exact"
-            if question.type in (
-                models.Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
-                models.Question.TYPE_MULTIPLE_CHOICE,
-            ):
-                inner_lookup = "contains"
-
-            exprs = [
-                Q(**{f"value__{inner_lookup}": val, "question__slug": question_slug})
-                for val in match_value
-            ]
-            # connect all expressions with OR
-            answers = answers.filter(reduce(lambda a, b: a | b, exprs))
+            answers = answers.filter(self._intersects_expr(question_type, match_value))
         else:
-            answers = answers.filter(
-                **{
-                    f"{answer_value}__{lookup}": match_value,
-                    "question__slug": question_slug,
-                }
+            answer_value = self._get_answer_value_field(
+                question_type, lookup, match_value
             )
+            answers = answers.filter(**{f"{answer_value}__{lookup}": match_value})
 
         if hierarchy == AnswerHierarchyMode.FAMILY:
-            return qs.filter(
-                **{f"{self.document_id}__in": answers.values("document__family")}
-            )
-        else:
-            return qs.filter(**{f"{self.document_id}__in": answers.values("document")})
+            return Exists(answers.filter(document__family=OuterRef("pk")))
+        return Exists(answers.filter(document=OuterRef("pk")))
+
+    def _get_answer_value_field(self, question_type, lookup, match_value):
+        """Return answer field to apply lookup on.
+
+        Typed value columns are used where they lead to the same result as
+        the json `value`, as only those can use btree indexes.
+        """
+        field = models.Answer.TYPED_VALUE_FIELDS.get(question_type)
+
+        if field == "date":
+            return field
+        if field == "value_number" and lookup in self.NUMBER_LOOKUPS:
+            if isinstance(match_value, (int, float)):
+                return field
+        if field == "value_text" and lookup in self.TEXT_LOOKUPS:
+            if (
+                isinstance(match_value, str)
+                and len(match_value) < models.Answer.VALUE_TEXT_MAX_LENGTH
+            ):
+                return field
 
-    def _validate_lookup(self, question, lookup):
+        return "value"
+
+    def _intersects_expr(self, question_type, match_value):
+        field = models.Answer.TYPED_VALUE_FIELDS.get(question_type)
+        if all(isinstance(val, str) for val in match_value):
+            if field == "value_list":
+                return Q(value_list__overlap=match_value)
+            if field == "value_text" and all(
+                len(val) < models.Answer.VALUE_TEXT_MAX_LENGTH for val in match_value
+            ):
+                return Q(value_text__in=match_value)
+
+        inner_lookup = "contains" if field == "value_list" else "exact"
+        exprs = [Q(**{f"value__{inner_lookup}": val}) for val in match_value]
+        # connect all expressions with OR
+        return reduce(lambda a, b: a | b, exprs)
+
+    def _validate_lookup(self, question_slug, question_type, lookup):
         try:
-            valid_lookups = self.VALID_LOOKUPS[question.type]
+            valid_lookups = self.VALID_LOOKUPS[question_type]
         except KeyError:  # pragma: no cover
             # Not covered in tests - this only happens when you add a new
             # question type and forget to update the lookup config above.  In
             # that case, the fix is simple - go up a few lines and adjust the
             # VALID_LOOKUPS dict.
             raise ProgrammingError(
-                f"Valid lookups not configured for question type {question.type}"
+                f"Valid lookups not configured for question type {question_type}"
             )
 
         if lookup not in valid_lookups:
             raise exceptions.ValidationError(
-                f"Invalid lookup for question slug={question.slug} ({question.type.upper()}): {lookup.upper()}"
+                f"Invalid lookup for question slug={question_slug} ({question_type.upper()}): {lookup.upper()}"
             )
 
     @staticmethod
@@ -283,17 +383,43 @@ class SearchAnswersFilterField(CompositeFieldClass):
     pass
 
 
+class AnswerValueTextField(TextField):
+    pass
+
+
+@AnswerValueTextField.register_lookup
+class AnswerValueTextIContains(IContains):
+    """Case insensitive containment using `ILIKE`.
+
+    Contrary to the default `UPPER(...) LIKE UPPER(...)` this can make use of
+    trigram indexes on the answer value.
+    """
+
+    def process_lhs(self, compiler, connection, lhs=None):
+        return compiler.compile(self.lhs)
+
+    def get_rhs_op(self, connection, rhs):
+        return f"ILIKE {rhs}"
+
+
+class AnswerValueText(Func):
+    """Text of a jsonb answer value, with strings unquoted."""
+
+    template = "(%(expressions)s #>> '{}')"  # noqa: P103
+    output_field = AnswerValueTextField()
+
+
 class SearchAnswersFilter(Filter):
     field_class = SearchAnswersFilterField
 
     FIELD_MAP = {
-        Question.TYPE_TEXT: "value",
-        Question.TYPE_TEXTAREA: "value",
+        Question.TYPE_TEXT: "text",
+        Question.TYPE_TEXTAREA: "text",
         Question.TYPE_DATE: "date",
-        Question.TYPE_CHOICE: "value",
-        Question.TYPE_DYNAMIC_CHOICE: "value",
-        Question.TYPE_INTEGER: "value",
-        Question.TYPE_FLOAT: "value",
+        Question.TYPE_CHOICE: "text",
+        Question.TYPE_DYNAMIC_CHOICE: "text",
+        Question.TYPE_INTEGER: "text",
+        Question.TYPE_FLOAT: "text",
     }
 
     def __init__(self, *args, **kwargs):
@@ -304,56 +430,66 @@ class SearchAnswersFilter(Filter):
         if value in EMPTY_VALUES:
             return qs
 
-        assert isinstance(value, list)
+        return filter_documents(qs, self.document_id, self._conditions(value))
 
-        for val in value:
-            if val in EMPTY_VALUES:  # pragma: no cover
-                continue
-            qs = self._apply_filter(qs, val)
-        return qs
+    def get_predicate(self, qs, value):
+        if value in EMPTY_VALUES:
+            return None
 
-    def _apply_filter(self, qs, value):
+        conditions = self._conditions(value)
+        if not conditions:
+            return None
 
-        questions = self._validate_and_get_questions(value["questions"])
+        return documents_predicate(qs, self.document_id, matching_documents(conditions))
 
-        for word in value["value"].split():
-            answers_with_word = self._answers_with_word(
-                questions, word, value.get("lookup", SearchLookupMode.CONTAINS.value)
-            )
-            qs = qs.filter(
-                **{
-                    f"{self.document_id}__in": answers_with_word.values(
-                        "document__family"
-                    )
-                }
-            )
+    def _conditions(self, value):
+        assert isinstance(value, list)
 
-        return qs
+        value = [val for val in value if val not in EMPTY_VALUES]
+        question_types = self._validate_and_get_question_types(
+            slug for val in value for slug in val["questions"]
+        )
 
-    def _answers_with_word(self, questions, word, lookup):
+        # every word is looked up in a separate subquery correlated with the
+        # family, so the (trigram) indexes of the answers narrow each lookup
+        answers = Answer.objects.annotate(text=AnswerValueText("value"))
+        return [
+            Exists(
+                answers.filter(
+                    self._word_expr(
+                        {slug: question_types[slug] for slug in val["questions"]},
+                        word,
+                        val.get("lookup", SearchLookupMode.CONTAINS.value),
+                    ),
+                    document__family=OuterRef("pk"),
+                )
+            )
+            for val in value
+            for word in val["value"].split()
+        ]
+
+    def _word_expr(self, question_types, word, lookup):
         exprs = [
             Q(
                 **{
-                    f"{self.FIELD_MAP[question.type]}__{lookup}": word,
-                    "question": question,
+                    f"{self.FIELD_MAP[question_type]}__{lookup}": word,
+                    "question_id": question_slug,
                 }
             )
-            for q_slug, question in questions.items()
+            for question_slug, question_type in question_types.items()
         ]
 
         # join expressions with OR
-        return Answer.objects.filter(reduce(lambda a, b: a | b, exprs))
+        return reduce(lambda a, b: a | b, exprs)
 
-    def _validate_and_get_questions(self, questions):
-        res = {}
-        for q_slug in questions:
-            question = Question.objects.get(pk=q_slug)
-            if question.type not in self.FIELD_MAP:
+    def _validate_and_get_question_types(self, questions):
+        question_types = Question.objects.get_types(questions)
+        for question_type in question_types.values():
+            if question_type not in self.FIELD_MAP:
                 raise exceptions.ValidationError(
-                    f"Questions of type {question.type} cannot be used in searchAnswers"
+                    f"Questions of type {question_type} cannot be used in searchAnswers"
                 )
-            res[q_slug] = question
-        return res
+        return question_types
 
     @staticmethod
     @convert_form_field.register(SearchAnswersFilterField)
@@ -371,13 +507,8 @@ class SearchAnswersFilter(Filter):
 class DocumentFilterSet(MetaFilterSet):
     id = GlobalIDFilter()
     search = SearchFilter(
-        fields=(
-            "form__slug",
-            "form__name",
-            "form__description",
-            "answers__value",
-            "answers__file__name",
-        )
+        search_vector="search_vector",
+        search_config=lambda: settings.DOCUMENT_SEARCH_CONFIG,
     )
     order_by = OrderingFilter(label="DocumentOrdering")
     root_document = GlobalIDFilter(field_name="family")
@@ -395,7 +526,7 @@ class DocumentOrderSet(FilterSet):
     meta = MetaFieldOrdering()
     answer_value = AnswerValueOrdering()
     attribute = AttributeOrderingFactory(
-        models.Document, exclude_fields=["meta", "family", "id"]
+        models.Document, exclude_fields=["meta", "family", "id", "search_vector"]
     )
 
     class Meta:
@@ -403,17 +534,67 @@ class DocumentOrderSet(FilterSet):
         fields = ("meta",)
 
 
+def _owns_document(model):
+    """Return whether instances of given model have a document of their own."""
+    try:
+        field = model._meta.get_field("document")
+    except exceptions.FieldDoesNotExist:
+        return False
+
+    return field.one_to_one and field.related_model is models.Document
+
+
 class VisibleAnswerFilter(Filter):
-    field_class = BooleanField
+    """Filter answers of a document by the visibility of their questions.
+
+    The visible questions are computed once per family and request. With the
+    first family looked up, the families of all documents of the connection
+    pages resolved so far (including documents of cases and work items) are
+    computed along with it, instead of one family after the other.
+    """
+
+    field_class = forms.BooleanField
+
+    def _page_family_ids(self, context):
+        family_ids, document_ids = set(), set()
+        for node in context.pop_pages():
+            if isinstance(node, models.Document):
+                family_ids.add(node.family_id)
+            elif _owns_document(type(node)) and node.document_id:
+                document_ids.add(node.document_id)
+
+        if document_ids:
+            family_ids.update(
+                models.Document.objects.filter(pk__in=document_ids).values_list(
+                    "family_id", flat=True
+                )
+            )
+
+        return family_ids
 
     def filter(self, qs, value):
-        if not value or not qs.exists():
+        if not value:
             return qs
 
         # assuming qs can only ever be in the context of a single document
-        document = qs.first().document.family
-        validator = validators.DocumentValidator()
-        return qs.filter(question__slug__in=validator.visible_questions(document))
+        family_id = qs.values_list("document__family", flat=True).first()
+        if family_id is None:
+            return qs
+
+        context = VisibilityContext.for_request(self.parent.request)
+        visible = context.get_or_set((type(self), "visible_questions"), dict)
+        if family_id not in visible:
+            # pages are only recorded for queries, so results are not kept
+            # for mutations which may change answers later on
+            family_ids = self._page_family_ids(context) - visible.keys()
+            computed = validators.DocumentValidator().visible_questions_of_families(
+                family_ids | {family_id}
+            )
+            visible.update((pk, computed[pk]) for pk in family_ids)
+            if family_id not in family_ids:
+                return qs.filter(question__slug__in=computed[family_id])
+
+        return qs.filter(question__slug__in=visible[family_id])
 
 
 class AnswerFilterSet(MetaFilterSet):
@@ -430,7 +611,10 @@ class AnswerFilterSet(MetaFilterSet):
 
 class AnswerOrderSet(FilterSet):
     meta = MetaFieldOrdering()
-    attribute = AttributeOrderingFactory(models.Answer, exclude_fields=["meta", "id"])
+    attribute = AttributeOrderingFactory(
+        models.Answer,
+        exclude_fields=["meta", "id", "value_number", "value_text", "value_list"],
+    )
 
     class Meta:
         model = models.Answer
@@ -69,7 +69,14 @@ class HistoricalAnswerConnection(CountableConnectionBase):
 class HistoricalIntegerAnswer(IntegerAnswer):
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "file", "date")
+        exclude = (
+            "document",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -77,7 +84,14 @@ class HistoricalIntegerAnswer(IntegerAnswer):
 class HistoricalFloatAnswer(FloatAnswer):
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "file", "date")
+        exclude = (
+            "document",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -85,7 +99,7 @@ class HistoricalFloatAnswer(FloatAnswer):
 class HistoricalDateAnswer(DateAnswer):
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "file")
+        exclude = ("document", "file", "value_number", "value_text", "value_list")
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -93,7 +107,14 @@ class HistoricalDateAnswer(DateAnswer):
 class HistoricalStringAnswer(StringAnswer):
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "file", "date")
+        exclude = (
+            "document",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -101,7 +122,14 @@ class HistoricalStringAnswer(StringAnswer):
 class HistoricalListAnswer(ListAnswer):
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "file", "date")
+        exclude = (
+            "document",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -145,7 +173,7 @@ class HistoricalFileAnswer(FileAnswer):
 
     class Meta:
         model = models.Answer.history.model
-        exclude = ("document", "date")
+        exclude = ("document", "date", "value_number", "value_text", "value_list")
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -171,7 +199,7 @@ class HistoricalDocument(FormDjangoObjectType):
 
     class Meta:
         model = models.Document.history.model
-        exclude = ("family", "history_id", "history_change_reason")
+        exclude = ("family", "history_id", "history_change_reason", "search_vector")
         interfaces = (graphene.Node,)
         connection_class = CountableConnectionBase
 
@@ -210,7 +238,7 @@ class HistoricalTableAnswer(TableAnswer):
 
     class Meta:
         model = models.Answer.history.model
-        exclude = ("file", "date")
+        exclude = ("file", "date", "value_number", "value_text", "value_list")
         use_connection = False
         interfaces = (HistoricalAnswer, graphene.Node)
 
@@ -0,0 +1,90 @@
+"""Database indexes of answers which are maintained depending on settings."""
+from hashlib import md5
+
+from django.conf import settings
+from django.db import connections
+
+TRIGRAM_INDEX_PREFIX = "caluma_form_answer_value_trgm"
+
+CREATE_TRIGRAM_INDEX = """
+CREATE INDEX {concurrently} "{name}" ON caluma_form_answer
+USING gin ((value #>> '{{}}') gin_trgm_ops){condition}
+"""
+DROP_TRIGRAM_INDEX = 'DROP INDEX {concurrently} IF EXISTS "{name}"'
+
+EXISTING_TRIGRAM_INDEXES = """
+SELECT index.relname, pg_index.indisvalid
+FROM pg_index
+JOIN pg_class index ON index.oid = pg_index.indexrelid
+WHERE index.relname LIKE %s AND pg_table_is_visible(index.oid)
+"""
+
+
+def get_trigram_indexes():
+    """Return configured trigram indexes as dict of name to question slug.
+
+    The question slug is `None` for the index covering all answers.
+    """
+    if not settings.ANSWER_TRIGRAM_INDEX:
+        return {}
+
+    questions = settings.ANSWER_TRIGRAM_INDEX_QUESTIONS
+    if not questions:
+        return {TRIGRAM_INDEX_PREFIX: None}
+
+    return {
+        f"{TRIGRAM_INDEX_PREFIX}_{md5(slug.encode()).hexdigest()[:12]}": slug
+        for slug in questions
+    }
+
+
+def sync_trigram_indexes(using="default", dry_run=False):
+    """Create configured trigram indexes and drop the ones no longer configured.
+
+    Like the meta indexes, the indexes are built concurrently unless called
+    within a transaction, so answers can still be written meanwhile. Invalid
+    indexes left over by an interrupted build are recreated. Returns tuple of
+    lists of created and dropped index names.
+    """
+    connection = connections[using]
+    indexes = get_trigram_indexes()
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            EXISTING_TRIGRAM_INDEXES, [TRIGRAM_INDEX_PREFIX.replace("_", r"\_") + "%"]
+        )
+        existing = dict(cursor.fetchall())
+
+        dropped = sorted(
+            name for name, valid in existing.items() if name not in indexes or not valid
+        )
+        created = sorted(
+            name for name in indexes if name in dropped or name not in existing
+        )
+        if dry_run:
+            return created, dropped
+
+        for name in dropped:
+            cursor.execute(
+                DROP_TRIGRAM_INDEX.format(concurrently=concurrently, name=name)
+            )
+
+        if created:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+        for name in created:
+            question = indexes[name]
+            condition = "" if question is None else " WHERE question_id = %s"
+            cursor.execute(
+                CREATE_TRIGRAM_INDEX.format(
+                    concurrently=concurrently, name=name, condition=condition
+                ),
+                None if question is None else [question],
+            )
+
+    return created, dropped
+
+
+def sync_indexes_after_migrate(using, **kwargs):
+    sync_trigram_indexes(using)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from ...export import CONTENT_TYPES, DocumentExport
+from ...models import Answer, Document, Form
+
+
+class Command(BaseCommand):
+    """Export documents of a form with their answers."""
+
+    help = (
+        "Export all documents of a form with their answers flattened to one row "
+        "per document, as CSV or JSON Lines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("form")
+        parser.add_argument(
+            "--format", dest="format", choices=sorted(CONTENT_TYPES), default="csv"
+        )
+        parser.add_argument("--output", dest="output", default=None)
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        form = Form.objects.get(pk=options["form"])
+        export = DocumentExport(
+            form,
+            Document.objects.all(),
+            Answer.objects.all(),
+            chunk_size=options["chunk_size"],
+        )
+
+        output = (
+            open(options["output"], "w", newline="")
+            if options["output"]
+            else self.stdout
+        )
+        try:
+            for line in export.lines(options["format"]):
+                output.write(line)
+        finally:
+            if output is not self.stdout:
+                output.close()
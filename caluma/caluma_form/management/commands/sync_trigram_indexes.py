@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from ...indexes import get_trigram_indexes, sync_trigram_indexes
+
+
+class Command(BaseCommand):
+    """Create and drop trigram indexes of answer values."""
+
+    help = (
+        "Create the trigram indexes on answer values configured with "
+        "`ANSWER_TRIGRAM_INDEX` and `ANSWER_TRIGRAM_INDEX_QUESTIONS` "
+        "concurrently and drop the ones no longer configured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", dest="dry_run", default=False, action="store_true"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        indexes = get_trigram_indexes()
+
+        created, dropped = sync_trigram_indexes(dry_run=dry_run)
+
+        drop_str, create_str = (
+            ("Would drop", "Would create") if dry_run else ("Dropped", "Created")
+        )
+        for name in dropped:
+            self.stdout.write(f"{drop_str} index {name}")
+        for name in created:
+            question = indexes[name]
+            scope = f"question '{question}'" if question else "all answers"
+            self.stdout.write(f"{create_str} index {name} on {scope}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Document, update_search_vectors
+
+
+class Command(BaseCommand):
+    """Rebuild full text search vectors of documents."""
+
+    help = (
+        "Rebuild full text search vectors of documents, e.g. after changing "
+        "`DOCUMENT_SEARCH_CONFIG`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", dest="forms", action="append", default=[])
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        documents = Document.objects.order_by("pk")
+        if options["forms"]:
+            documents = documents.filter(form__in=options["forms"])
+
+        batch_size = options["batch_size"]
+        ids = list(documents.values_list("pk", flat=True))
+        for start in range(0, len(ids), batch_size):
+            update_search_vectors(
+                Document.objects.filter(pk__in=ids[start : start + batch_size])
+            )
+
+        self.stdout.write(f"Updated search vectors of {len(ids)} documents")
@@ -0,0 +1,103 @@
+# Generated by Django 2.2.13 on 2026-10-19 10:54
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+POPULATE_TYPED_VALUES = """
+UPDATE caluma_form_answer a
+SET value_number = (a.value #>> '{}')::double precision
+FROM caluma_form_question q
+WHERE q.slug = a.question_id
+AND q.type IN ('integer', 'float')
+AND jsonb_typeof(a.value) = 'number';
+
+UPDATE caluma_form_answer a
+SET value_text = left(a.value #>> '{}', 500)
+FROM caluma_form_question q
+WHERE q.slug = a.question_id
+AND q.type IN ('text', 'textarea', 'choice', 'dynamic_choice')
+AND jsonb_typeof(a.value) = 'string';
+
+UPDATE caluma_form_answer a
+SET value_list = ARRAY(SELECT jsonb_array_elements_text(a.value))
+FROM caluma_form_question q
+WHERE q.slug = a.question_id
+AND q.type IN ('multiple_choice', 'dynamic_multiple_choice')
+AND jsonb_typeof(a.value) = 'array';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("caluma_form", "0034_fix_fk_lengths")]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="value_list",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.TextField(),
+                blank=True,
+                editable=False,
+                null=True,
+                size=None,
+            ),
+        ),
+        migrations.AddField(
+            model_name="answer",
+            name="value_number",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="answer",
+            name="value_text",
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="value_list",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.TextField(),
+                blank=True,
+                editable=False,
+                null=True,
+                size=None,
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="value_number",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="value_text",
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(POPULATE_TYPED_VALUES, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(value_number__isnull=False),
+                fields=["question", "value_number"],
+                name="answer_value_number_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(value_text__isnull=False),
+                fields=["question", "value_text"],
+                name="answer_value_text_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=django.contrib.postgres.indexes.GinIndex(
+                condition=models.Q(value_list__isnull=False),
+                fields=["value_list"],
+                name="answer_value_list_idx",
+            ),
+        ),
+    ]
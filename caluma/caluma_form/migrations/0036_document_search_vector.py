@@ -0,0 +1,55 @@
+# Generated by Django 2.2.13 on 2026-10-19 11:19
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+POPULATE_SEARCH_VECTORS = """
+UPDATE caluma_form_document doc
+SET search_vector = to_tsvector(
+    get_current_ts_config(),
+    concat_ws(
+        ' ',
+        form.slug,
+        array_to_string(avals(form.name), ' '),
+        array_to_string(avals(form.description), ' '),
+        (
+            SELECT string_agg(concat_ws(' ', answer.value::text, file.name), ' ')
+            FROM caluma_form_answer answer
+            LEFT JOIN caluma_form_file file ON file.id = answer.file_id
+            WHERE answer.document_id = doc.id
+        )
+    )
+)
+FROM caluma_form_form form
+WHERE form.slug = doc.form_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("caluma_form", "0035_answer_typed_values")]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicaldocument",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_VECTORS, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="document",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="caluma_form_search__9cd5b6_gin"
+            ),
+        ),
+    ]
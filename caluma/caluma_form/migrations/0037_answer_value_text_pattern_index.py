@@ -0,0 +1,21 @@
+# Generated by Django 2.2.13 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("caluma_form", "0036_document_search_vector")]
+
+    operations = [
+        migrations.RemoveIndex(model_name="answer", name="answer_value_text_idx"),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(value_text__isnull=False),
+                fields=["question", "value_text"],
+                name="answer_value_text_pattern_idx",
+                opclasses=["varchar_pattern_ops", "text_pattern_ops"],
+            ),
+        ),
+    ]
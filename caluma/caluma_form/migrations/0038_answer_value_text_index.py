@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-19 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("caluma_form", "0037_answer_value_text_pattern_index")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(value_text__isnull=False),
+                fields=["question", "value_text"],
+                name="answer_value_text_idx",
+            ),
+        )
+    ]
@@ -1,13 +1,26 @@
+import logging
+from collections import defaultdict
+from uuid import uuid4
+
+from django.conf import settings
 from django.contrib.postgres.fields import ArrayField, JSONField
 from django.contrib.postgres.indexes import GinIndex
-from django.db import models, transaction
-from django.db.models.signals import post_init
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 from localized_fields.fields import LocalizedField, LocalizedTextField
+from simple_history.utils import bulk_create_with_history
 
+from ..caluma_core.cache import is_shared_cache, local_cache_timeout
 from ..caluma_core.models import NaturalKeyModel, SlugModel, UUIDModel
 from .storage_clients import client
 
+logger = logging.getLogger(__name__)
+
 
 class Form(SlugModel):
     name = LocalizedField(blank=False, null=False, required=False)
@@ -44,7 +57,50 @@ class FormQuestion(NaturalKeyModel):
         unique_together = ("form", "question")
 
 
+class QuestionManager(models.Manager):
+    def get_types(self, slugs):
+        """Return dict of question slug to type for given question slugs.
+
+        Types are cached, so resolving them usually doesn't need a query. With
+        a process local cache, they are only cached for a short time, as
+        other processes can't invalidate them.
+        Raises `Question.DoesNotExist` if any of the questions doesn't exist.
+        """
+        slugs = set(slugs)
+        cached = cache.get_many([_question_type_cache_key(slug) for slug in slugs])
+        types = {
+            slug: cached[_question_type_cache_key(slug)]
+            for slug in slugs
+            if _question_type_cache_key(slug) in cached
+        }
+
+        missing = slugs - types.keys()
+        if missing:
+            fetched = dict(
+                self.get_queryset().filter(pk__in=missing).values_list("pk", "type")
+            )
+            if missing - fetched.keys():
+                raise Question.DoesNotExist("Question matching query does not exist.")
+
+            cache.set_many(
+                {
+                    _question_type_cache_key(slug): type
+                    for slug, type in fetched.items()
+                },
+                timeout=local_cache_timeout(settings.QUESTION_TYPE_CACHE_TIMEOUT),
+            )
+            types.update(fetched)
+
+        return types
+
+
+def _question_type_cache_key(slug):
+    return f"caluma_form.question_type.{slug}"
+
+
 class Question(SlugModel):
+    objects = QuestionManager()
+
     TYPE_MULTIPLE_CHOICE = "multiple_choice"
     TYPE_INTEGER = "integer"
     TYPE_FLOAT = "float"
@@ -196,16 +252,44 @@ class Option(SlugModel):
 
 
 class DocumentManager(models.Manager):
-    @transaction.atomic
-    def create_document_for_task(self, task, user):
-        """Create a document for a given task."""
+    def build_document_for_task(self, task, user):
+        """Return an unsaved document for a given task."""
         if task.form_id is not None:
-            return Document.objects.create(
+            return Document(
                 form_id=task.form_id,
                 created_by_user=user.username,
                 created_by_group=user.group,
             )
 
+    @transaction.atomic
+    def create_document_for_task(self, task, user):
+        """Create a document for a given task."""
+        document = self.build_document_for_task(task, user)
+        if document is not None:
+            document.save()
+        return document
+
+    @transaction.atomic
+    def bulk_create_documents(self, documents):
+        """Create documents and their history with one batch of inserts each.
+
+        The family pointers are already set on initialization. As
+        `bulk_create` doesn't send `post_save`, the search vectors are
+        updated explicitly.
+        """
+        if not documents:
+            return []
+
+        documents = bulk_create_with_history(documents, Document)
+        update_search_vectors(self.filter(pk__in=[doc.pk for doc in documents]))
+        return documents
+
+
+def copy_blobs(blobs):
+    """Copy given blobs of file answers, logging the ones which failed."""
+    for object_name, new_object_name, error in client.copy_objects(blobs):
+        logger.error(f"Failed to copy blob {object_name} to {new_object_name}: {error}")
+
 
 class Document(UUIDModel):
     objects = DocumentManager()
@@ -229,69 +313,133 @@ class Document(UUIDModel):
         on_delete=models.SET_NULL,
     )
     meta = JSONField(default=dict)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def set_family(self, root_doc):
         """Set the family to the given root_doc.
 
         Apply the same to all row documents within this document,
-        recursively.
+        recursively. The row documents are collected and updated with a
+        single statement, regardless of the depth of the tables.
         """
-        if self.family != root_doc:
-            self.family = root_doc
-            self.save()
-
-        table_answers = Answer.objects.filter(
-            document=self,
-            # TODO this is not REALLY required, as only table answers
-            # have child documents anyhow. Leaving it out would avoid
-            # a JOIN to the question table
-            question__type=Question.TYPE_TABLE,
-        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SET_DOCUMENT_FAMILY,
+                {"document": self.pk, "family": root_doc.pk, "now": timezone.now()},
+            )
+            changed = cursor.fetchall()
 
-        child_documents = AnswerDocument.objects.filter(
-            answer__in=table_answers
-        ).select_related("document")
+        self.family = root_doc
+        if not changed:
+            return
 
-        for answer_document in child_documents:
-            answer_document.document.set_family(root_doc)
+        # the update bypasses `save()`, so history and caches are handled here
+        Document.history.bulk_history_create(
+            Document.objects.filter(pk__in=[pk for pk, _ in changed]), update=True
+        )
+        for family_id in {root_doc.pk, *(family_id for _, family_id in changed)}:
+            invalidate_visibility(family_id)
 
+    @transaction.atomic
     def copy(self, family=None):
-        """Create a copy including all its answers."""
+        """Create a copy including all its answers and row documents.
+
+        The documents, answers and files of the whole tree are created with
+        one batch of inserts each. The blobs of file answers are copied
+        concurrently once the transaction is committed, so no blobs are left
+        behind if it is rolled back. Failed blob copies are retried, and
+        logged if they still fail, as the copied documents are committed
+        already.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(DOCUMENT_SUBTREE, {"document": self.pk})
+            document_ids = [pk for pk, in cursor.fetchall()]
 
-        new_document = type(self).objects.create(
-            form=self.form, meta=dict(self.meta), source=self, family=family
+        new_document = Document(
+            form_id=self.form_id, meta=dict(self.meta), source=self, family=family
         )
-        if not family:
-            family = new_document
+        family = family or new_document
+
+        copies = {self.pk: new_document}
+        for source in Document.objects.filter(pk__in=document_ids).exclude(pk=self.pk):
+            copies[source.pk] = Document(
+                form_id=source.form_id,
+                meta=dict(source.meta),
+                source=source,
+                family=family,
+            )
 
-        # copy answers
-        for source_answer in self.answers.all():
-            new_answer = new_document.answers.create(
+        answers = {}
+        files = []
+        blobs = []
+        for source_answer in Answer.objects.filter(
+            document_id__in=document_ids
+        ).select_related("question", "file"):
+            answer = Answer(
+                document=copies[source_answer.document_id],
                 question=source_answer.question,
                 value=source_answer.value,
                 meta=dict(source_answer.meta),
                 date=source_answer.date,
             )
+            if source_answer.file_id:
+                answer.file = File(name=source_answer.file.name)
+                files.append(answer.file)
+                blobs.append((source_answer.file.object_name, answer.file.object_name))
+
+            # `bulk_create` doesn't send `pre_save`
+            set_typed_values(Answer, answer)
+            answers[source_answer.pk] = answer
+
+        answer_documents = [
+            AnswerDocument(
+                answer=answers[answer_id], document=copies[document_id], sort=sort
+            )
+            for answer_id, document_id, sort in AnswerDocument.objects.filter(
+                answer__document_id__in=document_ids
+            ).values_list("answer_id", "document_id", "sort")
+        ]
+
+        bulk_create_with_history(list(copies.values()), Document)
+        if files:
+            bulk_create_with_history(files, File)
+        if answers:
+            bulk_create_with_history(list(answers.values()), Answer)
+        if answer_documents:
+            bulk_create_with_history(answer_documents, AnswerDocument)
+
+        update_search_vectors(
+            Document.objects.filter(pk__in=[copy.pk for copy in copies.values()])
+        )
+        invalidate_visibility(family.pk)
 
-            if source_answer.question.type == Question.TYPE_FILE:
-                new_answer.file = source_answer.file.copy()
-                new_answer.save()
-
-            # TableAnswer: copy AnswerDocument too
-            for answer_doc in AnswerDocument.objects.filter(answer=source_answer):
-                new_doc = answer_doc.document.copy(family=family)
-
-                AnswerDocument.objects.create(
-                    answer=new_answer, document=new_doc, sort=answer_doc.sort
-                )
+        if blobs:
+            transaction.on_commit(lambda: copy_blobs(blobs))
 
         return new_document
 
     class Meta:
-        indexes = [GinIndex(fields=["meta"])]
+        indexes = [GinIndex(fields=["meta"]), GinIndex(fields=["search_vector"])]
 
 
 class Answer(UUIDModel):
+    # Columns holding the value of an answer typed according to its question
+    # type. Unlike the json `value` they can be compared and sorted using the
+    # indexes defined below. `value_text` is cut after `VALUE_TEXT_MAX_LENGTH`
+    # characters to keep index entries small.
+    TYPED_VALUE_FIELDS = {
+        Question.TYPE_INTEGER: "value_number",
+        Question.TYPE_FLOAT: "value_number",
+        Question.TYPE_DATE: "date",
+        Question.TYPE_TEXT: "value_text",
+        Question.TYPE_TEXTAREA: "value_text",
+        Question.TYPE_CHOICE: "value_text",
+        Question.TYPE_DYNAMIC_CHOICE: "value_text",
+        Question.TYPE_MULTIPLE_CHOICE: "value_list",
+        Question.TYPE_DYNAMIC_MULTIPLE_CHOICE: "value_list",
+    }
+    VALUE_TEXT_MAX_LENGTH = 500
+
     question = models.ForeignKey(
         "caluma_form.Question", on_delete=models.DO_NOTHING, related_name="answers"
     )
@@ -307,6 +455,9 @@ class Answer(UUIDModel):
     file = models.OneToOneField(
         "File", on_delete=models.SET_NULL, null=True, blank=True
     )
+    value_number = models.FloatField(null=True, blank=True, editable=False)
+    value_text = models.TextField(null=True, blank=True, editable=False)
+    value_list = ArrayField(models.TextField(), null=True, blank=True, editable=False)
 
     def delete(self, *args, **kwargs):
         if self.file:
@@ -316,7 +467,66 @@ class Answer(UUIDModel):
     class Meta:
         # a question may only be answerd once per document
         unique_together = ("document", "question")
-        indexes = [models.Index(fields=["date"]), GinIndex(fields=["meta", "value"])]
+        indexes = [
+            models.Index(fields=["date"]),
+            GinIndex(fields=["meta", "value"]),
+            models.Index(
+                fields=["question", "value_number"],
+                name="answer_value_number_idx",
+                condition=Q(value_number__isnull=False),
+            ),
+            # default operator classes for sorting and range comparisons
+            models.Index(
+                fields=["question", "value_text"],
+                name="answer_value_text_idx",
+                condition=Q(value_text__isnull=False),
+            ),
+            # pattern operator classes, so prefix matches can use an index as
+            # well, which the above can't with a collation other than "C"
+            models.Index(
+                fields=["question", "value_text"],
+                name="answer_value_text_pattern_idx",
+                condition=Q(value_text__isnull=False),
+                opclasses=["varchar_pattern_ops", "text_pattern_ops"],
+            ),
+            GinIndex(
+                fields=["value_list"],
+                name="answer_value_list_idx",
+                condition=Q(value_list__isnull=False),
+            ),
+        ]
+
+
+@receiver(pre_save, sender=Answer)
+def set_typed_values(sender, instance, **kwargs):
+    """Fill typed value columns of answer according to its question type."""
+    if Answer.question.is_cached(instance):
+        question_type = instance.question.type
+    else:
+        question_type = Question.objects.get_types([instance.question_id])[
+            instance.question_id
+        ]
+
+    value = instance.value
+    field = Answer.TYPED_VALUE_FIELDS.get(question_type)
+
+    instance.value_number = (
+        value
+        if field == "value_number"
+        and isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        else None
+    )
+    instance.value_text = (
+        value[: Answer.VALUE_TEXT_MAX_LENGTH]
+        if field == "value_text" and isinstance(value, str)
+        else None
+    )
+    instance.value_list = (
+        [str(item) for item in value]
+        if field == "value_list" and isinstance(value, list)
+        else None
+    )
 
 
 class File(UUIDModel):
@@ -329,11 +539,6 @@ class File(UUIDModel):
         new_name = f"{old_file.pk}_{old_file.name}"
         client.move_object(self.object_name, new_name)
 
-    def copy(self, *args, **kwargs):
-        copy = File.objects.create(name=self.name)
-        client.copy_object(self.object_name, copy.object_name)
-        return copy
-
     def delete(self, *args, **kwargs):
         self._move_blob()
         super().delete(*args, **kwargs)
@@ -375,6 +580,174 @@ def set_document_family(sender, instance, **kwargs):
         instance.family = instance
 
 
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_type(sender, instance, **kwargs):
+    cache.delete(_question_type_cache_key(instance.pk))
+
+
+UPDATE_TYPED_VALUES = """
+UPDATE caluma_form_answer
+SET
+    value_number = CASE
+        WHEN %(type)s = ANY(%(number_types)s) AND jsonb_typeof(value) = 'number'
+        THEN (value #>> ARRAY[]::text[])::double precision
+    END,
+    value_text = CASE
+        WHEN %(type)s = ANY(%(text_types)s) AND jsonb_typeof(value) = 'string'
+        THEN left(value #>> ARRAY[]::text[], %(max_length)s)
+    END,
+    value_list = CASE
+        WHEN %(type)s = ANY(%(list_types)s) AND jsonb_typeof(value) = 'array'
+        THEN ARRAY(SELECT jsonb_array_elements_text(value))
+    END
+WHERE question_id = %(question)s
+"""
+
+
+@receiver(post_init, sender=Question)
+def remember_question_type(sender, instance, **kwargs):
+    instance._typed_values_type = instance.__dict__.get("type")
+
+
+@receiver(post_save, sender=Question)
+def update_typed_values(sender, instance, created, **kwargs):
+    """Fill typed value columns of the answers again when the type changes."""
+    if not created and instance.type != instance._typed_values_type:
+        types = defaultdict(list)
+        for question_type, field in Answer.TYPED_VALUE_FIELDS.items():
+            types[field].append(question_type)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                UPDATE_TYPED_VALUES,
+                {
+                    "type": instance.type,
+                    "question": instance.pk,
+                    "number_types": types["value_number"],
+                    "text_types": types["value_text"],
+                    "list_types": types["value_list"],
+                    "max_length": Answer.VALUE_TEXT_MAX_LENGTH,
+                },
+            )
+
+    instance._typed_values_type = instance.type
+
+
+UPDATE_SEARCH_VECTORS = """
+UPDATE caluma_form_document doc
+SET search_vector = to_tsvector(
+    COALESCE(%s::regconfig, get_current_ts_config()),
+    concat_ws(
+        ' ',
+        form.slug,
+        array_to_string(avals(form.name), ' '),
+        array_to_string(avals(form.description), ' '),
+        (
+            SELECT string_agg(concat_ws(' ', answer.value::text, file.name), ' ')
+            FROM caluma_form_answer answer
+            LEFT JOIN caluma_form_file file ON file.id = answer.file_id
+            WHERE answer.document_id = doc.id
+        )
+    )
+)
+FROM caluma_form_form form
+WHERE form.slug = doc.form_id AND doc.id IN ({documents})
+"""
+
+
+# ids of a document and all its row documents, recursively
+DOCUMENT_SUBTREE_CTE = """
+WITH RECURSIVE subtree(id) AS (
+    SELECT %(document)s::uuid
+    UNION
+    SELECT answer_document.document_id
+    FROM subtree
+    JOIN caluma_form_answer answer ON answer.document_id = subtree.id
+    JOIN caluma_form_answerdocument answer_document
+        ON answer_document.answer_id = answer.id
+)
+"""
+
+DOCUMENT_SUBTREE = DOCUMENT_SUBTREE_CTE + "SELECT id FROM subtree"
+
+SET_DOCUMENT_FAMILY = (
+    DOCUMENT_SUBTREE_CTE
+    + """
+UPDATE caluma_form_document doc
+SET family_id = %(family)s, modified_at = %(now)s
+FROM (
+    SELECT id, family_id
+    FROM caluma_form_document
+    WHERE id IN (SELECT id FROM subtree)
+) old
+WHERE doc.id = old.id AND old.family_id IS DISTINCT FROM %(family)s
+RETURNING doc.id, old.family_id
+"""
+)
+
+
+def update_search_vectors(documents):
+    """Update full text search vector of given document queryset.
+
+    The vector contains the form slug, name and description as well as the
+    values and file names of all answers of a document.
+    """
+    documents_sql, params = documents.values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPDATE_SEARCH_VECTORS.format(documents=documents_sql),
+            [settings.DOCUMENT_SEARCH_CONFIG, *params],
+        )
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def update_answer_document_search_vector(sender, instance, **kwargs):
+    if not kwargs.get("raw"):
+        update_search_vectors(Document.objects.filter(pk=instance.document_id))
+
+
+@receiver(post_init, sender=Document)
+def remember_document_form(sender, instance, **kwargs):
+    instance._search_vector_form_id = instance.__dict__.get("form_id")
+
+
+@receiver(post_save, sender=Document)
+def update_document_search_vector(sender, instance, created, raw, **kwargs):
+    form_changed = instance.form_id != instance._search_vector_form_id
+    if (created or form_changed) and not raw:
+        update_search_vectors(Document.objects.filter(pk=instance.pk))
+    instance._search_vector_form_id = instance.form_id
+
+
+def _form_search_text(instance):
+    # read from __dict__ so deferred fields are not loaded
+    fields = instance.__dict__
+    return tuple(
+        None if fields.get(name) is None else dict(fields[name])
+        for name in ("name", "description")
+    )
+
+
+@receiver(post_init, sender=Form)
+def remember_form_search_text(sender, instance, **kwargs):
+    instance._search_text = _form_search_text(instance)
+
+
+@receiver(post_save, sender=Form)
+def update_form_documents_search_vector(sender, instance, created, raw, **kwargs):
+    """Rebuild search vectors of the documents of a form when it is renamed.
+
+    Other changes of the form, e.g. of its `meta`, don't affect the vectors,
+    so the documents are left alone.
+    """
+    search_text = _form_search_text(instance)
+    if not created and not raw and search_text != instance._search_text:
+        update_search_vectors(Document.objects.filter(form=instance))
+    instance._search_text = search_text
+
+
 class AnswerDocument(UUIDModel):
     answer = models.ForeignKey("Answer", on_delete=models.CASCADE)
     document = models.ForeignKey("Document", on_delete=models.CASCADE)
@@ -385,6 +758,104 @@ class AnswerDocument(UUIDModel):
         unique_together = ("answer", "document")
 
 
+STRUCTURE_VERSION = "structure"
+
+
+def _visibility_version_key(family_id):
+    return f"caluma_form.visibility_version.{family_id}"
+
+
+def get_visibility_cache_keys(family_ids):
+    """Return dict of family id to cache key of its visible questions.
+
+    The keys contain a version of the answers of the family and one of the
+    form structure, which change whenever answers respectively forms and
+    questions are modified.
+
+    Visible questions are only cached with a cache shared between processes
+    (see `is_shared_cache`), as the versions need to change for all of them.
+    """
+    version_keys = {
+        family_id: _visibility_version_key(family_id) for family_id in family_ids
+    }
+    structure_key = _visibility_version_key(STRUCTURE_VERSION)
+
+    versions = cache.get_many([structure_key, *version_keys.values()])
+    missing = {
+        key: uuid4().hex
+        for key in [structure_key, *version_keys.values()]
+        if key not in versions
+    }
+    cache.set_many(missing, timeout=None)
+    versions.update(missing)
+
+    return {
+        family_id: f"caluma_form.visible_questions.{family_id}.{versions[key]}.{versions[structure_key]}"
+        for family_id, key in version_keys.items()
+    }
+
+
+def invalidate_visibility(family_id=STRUCTURE_VERSION):
+    """Change version of answers of given family, or of the form structure.
+
+    The version is changed again on commit, so results computed by other
+    transactions from the data before the commit are not used afterwards.
+    """
+    if not is_shared_cache():
+        return
+
+    key = _visibility_version_key(family_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _document_family_id(instance):
+    # the answer of a row document is usually loaded already, contrary to
+    # the row document itself
+    if isinstance(instance, AnswerDocument) and AnswerDocument.answer.is_cached(
+        instance
+    ):
+        instance = instance.answer
+
+    if type(instance).document.is_cached(instance):
+        return instance.document.family_id
+
+    return (
+        Document.objects.filter(pk=instance.document_id)
+        .values_list("family_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+@receiver(post_save, sender=AnswerDocument)
+@receiver(post_delete, sender=AnswerDocument)
+def invalidate_answer_visibility(sender, instance, **kwargs):
+    if not is_shared_cache():
+        return
+
+    family_id = _document_family_id(instance)
+    if family_id:
+        invalidate_visibility(family_id)
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_document_visibility(sender, instance, **kwargs):
+    invalidate_visibility(instance.family_id)
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_delete, sender=Form)
+@receiver(post_save, sender=FormQuestion)
+@receiver(post_delete, sender=FormQuestion)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_structure_visibility(sender, instance, **kwargs):
+    invalidate_visibility()
+
+
 class DynamicOption(UUIDModel):
     slug = models.CharField(max_length=255)
     label = LocalizedField(blank=False, null=False, required=False)
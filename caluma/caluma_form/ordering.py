@@ -9,6 +9,37 @@ from rest_framework import exceptions
 from caluma.caluma_core.ordering import CalumaOrdering, OrderingFieldType
 from caluma.caluma_form.models import Answer, Question
 
+# Answer columns holding a sortable representation of the value of a question
+# of the given type. Typed columns are indexed together with the question.
+QUESTION_TYPE_TO_FIELD = {
+    **Answer.TYPED_VALUE_FIELDS,
+    Question.TYPE_FILE: "file__name",
+    Question.TYPE_STATIC: "value",
+}
+
+
+def answer_value_subquery(question_slug, document_ref="pk"):
+    """Return subquery selecting the sortable answer value of given question.
+
+    `document_ref` is the path to the document of the outer queryset, e.g.
+    `case__document`. The question type is looked up in the cache, so ordering
+    doesn't need an additional query per request.
+    """
+    question_type = Question.objects.get_types([question_slug])[question_slug]
+
+    try:
+        value_field = QUESTION_TYPE_TO_FIELD[question_type]
+    except KeyError:
+        raise exceptions.ValidationError(
+            f"Question '{question_slug}' has unsupported type {question_type} for ordering"
+        )
+
+    return Subquery(
+        Answer.objects.filter(
+            question_id=question_slug, document=OuterRef(document_ref)
+        ).values(value_field)[:1]
+    )
+
 
 class AnswerValueOrdering(CalumaOrdering):
     """Ordering filter for ordering documents by value of an answer.
@@ -29,38 +60,18 @@ class AnswerValueOrdering(CalumaOrdering):
     def get_ordering_value(
         self, qs: QuerySet, value: Any
     ) -> Tuple[QuerySet, OrderingFieldType]:
-        # First, join the requested answer, then annotate the QS accordingly.
-        # Last, return a field corresponding to the value
-        #
-        question = Question.objects.get(pk=value)
-        QUESTION_TYPE_TO_FIELD = {
-            Question.TYPE_INTEGER: "value",
-            Question.TYPE_FLOAT: "value",
-            Question.TYPE_DATE: "date",
-            Question.TYPE_CHOICE: "value",
-            Question.TYPE_TEXTAREA: "value",
-            Question.TYPE_TEXT: "value",
-            Question.TYPE_FILE: "file",
-            Question.TYPE_DYNAMIC_CHOICE: "value",
-            Question.TYPE_STATIC: "value",
-        }
-
-        try:
-            value_field = QUESTION_TYPE_TO_FIELD[question.type]
-        except KeyError:  # pragma: no cover
-            raise exceptions.ValidationError(
-                f"Question '{question.slug}' has unsupported type {question.type} for ordering"
-            )
+        # Annotate the value of the requested answer, keyed by the document
+        # path as well, so the same question may be used for ordering via
+        # several documents (e.g. of work item and case) at once.
+        ann_name = f"order_{self._document_locator_prefix}{value}"
 
-        answers_subquery = Subquery(
-            Answer.objects.filter(
-                question=question,
-                document=OuterRef(f"{self._document_locator_prefix}pk"),
-            ).values(value_field)
-        )
-        ann_name = f"order_{value}"
-
-        qs = qs.annotate(**{ann_name: answers_subquery})
+        if ann_name not in qs.query.annotations:
+            qs = qs.annotate(
+                **{
+                    ann_name: answer_value_subquery(
+                        value, f"{self._document_locator_prefix}pk"
+                    )
+                }
+            )
 
-        # TODO: respect document_via
         return qs, F(ann_name)
@@ -2,6 +2,7 @@ import graphene
 from django.shortcuts import get_object_or_404
 from graphene import relay
 from graphene.types import ObjectType, generic
+from graphene_django.forms.converter import convert_form_field
 from graphene_django.rest_framework import serializer_converter
 
 from ..caluma_core.filters import (
@@ -19,7 +20,7 @@ from ..caluma_core.types import (
 )
 from ..caluma_data_source.data_source_handlers import get_data_source_data
 from ..caluma_data_source.schema import DataSourceDataConnection
-from . import filters, models, serializers
+from . import filters, models, serializers, statistics
 from .format_validators import get_format_validators
 from .validators import get_document_validity
 
@@ -638,7 +639,15 @@ class IntegerAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "file", "date")
+        exclude = (
+            "document",
+            "documents",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -648,7 +657,15 @@ class FloatAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "file", "date")
+        exclude = (
+            "document",
+            "documents",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -661,7 +678,14 @@ class DateAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "file")
+        exclude = (
+            "document",
+            "documents",
+            "file",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -671,7 +695,15 @@ class StringAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "file", "date")
+        exclude = (
+            "document",
+            "documents",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -681,7 +713,15 @@ class ListAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "file", "date")
+        exclude = (
+            "document",
+            "documents",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -702,7 +742,7 @@ class Document(FormDjangoObjectType):
 
     class Meta:
         model = models.Document
-        exclude = ("family", "dynamicoption_set")
+        exclude = ("family", "dynamicoption_set", "search_vector")
         interfaces = (graphene.Node,)
         connection_class = CountableConnectionBase
 
@@ -715,7 +755,14 @@ class TableAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("documents", "file", "date")
+        exclude = (
+            "documents",
+            "file",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -740,7 +787,14 @@ class FileAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "date")
+        exclude = (
+            "document",
+            "documents",
+            "date",
+            "value_number",
+            "value_text",
+            "value_list",
+        )
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -899,6 +953,87 @@ def validate_document(info, document_global_id):
     return [result]
 
 
+class AnswerStatisticsGroupBy(graphene.Enum):
+    FORM = "form"
+    CASE_STATUS = "case_status"
+    WORK_ITEM_TASK = "work_item_task"
+
+
+class AnswerValueCount(ObjectType):
+    value = generic.GenericScalar(required=True)
+    count = graphene.Int(required=True)
+
+    def resolve_value(self, info):
+        return self[0]
+
+    def resolve_count(self, info):
+        return self[1]
+
+
+class AnswerHistogramBucket(ObjectType):
+    lower = graphene.Float(required=True)
+    upper = graphene.Float(required=True)
+    count = graphene.Int(required=True)
+
+    def resolve_lower(self, info):
+        return self[0]
+
+    def resolve_upper(self, info):
+        return self[1]
+
+    def resolve_count(self, info):
+        return self[2]
+
+
+class AnswerStatistics(ObjectType):
+    """Statistics of the answers to a question of a group of documents."""
+
+    group = graphene.String(
+        description="Value the documents are grouped by, if grouped at all"
+    )
+    document_count = graphene.Int(
+        required=True, description="Number of documents in the group"
+    )
+    answer_count = graphene.Int(
+        required=True, description="Number of documents answering the question"
+    )
+    sum = graphene.Float(description="Sum of numeric answers")
+    avg = graphene.Float(description="Average of numeric answers")
+    min = graphene.Float(description="Smallest numeric answer")
+    max = graphene.Float(description="Largest numeric answer")
+    values = graphene.List(
+        graphene.NonNull(AnswerValueCount),
+        required=True,
+        description="Number of answers per value, most frequent first",
+    )
+    histogram = graphene.List(
+        graphene.NonNull(AnswerHistogramBucket),
+        required=True,
+        description="Number of numeric answers per bucket, if `buckets` is given",
+    )
+
+
+def answer_statistics(info, documents, question, group_by=None, buckets=None):
+    """Return statistics of the visible answers to a question in given documents."""
+    answers = Answer.get_queryset(models.Answer.objects.all(), info)
+
+    return statistics.AnswerStatistics(
+        documents, answers, question, group_by, buckets
+    ).groups()
+
+
+def resolve_answer_statistics(info, question, group_by=None, buckets=None, **kwargs):
+    filterset_class = CollectionFilterSetFactory(
+        filters.DocumentFilterSet, filters.DocumentOrderSet
+    )
+    documents = Document.get_queryset(models.Document.objects.all(), info)
+    documents = filterset_class(
+        data=kwargs, queryset=documents, request=info.context
+    ).qs
+
+    return answer_statistics(info, documents, question, group_by, buckets)
+
+
 class Query:
     all_forms = DjangoFilterConnectionField(
         Form,
@@ -927,6 +1062,26 @@ class Query:
     document_validity = ConnectionField(
         DocumentValidityConnection, id=graphene.ID(required=True)
     )
+    answer_statistics = graphene.List(
+        graphene.NonNull(AnswerStatistics),
+        required=True,
+        question=graphene.ID(required=True),
+        group_by=AnswerStatisticsGroupBy(),
+        buckets=graphene.Int(),
+        filter=graphene.Argument(
+            lambda: convert_form_field(
+                CollectionFilterSetFactory(
+                    filters.DocumentFilterSet, filters.DocumentOrderSet
+                )
+                .base_filters["filter"]
+                .field
+            )
+        ),
+        description=(
+            "Statistics of the answers to a question in all documents matching "
+            "`filter`, optionally grouped."
+        ),
+    )
 
     def resolve_all_format_validators(self, info):
         return get_format_validators()
@@ -934,6 +1089,9 @@ class Query:
     def resolve_document_validity(self, info, id):
         return validate_document(info, id)
 
+    def resolve_answer_statistics(self, info, **kwargs):
+        return resolve_answer_statistics(info, **kwargs)
+
 
 QUESTION_ANSWER_TYPES = {
     models.Question.TYPE_MULTIPLE_CHOICE: ListAnswer,
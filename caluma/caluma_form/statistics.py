@@ -0,0 +1,211 @@
+"""Aggregation of answers to a question over a set of documents.
+
+All counts and aggregates are computed in the database, grouped by an
+optional attribute of the documents. Each kind of statistic is computed on
+first access, for all groups at once.
+"""
+from collections import defaultdict
+
+from django.core import exceptions
+from django.db.models import Avg, Count, F, Func, Max, Min, Sum, Value
+from django.db.models.functions import Least
+
+from .models import Answer, Question
+from .structure import object_local_memoise
+
+GROUP_BY_FIELDS = {
+    "form": "form",
+    "case_status": "case__status",
+    "work_item_task": "work_item__task",
+}
+
+NUMBER_TYPES = (Question.TYPE_INTEGER, Question.TYPE_FLOAT)
+
+
+class AnswerStatistics:
+    """Statistics of the given answers to a question in given documents."""
+
+    def __init__(self, documents, answers, question_slug, group_by=None, buckets=None):
+        question_type = Question.objects.get_types([question_slug])[question_slug]
+        self.value_field = Answer.TYPED_VALUE_FIELDS.get(question_type)
+        if self.value_field is None:
+            raise exceptions.ValidationError(
+                f"Questions of type {question_type} cannot be used in answerStatistics"
+            )
+        if buckets is not None and buckets < 1:
+            raise exceptions.ValidationError("The number of buckets must be at least 1")
+
+        self.question_type = question_type
+        self.buckets = buckets
+        self.documents = documents.order_by()
+        self.answers = answers.filter(
+            question_id=question_slug, document__in=self.documents.values("pk")
+        ).order_by()
+
+        self.group_fields = []
+        if group_by:
+            # `values()` can't select related fields under another name
+            group_field = GROUP_BY_FIELDS[group_by]
+            self.documents = self.documents.annotate(_group=F(group_field))
+            self.answers = self.answers.annotate(_group=F(f"document__{group_field}"))
+            self.group_fields = ["_group"]
+
+    def _grouped(self, queryset, fields=(), **aggregates):
+        """Return rows of aggregates grouped by document group and given fields."""
+        if not self.group_fields and not fields:
+            return [{"_group": None, **queryset.aggregate(**aggregates)}]
+
+        return [
+            {"_group": None, **row}
+            for row in queryset.values(*self.group_fields, *fields).annotate(
+                **aggregates
+            )
+        ]
+
+    def groups(self):
+        """Return statistics of each group of documents."""
+        rows = self._grouped(self.documents, count=Count("pk"))
+        rows.sort(key=lambda row: (row["_group"] is None, row["_group"] or ""))
+        return [
+            AnswerStatisticsGroup(self, row["_group"], row["count"]) for row in rows
+        ]
+
+    @object_local_memoise
+    def aggregates(self):
+        """Return count and numeric aggregates of answers per group."""
+        aggregates = {"count": Count("pk")}
+        if self.question_type in NUMBER_TYPES:
+            aggregates.update(
+                sum=Sum("value_number"),
+                avg=Avg("value_number"),
+                min=Min("value_number"),
+                max=Max("value_number"),
+            )
+
+        return {
+            row.pop("_group"): row for row in self._grouped(self.answers, **aggregates)
+        }
+
+    @object_local_memoise
+    def value_counts(self):
+        """Return count of answers per value per group, most frequent first.
+
+        Answers with multiple values are counted once for each of them. Those
+        are counted per distinct list of values in the database, and split
+        afterwards.
+        """
+        counts = defaultdict(lambda: defaultdict(int))
+        rows = self._grouped(self.answers, [self.value_field], count=Count("pk"))
+        for row in rows:
+            values = row[self.value_field]
+            if self.value_field != "value_list":
+                values = [values]
+            for value in values or []:
+                counts[row["_group"]][self._serialize(value)] += row["count"]
+
+        return {
+            group: sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+            for group, values in counts.items()
+        }
+
+    def _serialize(self, value):
+        if self.question_type == Question.TYPE_INTEGER:
+            return int(value)
+        if self.question_type == Question.TYPE_DATE:
+            return value.isoformat()
+        return value
+
+    @object_local_memoise
+    def histograms(self):
+        """Return histogram of numeric answers per group.
+
+        All groups share the same buckets, evenly spanning the range from the
+        smallest to the largest value of all groups.
+        """
+        if self.question_type not in NUMBER_TYPES or not self.buckets:
+            return {}
+
+        answers = self.answers.filter(value_number__isnull=False)
+        bounds = answers.aggregate(lower=Min("value_number"), upper=Max("value_number"))
+        lower, upper = bounds["lower"], bounds["upper"]
+        if lower is None:
+            return {}
+
+        if lower == upper:
+            # `width_bucket` fails on an empty range, so all values go into
+            # a single bucket
+            return {
+                row["_group"]: [(lower, upper, row["count"])]
+                for row in self._grouped(answers, count=Count("pk"))
+            }
+
+        buckets = self.buckets
+        width = (upper - lower) / buckets
+        # `width_bucket` puts the largest value into an additional bucket
+        bucket = Least(
+            Func(
+                F("value_number"),
+                Value(lower),
+                Value(upper),
+                Value(buckets),
+                function="width_bucket",
+            ),
+            Value(buckets),
+        )
+
+        counts = defaultdict(dict)
+        rows = self._grouped(
+            answers.annotate(_bucket=bucket), ["_bucket"], count=Count("pk")
+        )
+        for row in rows:
+            counts[row["_group"]][row["_bucket"]] = row["count"]
+
+        return {
+            group: [
+                (
+                    lower + (i - 1) * width,
+                    upper if i == buckets else lower + i * width,
+                    bucket_counts.get(i, 0),
+                )
+                for i in range(1, buckets + 1)
+            ]
+            for group, bucket_counts in counts.items()
+        }
+
+
+class AnswerStatisticsGroup:
+    def __init__(self, statistics, group, document_count):
+        self._statistics = statistics
+        self.group = group
+        self.document_count = document_count
+
+    def _aggregate(self, name):
+        return self._statistics.aggregates().get(self.group, {}).get(name)
+
+    @property
+    def answer_count(self):
+        return self._aggregate("count") or 0
+
+    @property
+    def sum(self):
+        return self._aggregate("sum")
+
+    @property
+    def avg(self):
+        return self._aggregate("avg")
+
+    @property
+    def min(self):
+        return self._aggregate("min")
+
+    @property
+    def max(self):
+        return self._aggregate("max")
+
+    @property
+    def values(self):
+        return self._statistics.value_counts().get(self.group, [])
+
+    @property
+    def histogram(self):
+        return self._statistics.histograms().get(self.group, [])
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import minio
@@ -66,6 +67,35 @@ class Minio:
             self.bucket, new_object_name, f"/{self.bucket}/{object_name}"
         )
 
+    def copy_objects(self, object_names):
+        """
+        Copy objects concurrently.
+
+        Failed copies are retried up to `MINIO_COPY_RETRIES` times, while
+        the objects copied successfully are kept.
+
+        :param object_names: list of (object_name, new_object_name) tuples
+        :return: list of (object_name, new_object_name, exception) tuples of
+                 the objects which couldn't be copied
+        """
+        failed = [(*names, None) for names in object_names]
+        for _ in range(settings.MINIO_COPY_RETRIES + 1):
+            with ThreadPoolExecutor(settings.MINIO_COPY_WORKERS) as executor:
+                futures = [
+                    (executor.submit(self.copy_object, *names[:2]), names[:2])
+                    for names in failed
+                ]
+
+            failed = [
+                (*names, future.exception())
+                for future, names in futures
+                if future.exception()
+            ]
+            if not failed:
+                break
+
+        return failed
+
     def move_object(self, object_name, new_object_name):
         self.copy_object(object_name, new_object_name)
         self.remove_object(object_name)
@@ -1145,7 +1145,10 @@ snapshots["test_query_all_questions[text-foo-matching-STARTSWITH] 1"] = {
             ]
         },
     },
-    "response": {"data": {"allDocuments": {"edges": []}}, "errors": "None"},
+    "response": {
+        "data": {"allDocuments": {"edges": [{"node": {"form": {"slug": "subform"}}}]}},
+        "errors": "None",
+    },
 }
 
 snapshots["test_query_all_questions[text-foo-matching-CONTAINS] 1"] = {
@@ -1691,7 +1694,10 @@ snapshots["test_query_all_questions[textarea-foo-matching-STARTSWITH] 1"] = {
             ]
         },
     },
-    "response": {"data": {"allDocuments": {"edges": []}}, "errors": "None"},
+    "response": {
+        "data": {"allDocuments": {"edges": [{"node": {"form": {"slug": "subform"}}}]}},
+        "errors": "None",
+    },
 }
 
 snapshots["test_query_all_questions[textarea-foo-matching-CONTAINS] 1"] = {
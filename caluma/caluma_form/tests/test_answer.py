@@ -29,3 +29,34 @@ def test_remove_answer(db, snapshot, question, answer, schema_executor):
         answer.refresh_from_db()
 
     snapshot.assert_match(result.data)
+
+
+def test_search_answers_value(db, document, answer_factory, schema_executor):
+    found = answer_factory(document=document, value="hello world")
+    answer_factory(document=document, value="goodbye")
+    answer_factory(document=document, value=["hello", "planet"])
+
+    query = """
+        query ($search: String) {
+          allDocuments {
+            edges {
+              node {
+                answers(search: $search) {
+                  edges {
+                    node {
+                      question {
+                        slug
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+    result = schema_executor(query, variable_values={"search": "world"})
+
+    assert not result.errors
+    (edge,) = result.data["allDocuments"]["edges"][0]["node"]["answers"]["edges"]
+    assert edge["node"]["question"]["slug"] == found.question_id
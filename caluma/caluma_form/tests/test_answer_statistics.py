@@ -0,0 +1,221 @@
+import pytest
+
+from ...caluma_core.visibilities import BaseVisibility, filter_queryset_for
+from .. import models
+from ..schema import Answer
+
+STATISTICS_QUERY = """
+    query (
+      $question: ID!
+      $groupBy: AnswerStatisticsGroupBy
+      $buckets: Int
+      $filter: [DocumentFilterSetType]
+    ) {
+      answerStatistics(
+        question: $question
+        groupBy: $groupBy
+        buckets: $buckets
+        filter: $filter
+      ) {
+        group
+        documentCount
+        answerCount
+        sum
+        avg
+        min
+        max
+        values {
+          value
+          count
+        }
+        histogram {
+          lower
+          upper
+          count
+        }
+      }
+    }
+"""
+
+
+@pytest.mark.parametrize(
+    "question__type",
+    [models.Question.TYPE_CHOICE, models.Question.TYPE_MULTIPLE_CHOICE],
+)
+def test_answer_statistics_values(
+    db, schema_executor, question, form_factory, document_factory, answer_factory
+):
+    form_a, form_b = form_factory.create_batch(2)
+    documents_a = document_factory.create_batch(3, form=form_a)
+    documents_b = document_factory.create_batch(2, form=form_b)
+
+    values = ["yes", "no", "yes", "yes", None]
+    for document, value in zip(documents_a + documents_b, values):
+        if value is None:
+            continue
+        if question.type == models.Question.TYPE_MULTIPLE_CHOICE:
+            value = [value, "maybe"]
+        answer_factory(question=question, document=document, value=value)
+
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug, "groupBy": "FORM"}
+    )
+    assert not result.errors
+
+    maybe_a, maybe_b = (
+        ([{"value": "maybe", "count": 3}], [{"value": "maybe", "count": 1}])
+        if question.type == models.Question.TYPE_MULTIPLE_CHOICE
+        else ([], [])
+    )
+    expected = {
+        form_a.slug: {
+            "documentCount": 3,
+            "answerCount": 3,
+            "values": [
+                *maybe_a,
+                {"value": "yes", "count": 2},
+                {"value": "no", "count": 1},
+            ],
+        },
+        form_b.slug: {
+            "documentCount": 2,
+            "answerCount": 1,
+            "values": [*maybe_b, {"value": "yes", "count": 1}],
+        },
+    }
+    assert {
+        group["group"]: {
+            key: group[key] for key in ("documentCount", "answerCount", "values")
+        }
+        for group in result.data["answerStatistics"]
+    } == expected
+
+    # filters of allDocuments apply
+    result = schema_executor(
+        STATISTICS_QUERY,
+        variable_values={"question": question.slug, "filter": [{"form": form_b.slug}]},
+    )
+    assert not result.errors
+    (statistics,) = result.data["answerStatistics"]
+    assert statistics["group"] is None
+    assert statistics["documentCount"] == 2
+    assert statistics["answerCount"] == 1
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_INTEGER])
+def test_answer_statistics_numbers(
+    db, schema_executor, question, document_factory, answer_factory
+):
+    for value in [1, 2, 2, 4, 9]:
+        answer_factory(question=question, document=document_factory(), value=value)
+
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug, "buckets": 2}
+    )
+    assert not result.errors
+
+    (statistics,) = result.data["answerStatistics"]
+    assert statistics["answerCount"] == 5
+    assert statistics["sum"] == 18
+    assert statistics["avg"] == 3.6
+    assert statistics["min"] == 1
+    assert statistics["max"] == 9
+    assert statistics["values"][0] == {"value": 2, "count": 2}
+    assert statistics["histogram"] == [
+        {"lower": 1, "upper": 5, "count": 4},
+        {"lower": 5, "upper": 9, "count": 1},
+    ]
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_FLOAT])
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_answer_statistics_histogram_identical_values(
+    db, schema_executor, question, document_factory, answer_factory, count
+):
+    for document in document_factory.create_batch(count):
+        answer_factory(question=question, document=document, value=2.5)
+
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug, "buckets": 3}
+    )
+    assert not result.errors
+
+    (statistics,) = result.data["answerStatistics"]
+    assert statistics["histogram"] == (
+        [{"lower": 2.5, "upper": 2.5, "count": count}] if count else []
+    )
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_DATE])
+def test_answer_statistics_dates(
+    db, schema_executor, question, document_factory, answer_factory
+):
+    for value in ["2020-01-02", "2020-01-02", "2021-03-04"]:
+        answer_factory(
+            question=question, document=document_factory(), value=None, date=value
+        )
+
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug, "buckets": 2}
+    )
+    assert not result.errors
+
+    (statistics,) = result.data["answerStatistics"]
+    assert statistics["values"] == [
+        {"value": "2020-01-02", "count": 2},
+        {"value": "2021-03-04", "count": 1},
+    ]
+    # only numbers are bucketed
+    assert statistics["histogram"] == []
+    assert statistics["sum"] is None
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_TABLE])
+def test_answer_statistics_invalid_question_type(db, schema_executor, question):
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug}
+    )
+
+    assert [str(error) for error in result.errors] == [
+        "['Questions of type table cannot be used in answerStatistics']"
+    ]
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_INTEGER])
+@pytest.mark.parametrize("buckets", [0, -1])
+def test_answer_statistics_invalid_buckets(db, schema_executor, question, buckets):
+    result = schema_executor(
+        STATISTICS_QUERY,
+        variable_values={"question": question.slug, "buckets": buckets},
+    )
+
+    assert [str(error) for error in result.errors] == [
+        "['The number of buckets must be at least 1']"
+    ]
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_INTEGER])
+def test_answer_statistics_answer_visibility(
+    db, mocker, schema_executor, question, document_factory, answer_factory
+):
+    visible, hidden = [
+        answer_factory(question=question, document=document_factory(), value=value)
+        for value in [1, 2]
+    ]
+
+    class CustomVisibility(BaseVisibility):
+        @filter_queryset_for(Answer)
+        def filter_queryset_for_answer(self, node, queryset, info):
+            return queryset.exclude(pk=hidden.pk)
+
+    mocker.patch("caluma.caluma_core.types.Node.visibility_classes", [CustomVisibility])
+
+    result = schema_executor(
+        STATISTICS_QUERY, variable_values={"question": question.slug}
+    )
+    assert not result.errors
+
+    (statistics,) = result.data["answerStatistics"]
+    assert statistics["documentCount"] == 2
+    assert statistics["answerCount"] == 1
+    assert statistics["sum"] == visible.value
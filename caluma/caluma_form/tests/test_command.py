@@ -9,7 +9,7 @@ from simple_history.models import registered_models
 
 from caluma.caluma_core.management.commands import cleanup_history
 
-from ..models import Form
+from ..models import Document, Form
 
 
 def test_create_bucket_command(mocker):
@@ -49,3 +49,29 @@ def test_cleanup_history_command(db, force, keep, kept):
     call_command("cleanup_history", **kwargs, stdout=open(os.devnull, "w"))
 
     assert Form.history.count() == kept
+
+
+def test_update_search_vectors_command(db, document_factory, settings):
+    documents = document_factory.create_batch(3)
+    Document.objects.update(search_vector=None)
+
+    call_command("update_search_vectors", batch_size=2, stdout=open(os.devnull, "w"))
+
+    assert not Document.objects.filter(search_vector=None).exists()
+    assert set(Document.objects.filter(search_vector=documents[0].form.slug)) == {
+        documents[0]
+    }
+
+
+def test_update_search_vectors_command_forms(db, document_factory):
+    document, other = document_factory.create_batch(2)
+    Document.objects.update(search_vector=None)
+
+    call_command(
+        "update_search_vectors",
+        "--form",
+        document.form_id,
+        stdout=open(os.devnull, "w"),
+    )
+
+    assert set(Document.objects.exclude(search_vector=None)) == {document}
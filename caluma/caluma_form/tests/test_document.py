@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from graphql_relay import to_global_id
 
 from ...caluma_core.relay import extract_global_id
@@ -7,6 +9,7 @@ from ...caluma_core.visibilities import BaseVisibility, filter_queryset_for
 from ...caluma_form.models import Answer, Document, Question
 from ...caluma_form.schema import Document as DocumentNodeType
 from .. import serializers
+from ..filters import DocumentFilterSet
 
 
 @pytest.mark.parametrize(
@@ -907,6 +910,41 @@ def test_save_document_table_answer_setting_family(
     assert to_be_deleted_table_row.family == to_be_deleted_document.family
 
 
+def test_document_set_family(
+    db,
+    document_factory,
+    answer_factory,
+    answer_document_factory,
+    django_assert_num_queries,
+):
+    root = document_factory()
+    document = document_factory()
+    rows = [document]
+    for _ in range(3):
+        row = document_factory(family=document)
+        table_answer = answer_factory(document=rows[-1], value=None)
+        answer_document_factory(answer=table_answer, document=row)
+        rows.append(row)
+    other = document_factory()
+
+    # subtree update, loading of changed documents and history insert
+    with django_assert_num_queries(3):
+        document.set_family(root)
+
+    assert document.family == root
+    assert set(Document.objects.filter(family=root).values_list("pk", flat=True)) == {
+        root.pk,
+        *(row.pk for row in rows),
+    }
+    assert Document.history.filter(id=rows[-1].pk).latest().family_id == root.pk
+
+    with django_assert_num_queries(1):
+        document.set_family(root)
+
+    other.refresh_from_db()
+    assert other.family == other
+
+
 @pytest.mark.parametrize("answer__value", [1.1])
 def test_query_answer_node(db, answer, schema_executor):
     global_id = to_global_id("FloatAnswer", answer.pk)
@@ -1108,7 +1146,7 @@ def test_remove_document_without_case_table(
 
 
 def test_copy_document(
-    db,
+    transactional_db,
     document_factory,
     answer_factory,
     answer_document_factory,
@@ -1217,3 +1255,129 @@ def test_copy_document(
     assert set(ans.value for ans in result_table_answer_document.answers.all()) == set(
         ans.value for ans in row_document_1.answers.all()
     )
+
+
+@pytest.fixture
+def copy_tree(
+    document_factory, answer_factory, answer_document_factory, question_factory
+):
+    file_question = question_factory(type=Question.TYPE_FILE)
+    table_question = question_factory(type=Question.TYPE_TABLE)
+    document = document_factory()
+    parents = [document]
+    tree = {document.pk}
+    for _ in range(2):
+        table_answers = [
+            answer_factory(document=parent, question=table_question)
+            for parent in parents
+        ]
+        parents = [
+            answer_document_factory(answer=table_answer, sort=sort).document
+            for table_answer in table_answers
+            for sort in range(2)
+        ]
+        for parent in parents:
+            answer_factory(document=parent, question=file_question)
+            tree.add(parent.pk)
+
+    return document, tree
+
+
+def test_copy_document_tree(
+    transactional_db, copy_tree, minio_mock, django_assert_num_queries
+):
+    document, tree = copy_tree
+
+    # reads of the tree, inserts with history and search vector update
+    with django_assert_num_queries(4 + 4 * 2 + 1):
+        new_document = document.copy()
+
+    copies = Document.objects.filter(family=new_document)
+    assert copies.count() == 7
+    assert set(copies.values_list("source_id", flat=True)) == tree
+    new_files = Answer.objects.filter(document__in=copies, file__isnull=False)
+    assert new_files.count() == minio_mock.copy_object.call_count == 6
+    assert new_document.answers.get().documents.count() == 2
+
+
+@pytest.mark.parametrize("failures,errors", [(1, 0), (3, 1)])
+def test_copy_document_tree_failed_blobs(
+    transactional_db, copy_tree, minio_mock, settings, caplog, failures, errors
+):
+    settings.MINIO_COPY_RETRIES = 2
+    document, _ = copy_tree
+    failing = Answer.objects.filter(file__isnull=False).first().file.object_name
+    attempts = []
+
+    def copy_object(bucket, new_object_name, source):
+        if source.endswith(failing):
+            attempts.append(new_object_name)
+            if len(attempts) <= failures:
+                raise Exception("copy failed")
+
+    minio_mock.copy_object.side_effect = copy_object
+    new_document = document.copy()
+
+    # the copies are committed before the blobs are copied, so successful
+    # copies are kept and failed ones are retried instead of raising
+    assert Document.objects.filter(family=new_document).count() == 7
+    minio_mock.remove_object.assert_not_called()
+    assert minio_mock.copy_object.call_count == 5 + min(failures + 1, 3)
+    assert len(set(attempts)) == 1
+    assert [record.levelname for record in caplog.records] == ["ERROR"] * errors
+
+
+def test_copy_document_tree_rollback(transactional_db, copy_tree, minio_mock):
+    document, _ = copy_tree
+
+    with pytest.raises(Exception, match="rolled back"):
+        with transaction.atomic():
+            document.copy()
+            raise Exception("rolled back")
+
+    assert not Document.objects.filter(source__isnull=False).exists()
+    minio_mock.copy_object.assert_not_called()
+
+
+def test_document_search_vector(db, document, question, answer_factory, settings):
+    settings.DOCUMENT_SEARCH_CONFIG = "simple"
+    answer = answer_factory(document=document, question=question, value="snowflake")
+
+    def search(value):
+        filterset = DocumentFilterSet({"search": value})
+        return list(filterset.qs.filter(pk=document.pk))
+
+    assert search("snowflake") == [document]
+    assert search(document.form.slug) == [document]
+
+    answer.value = "blizzard"
+    answer.save()
+    assert search("snowflake") == []
+    assert search("blizzard") == [document]
+
+    answer.delete()
+    assert search("blizzard") == []
+
+
+def test_document_search_vector_form_changed(db, document, form_factory, settings):
+    settings.DOCUMENT_SEARCH_CONFIG = "simple"
+    form = document.form
+
+    def search(value):
+        filterset = DocumentFilterSet({"search": value})
+        return list(filterset.qs.filter(pk=document.pk))
+
+    # changes not affecting the search vector don't update the documents
+    with CaptureQueriesContext(connection) as context:
+        form.meta = {"foo": "bar"}
+        form.save()
+    assert not any("caluma_form_document" in query["sql"] for query in context)
+
+    form.name = "avalanche"
+    form.save()
+    assert search("avalanche") == [document]
+
+    document.form = form_factory(name="glacier")
+    document.save()
+    assert search("glacier") == [document]
+    assert search("avalanche") == []
@@ -0,0 +1,219 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from .. import models, schema
+from ..export import DocumentExport
+from ..views import DocumentExportView
+
+
+@pytest.fixture
+def export_form(form_factory, form_question_factory, question_factory):
+    form = form_factory(slug="main")
+    form_question_factory(
+        form=form, sort=3, question=question_factory(slug="name", type="text")
+    )
+    form_question_factory(
+        form=form,
+        sort=2,
+        question=question_factory(slug="note", type=models.Question.TYPE_STATIC),
+    )
+    form_question_factory(
+        form=form, sort=2, question=question_factory(slug="form", type="text")
+    )
+
+    sub_form = form_factory(slug="sub")
+    form_question_factory(
+        form=sub_form, question=question_factory(slug="born", type="date")
+    )
+    form_question_factory(
+        form=form,
+        sort=1,
+        question=question_factory(slug="sub", type="form", sub_form=sub_form),
+    )
+
+    row_form = form_factory(slug="row")
+    form_question_factory(
+        form=row_form, sort=1, question=question_factory(slug="item", type="text")
+    )
+    form_question_factory(
+        form=row_form, sort=0, question=question_factory(slug="amount", type="integer")
+    )
+    form_question_factory(
+        form=form,
+        sort=0,
+        question=question_factory(slug="items", type="table", row_form=row_form),
+    )
+    return form
+
+
+@pytest.fixture
+def export_documents(
+    export_form, document_factory, answer_factory, answer_document_factory
+):
+    first = document_factory(form=export_form, created_by_group="a")
+    answer_factory(document=first, question_id="name", value="Alice")
+    answer_factory(document=first, question_id="form", value="Paper")
+    answer_factory(document=first, question_id="born", value=None, date="2000-01-31")
+    table = answer_factory(document=first, question_id="items", value=None)
+    for sort, (item, amount) in enumerate([("apples", 3), ("pears", 5)]):
+        row = document_factory(form_id="row", family=first)
+        answer_factory(document=row, question_id="item", value=item)
+        answer_factory(document=row, question_id="amount", value=amount)
+        answer_document_factory(answer=table, document=row, sort=2 - sort)
+
+    second = document_factory(form=export_form, created_by_group="b")
+    answer_factory(document=second, question_id="name", value="Bob")
+
+    document_factory()  # other form
+    return first, second
+
+
+def test_export_rows(db, export_form, export_documents, django_assert_num_queries):
+    first, second = export_documents
+    export = DocumentExport(
+        export_form,
+        models.Document.objects.all(),
+        models.Answer.objects.all(),
+        chunk_size=1,
+    )
+
+    assert export.columns[-4:] == [
+        "question.name",
+        "question.form",
+        "question.born",
+        "question.items",
+    ]
+    assert len(set(export.columns)) == len(export.columns)
+
+    # documents, then answers and table rows per chunk and answers of the rows
+    with django_assert_num_queries(1 + 2 * 2 + 1):
+        rows = {row["id"]: row for row in export.rows()}
+
+    assert rows.keys() == {str(first.pk), str(second.pk)}
+    assert rows[str(first.pk)]["form"] == "main"
+    assert rows[str(first.pk)]["question.form"] == "Paper"
+    assert rows[str(first.pk)]["question.name"] == "Alice"
+    assert rows[str(first.pk)]["question.born"] == "2000-01-31"
+    assert rows[str(first.pk)]["question.items"] == [
+        {"item": "apples", "amount": 3},
+        {"item": "pears", "amount": 5},
+    ]
+    assert rows[str(second.pk)]["question.born"] is None
+    assert rows[str(second.pk)]["question.items"] == []
+    assert rows[str(second.pk)]["created_by_group"] == "b"
+
+
+def test_export_files(
+    db, form, form_question_factory, question_factory, answer_factory
+):
+    question = question_factory(slug="upload", type=models.Question.TYPE_FILE)
+    form_question_factory(form=form, question=question)
+    answer = answer_factory(question=question, document__form=form)
+
+    export = DocumentExport(
+        form, models.Document.objects.all(), models.Answer.objects.all()
+    )
+
+    # without table questions, no table rows are looked up
+    assert not export.row_questions
+    assert [row["question.upload"] for row in export.rows()] == [answer.file.name]
+
+
+@pytest.mark.parametrize("export_format", ["csv", "jsonl"])
+def test_export_command(db, export_form, export_documents, export_format):
+    out = io.StringIO()
+    call_command("export_documents", "main", format=export_format, stdout=out)
+
+    if export_format == "csv":
+        rows = {
+            row["question.name"]: row
+            for row in csv.DictReader(io.StringIO(out.getvalue()))
+        }
+        assert rows["Alice"]["question.born"] == "2000-01-31"
+        assert json.loads(rows["Alice"]["question.items"])[1] == {
+            "item": "pears",
+            "amount": 5,
+        }
+        assert rows["Bob"]["question.born"] == ""
+    else:
+        rows = {
+            row["question.name"]: row
+            for row in map(json.loads, out.getvalue().splitlines())
+        }
+        assert rows["Alice"]["question.items"][0] == {"item": "apples", "amount": 3}
+        assert rows["Bob"]["question.born"] is None
+
+    assert len(rows) == 2
+
+
+def test_export_command_output(db, export_form, export_documents, tmp_path):
+    output = tmp_path / "export.jsonl"
+    call_command("export_documents", "main", format="jsonl", output=str(output))
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(row["question.name"] for row in rows) == ["Alice", "Bob"]
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer"])
+def test_export_view_unauthenticated(db, rf, export_form, authorization):
+    headers = {"HTTP_AUTHORIZATION": authorization} if authorization else {}
+    request = rf.get(reverse("export-documents"), {"form": "main"}, **headers)
+    response = DocumentExportView.as_view()(request)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    "form,export_format,status_code",
+    [
+        ("main", "jsonl", status.HTTP_200_OK),
+        ("main", "xml", status.HTTP_400_BAD_REQUEST),
+        ("unknown", "csv", status.HTTP_404_NOT_FOUND),
+    ],
+)
+def test_export_view(
+    db,
+    client,
+    mocker,
+    admin_user,
+    export_form,
+    export_documents,
+    form,
+    export_format,
+    status_code,
+):
+    mocker.patch.object(DocumentExportView, "get_user", return_value=admin_user)
+    mocker.patch.object(
+        schema.Document,
+        "get_queryset",
+        lambda queryset, info: queryset.filter(
+            created_by_group__in=[*info.context.user.groups, "a"]
+        ),
+    )
+    mocker.patch.object(
+        schema.Answer,
+        "get_queryset",
+        lambda queryset, info: queryset.exclude(question_id__in=["born", "amount"]),
+    )
+
+    response = client.get(
+        reverse("export-documents"), {"form": form, "format": export_format}
+    )
+    assert response.status_code == status_code
+    if status_code == status.HTTP_200_OK:
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["question.name"] for row in rows] == ["Alice"]
+        assert rows[0]["question.born"] is None
+        assert rows[0]["question.items"] == [
+            {"item": "apples", "amount": None},
+            {"item": "pears", "amount": None},
+        ]
@@ -1,8 +1,9 @@
 import pytest
+from graphql_relay import to_global_id
 
 from ...caluma_core.relay import extract_global_id
 from ...caluma_form.filters import AnswerHierarchyMode, AnswerLookupMode
-from .. import models
+from .. import models, validators
 
 TEST_VALUES = {
     "multiple_choice": {"matching": ["a", "b"], "nomatch": ["x"]},
@@ -160,6 +161,10 @@ def test_query_all_questions(
         (models.Question.TYPE_DYNAMIC_MULTIPLE_CHOICE, ["a", "b"], ["c"], False),
         (models.Question.TYPE_DYNAMIC_CHOICE, "foo", ["foo", "bar"], True),
         (models.Question.TYPE_DYNAMIC_CHOICE, "foo", ["bar", "baz"], False),
+        # values which can't be looked up in the typed columns
+        (models.Question.TYPE_MULTIPLE_CHOICE, ["a", "b"], ["a", 1], True),
+        (models.Question.TYPE_CHOICE, "f" * 500, ["f" * 500], True),
+        (models.Question.TYPE_CHOICE, "f" * 500, ["f" * 499], False),
     ],
 )
 def test_has_answer_intersect(
@@ -229,3 +234,151 @@ def test_visible_in_context(
         len(result.data["allDocuments"]["edges"][0]["node"]["answers"]["edges"])
         == expected
     )
+
+
+VISIBLE_ANSWERS = """
+    answers(visibleInContext: true) {
+      edges {
+        node {
+          question {
+            slug
+          }
+        }
+      }
+    }
+"""
+
+
+@pytest.mark.parametrize(
+    "query,nodes",
+    [
+        (
+            f"allDocuments {{ edges {{ node {{ {VISIBLE_ANSWERS} }} }} }}",
+            "allDocuments",
+        ),
+        (
+            f"allCases {{ edges {{ node {{ document {{ {VISIBLE_ANSWERS} }} }} }} }}",
+            "allCases",
+        ),
+    ],
+)
+def test_visible_in_context_batched(
+    schema_executor,
+    db,
+    mocker,
+    form,
+    question_factory,
+    form_question_factory,
+    case_factory,
+    answer_factory,
+    query,
+    nodes,
+):
+    q1 = question_factory(type=models.Question.TYPE_TEXT, is_hidden="false")
+    q2 = question_factory(
+        type=models.Question.TYPE_TEXT, is_hidden=f"'{q1.slug}'|answer=='hide'"
+    )
+    form_question_factory(form=form, question=q1)
+    form_question_factory(form=form, question=q2)
+
+    expected = {}
+    for value in ["hide", "show", "show"]:
+        document = case_factory(document__form=form).document
+        answer_factory(document=document, question=q1, value=value)
+        answer_factory(document=document, question=q2, value="foo")
+        expected[document.pk] = {q1.slug} if value == "hide" else {q1.slug, q2.slug}
+
+    compute = mocker.spy(validators.DocumentValidator, "_compute_visible_questions")
+    result = schema_executor(f"query {{ {query} }}")
+
+    assert not result.errors
+    # the families of all nodes of the page are computed at once
+    (call,) = compute.call_args_list
+    assert set(call[0][1]) == expected.keys()
+
+    visible = [
+        {
+            answer["node"]["question"]["slug"]
+            for answer in edge["node"].get("document", edge["node"])["answers"]["edges"]
+        }
+        for edge in result.data[nodes]["edges"]
+    ]
+    assert sorted(visible, key=len) == sorted(expected.values(), key=len)
+
+
+def test_visible_in_context_without_page(
+    schema_executor, db, document_factory, answer_factory
+):
+    document, empty_document = document_factory.create_batch(2)
+    answer = answer_factory(document=document)
+    document.form.questions.add(answer.question)
+
+    query = """
+        query ($document: ID!, $empty: ID!) {
+          allForms { edges { node { slug } } }
+          document: node(id: $document) { ... on Document { %s } }
+          empty: node(id: $empty) { ... on Document { %s } }
+        }
+    """ % (
+        VISIBLE_ANSWERS,
+        VISIBLE_ANSWERS,
+    )
+    variables = {
+        "document": to_global_id("Document", document.pk),
+        "empty": to_global_id("Document", empty_document.pk),
+    }
+    result = schema_executor(query, variable_values=variables)
+
+    assert not result.errors
+    assert [
+        edge["node"]["question"]["slug"]
+        for edge in result.data["document"]["answers"]["edges"]
+    ] == [answer.question.slug]
+    assert result.data["empty"]["answers"]["edges"] == []
+
+
+def test_has_answer_multiple_conditions(
+    schema_executor,
+    db,
+    question_factory,
+    document_factory,
+    answer_factory,
+    django_assert_num_queries,
+):
+    questions = question_factory.create_batch(3, type=models.Question.TYPE_TEXT)
+    doc, other_doc = document_factory.create_batch(2)
+    for i, question in enumerate(questions):
+        answer_factory(document=doc, question=question, value="foo")
+        # other document only matches the first condition
+        answer_factory(
+            document=other_doc, question=question, value="bar" if i else "foo"
+        )
+
+    query = """
+        query asdf ($hasAnswer: [HasAnswerFilterType]!) {
+          allDocuments(hasAnswer: $hasAnswer) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+    variables = {
+        "hasAnswer": [
+            {"question": question.slug, "value": "foo"} for question in questions
+        ]
+    }
+
+    # first execution resolves the question types, later ones use the cache
+    result = schema_executor(query, variable_values=variables)
+    assert not result.errors
+    with django_assert_num_queries(1):
+        result = schema_executor(query, variable_values=variables)
+
+    assert not result.errors
+    assert [
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allDocuments"]["edges"]
+    ] == [str(doc.pk)]
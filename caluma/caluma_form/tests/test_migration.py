@@ -10,6 +10,14 @@ from django.db.utils import DataError
 from caluma.utils import col_type_from_db
 
 
+@pytest.fixture(autouse=True)
+def migrate_to_latest(transactional_db):
+    """Migrate back to the latest state, which other transactional tests expect."""
+    yield
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
 def test_migrate_to_flat_answers(transactional_db):
     executor = MigrationExecutor(connection)
     app = "caluma_form"
@@ -347,3 +355,50 @@ def test_migrate_slugfield_length(transactional_db):
 
     # should now throw anymore
     _verify_foreign_key_types(new_apps)
+
+
+def test_populate_answer_typed_values(transactional_db):
+    executor = MigrationExecutor(connection)
+    app = "caluma_form"
+    migrate_from = [(app, "0034_fix_fk_lengths")]
+    migrate_to = [(app, "0035_answer_typed_values")]
+
+    executor.migrate(migrate_from)
+    old_apps = executor.loader.project_state(migrate_from).apps
+
+    Document = old_apps.get_model(app, "Document")
+    Form = old_apps.get_model(app, "Form")
+    Question = old_apps.get_model(app, "Question")
+    Answer = old_apps.get_model(app, "Answer")
+
+    document = Document.objects.create(form=Form.objects.create(slug="form"))
+    values = {
+        "integer": 3,
+        "float": 1.5,
+        "text": "x" * 600,
+        "choice": "option",
+        "multiple_choice": ["a", "b"],
+    }
+    for question_type, value in values.items():
+        Answer.objects.create(
+            document=document,
+            question=Question.objects.create(type=question_type, slug=question_type),
+            value=value,
+        )
+
+    executor.loader.build_graph()  # reload.
+    executor.migrate(migrate_to)
+    new_apps = executor.loader.project_state(migrate_to).apps
+
+    Answer = new_apps.get_model(app, "Answer")
+    typed_values = {
+        answer.question_id: (answer.value_number, answer.value_text, answer.value_list)
+        for answer in Answer.objects.all()
+    }
+    assert typed_values == {
+        "integer": (3, None, None),
+        "float": (1.5, None, None),
+        "text": (None, "x" * 500, None),
+        "choice": (None, "option", None),
+        "multiple_choice": (None, None, ["a", "b"]),
+    }
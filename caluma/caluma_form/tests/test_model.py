@@ -34,3 +34,53 @@ def test_update_file(db, file_factory, mocker):
     file.save()
     Minio.copy_object.assert_called()
     Minio.remove_object.assert_called()
+
+
+@pytest.mark.parametrize(
+    "question__type,answer__value,expected",
+    [
+        (Question.TYPE_INTEGER, 10, (10, None, None)),
+        (Question.TYPE_FLOAT, 1.5, (1.5, None, None)),
+        (Question.TYPE_TEXT, "foo", (None, "foo", None)),
+        (Question.TYPE_TEXTAREA, "x" * 600, (None, "x" * 500, None)),
+        (Question.TYPE_CHOICE, "option", (None, "option", None)),
+        (Question.TYPE_MULTIPLE_CHOICE, ["a", "b"], (None, None, ["a", "b"])),
+        (Question.TYPE_INTEGER, None, (None, None, None)),
+        (Question.TYPE_DATE, None, (None, None, None)),
+    ],
+)
+def test_answer_typed_values(db, question, answer, expected):
+    answer.refresh_from_db()
+    assert (answer.value_number, answer.value_text, answer.value_list) == expected
+
+    answer.value = None
+    answer.save()
+    answer.refresh_from_db()
+    assert (answer.value_number, answer.value_text, answer.value_list) == (
+        None,
+        None,
+        None,
+    )
+
+
+@pytest.mark.parametrize(
+    "question__type,answer__value,new_type,expected",
+    [
+        (Question.TYPE_TEXT, "10", Question.TYPE_INTEGER, (None, None, None)),
+        (Question.TYPE_INTEGER, 10, Question.TYPE_FLOAT, (10, None, None)),
+        (Question.TYPE_CHOICE, "a", Question.TYPE_TEXTAREA, (None, "a", None)),
+        (Question.TYPE_TEXT, ["a"], Question.TYPE_MULTIPLE_CHOICE, (None, None, ["a"])),
+    ],
+)
+def test_answer_typed_values_type_changed(
+    db, question, answer, answer_factory, new_type, expected
+):
+    other = answer_factory(value="other", question__type=Question.TYPE_TEXT)
+
+    question.type = new_type
+    question.save()
+
+    answer.refresh_from_db()
+    assert (answer.value_number, answer.value_text, answer.value_list) == expected
+    other.refresh_from_db()
+    assert other.value_text == "other"
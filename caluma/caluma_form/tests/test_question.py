@@ -711,3 +711,42 @@ def test_all_questions_slug_filter(
 
     assert not result.errors
     assert len(result.data["allQuestions"]["edges"]) == num_questions
+
+
+def test_question_get_types(db, question_factory, django_assert_num_queries):
+    text_question, date_question = question_factory.create_batch(2)
+    text_question.type = models.Question.TYPE_TEXT
+    text_question.save()
+    date_question.type = models.Question.TYPE_DATE
+    date_question.save()
+
+    slugs = [text_question.slug, date_question.slug]
+    expected = {
+        text_question.slug: models.Question.TYPE_TEXT,
+        date_question.slug: models.Question.TYPE_DATE,
+    }
+    with django_assert_num_queries(1):
+        assert models.Question.objects.get_types(slugs) == expected
+    with django_assert_num_queries(0):
+        assert models.Question.objects.get_types(slugs) == expected
+
+    text_question.type = models.Question.TYPE_TEXTAREA
+    text_question.save()
+    assert models.Question.objects.get_types(slugs) == {
+        **expected,
+        text_question.slug: models.Question.TYPE_TEXTAREA,
+    }
+
+    with pytest.raises(models.Question.DoesNotExist):
+        models.Question.objects.get_types(["unknown"])
+
+
+def test_question_get_types_local_cache(
+    db, settings, question, django_assert_num_queries
+):
+    # types expire immediately, as other processes can't invalidate them
+    settings.QUESTION_TYPE_CACHE_TIMEOUT = 0
+
+    for _ in range(2):
+        with django_assert_num_queries(1):
+            models.Question.objects.get_types([question.slug])
@@ -1,5 +1,12 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
 from ...caluma_core.relay import extract_global_id
-from .. import models
+from .. import indexes, models
+from ..filters import DocumentFilterSet
 
 
 def test_search(
@@ -139,3 +146,98 @@ def test_search_invalid_question_type(schema_executor, db, question_factory):
     assert [str(err) for err in result.errors] == [
         ("['Questions of type form cannot be used in searchAnswers']")
     ]
+
+
+@pytest.mark.parametrize(
+    "lookup,word,expect_match",
+    [
+        ("CONTAINS", "LO WO", True),
+        ("CONTAINS", "100%", False),
+        ("STARTSWITH", "hel", True),
+        ("STARTSWITH", "world", False),
+        ("TEXT", "world", True),
+    ],
+)
+def test_search_lookup(
+    schema_executor, db, question_factory, document, lookup, word, expect_match
+):
+    question = question_factory(type=models.Question.TYPE_TEXT)
+    document.answers.create(question=question, value="hello world")
+
+    result = schema_executor(
+        """
+            query ($search: [SearchAnswersFilterType!]) {
+              allDocuments (searchAnswers: $search) {
+                totalCount
+              }
+            }
+        """,
+        variable_values={
+            "search": [{"questions": [question.slug], "value": word, "lookup": lookup}]
+        },
+    )
+
+    assert not result.errors
+    assert result.data["allDocuments"]["totalCount"] == int(expect_match)
+
+
+def _trigram_indexes():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE indexname LIKE %s",
+            [f"{indexes.TRIGRAM_INDEX_PREFIX}%"],
+        )
+        return dict(cursor.fetchall())
+
+
+def test_sync_trigram_indexes(db, settings, question):
+    settings.ANSWER_TRIGRAM_INDEX = True
+    indexes.sync_trigram_indexes()
+    assert list(_trigram_indexes()) == [indexes.TRIGRAM_INDEX_PREFIX]
+
+    settings.ANSWER_TRIGRAM_INDEX_QUESTIONS = [question.slug]
+    indexes.sync_trigram_indexes()
+    ((name, definition),) = _trigram_indexes().items()
+    assert name != indexes.TRIGRAM_INDEX_PREFIX
+    assert "gin_trgm_ops" in definition
+    assert question.slug in definition
+
+    settings.ANSWER_TRIGRAM_INDEX = False
+    indexes.sync_trigram_indexes()
+    assert _trigram_indexes() == {}
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_sync_trigram_indexes_command(transactional_db, settings, question, dry_run):
+    settings.ANSWER_TRIGRAM_INDEX = True
+    settings.ANSWER_TRIGRAM_INDEX_QUESTIONS = [question.slug]
+
+    # outside of a transaction, the indexes are built concurrently
+    out = StringIO()
+    call_command("sync_trigram_indexes", dry_run=dry_run, stdout=out)
+
+    if dry_run:
+        assert _trigram_indexes() == {}
+        assert "Would create index" in out.getvalue()
+        return
+
+    assert list(_trigram_indexes()) == list(indexes.get_trigram_indexes())
+    assert f"on question '{question.slug}'" in out.getvalue()
+    assert indexes.sync_trigram_indexes() == ([], [])
+
+    settings.ANSWER_TRIGRAM_INDEX = False
+    out = StringIO()
+    call_command("sync_trigram_indexes", stdout=out)
+    assert _trigram_indexes() == {}
+    assert "Dropped index" in out.getvalue()
+
+
+def test_search_correlated(db, question):
+    filterset = DocumentFilterSet(
+        {"search_answers": [{"questions": [question.slug], "value": "foo bar"}]}
+    )
+    sql = str(filterset.qs.query)
+
+    # one lookup per word, correlated with the document of the outer query
+    assert sql.count("EXISTS") == 2
+    assert "GROUP BY" not in sql
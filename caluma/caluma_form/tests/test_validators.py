@@ -1,8 +1,16 @@
 import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import ValidationError
 
 from ...caluma_core.tests import extract_serializer_input_fields
-from ...caluma_form.models import DynamicOption, Question
+from ...caluma_form.models import (
+    Answer,
+    AnswerDocument,
+    DynamicOption,
+    Question,
+    invalidate_answer_visibility,
+)
 from .. import serializers, structure
 from ..jexl import QuestionMissing
 from ..validators import DocumentValidator, QuestionValidator
@@ -747,3 +755,138 @@ def test_validate_form_in_table(
         # Should not raise, as the "form" referenced by the
         # question's jexl is the rowform, which is wrong
         DocumentValidator().validate(document, admin_user)
+
+
+@pytest.fixture
+def shared_cache(mocker):
+    # the local memory cache is shared within the tests
+    mocker.patch("caluma.caluma_form.models.is_shared_cache", return_value=True)
+    mocker.patch("caluma.caluma_form.validators.is_shared_cache", return_value=True)
+
+
+@pytest.fixture
+def visibility_families(
+    question_factory, form_factory, form_question_factory, document_factory
+):
+    form = form_factory()
+    q1 = question_factory(is_hidden="false", type=Question.TYPE_TEXT)
+    q2 = question_factory(
+        is_hidden=f"'{q1.slug}'|answer=='foo'", type=Question.TYPE_TEXT
+    )
+    form_question_factory(form=form, question=q1)
+    form_question_factory(form=form, question=q2)
+
+    doc_a, doc_b = document_factory.create_batch(2, form=form)
+    return q1, q2, doc_a, doc_b
+
+
+def test_visible_questions_of_families(
+    transactional_db,
+    shared_cache,
+    visibility_families,
+    answer_factory,
+    django_assert_num_queries,
+):
+    q1, q2, doc_a, doc_b = visibility_families
+    answer = answer_factory(question=q1, document=doc_a, value="foo")
+    answer_factory(question=q1, document=doc_b, value="bar")
+
+    validator = DocumentValidator()
+
+    def visible(family_ids):
+        result = validator.visible_questions_of_families(family_ids)
+        return {family_id: set(slugs) for family_id, slugs in result.items()}
+
+    assert visible([doc_a.pk, doc_b.pk]) == {
+        doc_a.pk: {q1.slug},
+        doc_b.pk: {q1.slug, q2.slug},
+    }
+
+    with django_assert_num_queries(0):
+        assert visible([doc_a.pk, doc_b.pk])[doc_a.pk] == {q1.slug}
+
+    answer.value = "bar"
+    answer.save()
+    assert visible([doc_a.pk]) == {doc_a.pk: {q1.slug, q2.slug}}
+
+    q2.is_hidden = "true"
+    q2.save()
+    assert visible([doc_a.pk, doc_b.pk]) == {doc_a.pk: {q1.slug}, doc_b.pk: {q1.slug}}
+
+
+def test_visible_questions_of_families_rollback(
+    transactional_db, shared_cache, visibility_families, answer_factory
+):
+    q1, q2, doc_a, _ = visibility_families
+    answer = answer_factory(question=q1, document=doc_a, value="bar")
+    validator = DocumentValidator()
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            answer.value = "foo"
+            answer.save()
+            assert validator.visible_questions_of_families([doc_a.pk]) == {
+                doc_a.pk: [q1.slug]
+            }
+            raise RuntimeError()
+
+    # the result of the rolled back transaction hasn't been cached
+    visible = validator.visible_questions_of_families([doc_a.pk])
+    assert set(visible[doc_a.pk]) == {q1.slug, q2.slug}
+
+
+def test_visible_questions_of_families_local_cache(
+    db, visibility_families, answer_factory, django_assert_num_queries
+):
+    q1, q2, doc_a, _ = visibility_families
+    answer = answer_factory(question=q1, document=doc_a, value="foo")
+    validator = DocumentValidator()
+
+    # not cached, as other processes couldn't invalidate the results
+    for _ in range(2):
+        with django_assert_num_queries(3):
+            assert validator.visible_questions_of_families([doc_a.pk]) == {
+                doc_a.pk: [q1.slug]
+            }
+
+    # no invalidation needed, so the family isn't looked up either
+    answer.refresh_from_db()
+    with CaptureQueriesContext(connection) as context:
+        answer.save()
+    assert not any(
+        query["sql"].startswith('SELECT "caluma_form_document"') for query in context
+    )
+
+
+@pytest.mark.parametrize(
+    "model,select_related,num_queries",
+    [
+        (Answer, [], 1),
+        (AnswerDocument, ["answer"], 1),
+        (AnswerDocument, ["answer__document"], 0),
+    ],
+)
+def test_invalidate_visibility_of_answer_family(
+    db,
+    shared_cache,
+    mocker,
+    answer_document_factory,
+    django_assert_num_queries,
+    model,
+    select_related,
+    num_queries,
+):
+    answer_document = answer_document_factory()
+    family_id = answer_document.answer.document.family_id
+    pk = answer_document.answer_id if model is Answer else answer_document.pk
+    queryset = model.objects.all()
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    instance = queryset.get(pk=pk)
+    invalidate = mocker.patch("caluma.caluma_form.models.invalidate_visibility")
+
+    # the family of a row document is looked up through its answer
+    with django_assert_num_queries(num_queries):
+        invalidate_answer_visibility(model, instance)
+
+    invalidate.assert_called_once_with(family_id)
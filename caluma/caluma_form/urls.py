@@ -0,0 +1,7 @@
+from django.conf.urls import url
+
+from .views import DocumentExportView
+
+urlpatterns = [
+    url(r"^documents$", DocumentExportView.as_view(), name="export-documents")
+]
@@ -2,14 +2,17 @@ import sys
 from collections import defaultdict
 from logging import getLogger
 
+from django.core.cache import cache
+from django.db import connection
 from django_filters.constants import EMPTY_VALUES
 from rest_framework import exceptions
 
 from caluma.caluma_data_source.data_source_handlers import get_data_sources
 
+from ..caluma_core.cache import is_shared_cache
 from . import jexl, structure
 from .format_validators import get_format_validators
-from .models import DynamicOption, Question
+from .models import Document, DynamicOption, Question, get_visibility_cache_keys
 
 log = getLogger()
 
@@ -220,6 +223,39 @@ class DocumentValidator:
         )
         return intermediate_context
 
+    def visible_questions_of_families(self, family_ids):
+        """Return dict of family id to visible question slugs of the family.
+
+        With a cache shared between processes, results are cached per family
+        and version of its answers, and the ones not cached are computed
+        together. Results computed within a transaction are not cached, as
+        they may depend on data which is rolled back.
+        """
+        if not is_shared_cache():
+            return self._compute_visible_questions(family_ids)
+
+        cache_keys = get_visibility_cache_keys(set(family_ids))
+        cached = cache.get_many(cache_keys.values())
+        visible = {
+            family_id: cached[key]
+            for family_id, key in cache_keys.items()
+            if key in cached
+        }
+
+        computed = self._compute_visible_questions(cache_keys.keys() - visible.keys())
+        if not connection.in_atomic_block:
+            cache.set_many({cache_keys[pk]: slugs for pk, slugs in computed.items()})
+
+        return {**visible, **computed}
+
+    def _compute_visible_questions(self, family_ids):
+        documents = (
+            Document.objects.filter(pk__in=family_ids)
+            .select_related("form")
+            .prefetch_related("answers", "form__questions")
+        )
+        return {document.pk: self.visible_questions(document) for document in documents}
+
     def visible_questions(self, document, validation_context=None):
         """Evaluate the visibility of the questions for the given context.
 
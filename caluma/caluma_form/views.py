@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views import View
+from graphene_django.views import HttpError
+
+from caluma.caluma_user.views import AuthenticationMixin, HttpResponseUnauthorized
+
+from . import models, schema
+from .export import CONTENT_TYPES, DocumentExport
+
+
+class DocumentExportView(AuthenticationMixin, View):
+    """Stream all visible documents of a form with their visible answers.
+
+    The form is passed as `form` query parameter, the output format as `format`
+    (`csv` or `jsonl`, default `csv`).
+    """
+
+    def get(self, request):
+        try:
+            request.user = self.get_user(request)
+        except HttpError as e:
+            return e.response
+
+        if not request.user.is_authenticated:
+            return HttpResponseUnauthorized("Authentication required")
+
+        export_format = request.GET.get("format", "csv")
+        if export_format not in CONTENT_TYPES:
+            return HttpResponseBadRequest(f"Unsupported format {export_format}")
+
+        # visibility classes expect the resolve info of a GraphQL request
+        info = SimpleNamespace(context=request)
+        form = schema.Form.get_queryset(
+            models.Form.objects.filter(pk=request.GET.get("form")), info
+        ).first()
+        if form is None:
+            raise Http404("Form not found")
+
+        documents = schema.Document.get_queryset(models.Document.objects.all(), info)
+        answers = schema.Answer.get_queryset(models.Answer.objects.all(), info)
+        export = DocumentExport(form, documents, answers)
+
+        response = StreamingHttpResponse(
+            export.lines(export_format), content_type=CONTENT_TYPES[export_format]
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{form.pk}.{export_format}"'
+        return response
@@ -20,6 +20,12 @@ def test_authenticated_visibility(db, info_fixture, size, request, history_mock)
     queryset = Authenticated().filter_queryset(CustomNode, FakeModel.objects, info)
     assert queryset.count() == size
 
+    # the former queryset filter is kept for subclasses calling it
+    queryset = Authenticated().filter_queryset_for_all(
+        CustomNode, FakeModel.objects, info
+    )
+    assert queryset.count() == size
+
 
 @pytest.mark.parametrize("group,size", [("unknown", 0), ("group", 1)])
 def test_created_by_group_visibility(
@@ -38,3 +44,8 @@ def test_created_by_group_visibility(
         CustomNode, FakeModel.objects, admin_info
     )
     assert queryset.count() == size
+
+    queryset = CreatedByGroup().filter_queryset_for_all(
+        CustomNode, FakeModel.objects, admin_info
+    )
+    assert queryset.count() == size
@@ -18,7 +18,9 @@ class HttpResponseUnauthorized(HttpResponse):
     status_code = 401
 
 
-class AuthenticationGraphQLView(GraphQLView):
+class AuthenticationMixin:
+    """Resolve the user of a request from its OIDC bearer token."""
+
     def get_bearer_token(self, request):
         auth = get_authorization_header(request).split()
         header_prefix = "Bearer"
@@ -117,6 +119,8 @@ class AuthenticationGraphQLView(GraphQLView):
                 response.status_code = internal_exception.response.status_code
                 raise HttpError(response, message=str(internal_exception))
 
+
+class AuthenticationGraphQLView(AuthenticationMixin, GraphQLView):
     def dispatch(self, request, *args, **kwargs):
         try:
             request.user = self.get_user(request)
@@ -1,21 +1,29 @@
+from django.db.models import Q
+
 from ..caluma_core.types import Node
-from ..caluma_core.visibilities import BaseVisibility, filter_queryset_for
+from ..caluma_core.visibilities import BaseVisibility, predicate_for
 
 
 class Authenticated(BaseVisibility):
     """Only allow authenticated users to read nodes."""
 
-    @filter_queryset_for(Node)
-    def filter_queryset_for_all(self, node, queryset, info):
+    @predicate_for(Node)
+    def predicate_for_all(self, node, queryset, info):
         if info.context.user.is_authenticated:
-            return queryset
-        return queryset.none()
+            return Q()
+        return Q(pk__in=[])
+
+    def filter_queryset_for_all(self, node, queryset, info):
+        return queryset.filter(self.predicate_for_all(node, queryset, info))
 
 
 class CreatedByGroup(BaseVisibility):
     """User may only read nodes of created by group it belongs to."""
 
-    @filter_queryset_for(Node)
-    def filter_queryset_for_all(self, node, queryset, info):
+    @predicate_for(Node)
+    def predicate_for_all(self, node, queryset, info):
         groups = info.context.user.groups
-        return queryset.filter(created_by_group__in=groups)
+        return Q(created_by_group__in=groups)
+
+    def filter_queryset_for_all(self, node, queryset, info):
+        return queryset.filter(self.predicate_for_all(node, queryset, info))
@@ -1,4 +1,7 @@
-from typing import Optional
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from simple_history.utils import bulk_create_with_history
 
 from caluma.caluma_form.models import Form
 from caluma.caluma_user.models import BaseUser
@@ -39,6 +42,48 @@ def start_case(
     return domain_logic.StartCaseLogic.post_start(case, user, parent_work_item)
 
 
+@transaction.atomic
+def start_cases(
+    workflow: models.Workflow, user: BaseUser, cases: Iterable[dict]
+) -> List[models.Case]:
+    """
+    Start multiple cases of a given workflow (just like `start_case`).
+
+    Each item of `cases` holds the arguments `start_case` takes besides the
+    workflow and the user. The cases, their documents and work items are
+    created with one batch of inserts per model.
+
+    >>> start_cases(
+    ...     workflow=Workflow.objects.get(pk="my-wf"),
+    ...     user=AnonymousUser(),
+    ...     cases=[{"form": Form.objects.get(pk="my-form"), "meta": {"id": 1}}],
+    ... )
+    [<Case: Case object (some-uuid)>]
+    """
+    allowed_forms = (
+        None
+        if workflow.allow_all_forms
+        else set(workflow.allow_forms.values_list("pk", flat=True))
+    )
+    data_list = [
+        domain_logic.StartCaseLogic.validate_for_start(
+            {"workflow": workflow, "form": None, "parent_work_item": None, **data},
+            allowed_forms,
+        )
+        for data in cases
+    ]
+
+    validated_data_list = domain_logic.StartCaseLogic.pre_start_many(data_list, user)
+    parent_work_items = [data["parent_work_item"] for data in validated_data_list]
+
+    cases = bulk_create_with_history(
+        [models.Case(**validated_data) for validated_data in validated_data_list],
+        models.Case,
+    )
+
+    return domain_logic.StartCaseLogic.post_start_many(cases, user, parent_work_items)
+
+
 def complete_work_item(work_item: models.WorkItem, user: BaseUser) -> models.WorkItem:
     """
     Complete a work item (just like `completeWorkItem`).
@@ -60,6 +105,34 @@ def complete_work_item(work_item: models.WorkItem, user: BaseUser) -> models.Wor
     return work_item
 
 
+@transaction.atomic
+def complete_work_items(
+    work_items: Iterable[models.WorkItem], user: BaseUser
+) -> List[models.WorkItem]:
+    """
+    Complete multiple work items (just like `complete_work_item`).
+
+    The work items are closed with one query and the work items following
+    them are created in one batch. Work items awaited by the same flow
+    continue their case only once.
+
+    >>> complete_work_items(
+    ...     work_items=models.WorkItem.objects.filter(task="review"),
+    ...     user=AnonymousUser()
+    ... )
+    [<WorkItem: WorkItem object (some-uuid)>, ...]
+    """
+    work_items = list(work_items)
+    for work_item in work_items:
+        domain_logic.CompleteWorkItemLogic.validate_for_complete(work_item, user)
+
+    domain_logic.close_work_items(
+        work_items, domain_logic.CompleteWorkItemLogic.pre_complete({}, user)
+    )
+
+    return domain_logic.CompleteWorkItemLogic.post_complete_many(work_items, user)
+
+
 def skip_work_item(work_item: models.WorkItem, user: BaseUser) -> models.WorkItem:
     """
     Skip a work item (just like `SkipWorkItem`).
@@ -79,3 +152,61 @@ def skip_work_item(work_item: models.WorkItem, user: BaseUser) -> models.WorkIte
     domain_logic.SkipWorkItemLogic.post_skip(work_item, user)
 
     return work_item
+
+
+@transaction.atomic
+def skip_work_items(
+    work_items: Iterable[models.WorkItem], user: BaseUser
+) -> List[models.WorkItem]:
+    """
+    Skip multiple work items (just like `skip_work_item`).
+
+    >>> skip_work_items(
+    ...     work_items=models.WorkItem.objects.filter(task="review"),
+    ...     user=AnonymousUser()
+    ... )
+    [<WorkItem: WorkItem object (some-uuid)>, ...]
+    """
+    work_items = list(work_items)
+    for work_item in work_items:
+        domain_logic.SkipWorkItemLogic.validate_for_skip(work_item)
+
+    domain_logic.close_work_items(
+        work_items, domain_logic.SkipWorkItemLogic.pre_skip({}, user)
+    )
+
+    return domain_logic.SkipWorkItemLogic.post_skip_many(work_items, user)
+
+
+@transaction.atomic
+def cancel_cases(cases: Iterable[models.Case], user: BaseUser) -> List[models.Case]:
+    """
+    Cancel cases and their open work items (just like `cancelCase`).
+
+    All cases and work items are updated with one query each, so large
+    numbers of cases can be canceled at once.
+
+    >>> cancel_cases(
+    ...     cases=models.Case.objects.filter(workflow="my-wf"),
+    ...     user=AnonymousUser()
+    ... )
+    [<Case: Case object (some-uuid)>, ...]
+    """
+    cases = list(cases)
+    for case in cases:
+        domain_logic.CancelCaseLogic.validate_for_cancel(case)
+
+    validated_data = domain_logic.CancelCaseLogic.pre_cancel({}, user)
+    validated_data["modified_at"] = validated_data["closed_at"]
+    models.Case.objects.filter(pk__in=[case.pk for case in cases]).update(
+        **validated_data
+    )
+
+    for case in cases:
+        for field, value in validated_data.items():
+            setattr(case, field, value)
+    models.Case.history.bulk_history_create(cases, update=True)
+
+    return domain_logic.CancelCaseLogic.post_cancel(
+        cases, user, sender="case_post_cancel"
+    )
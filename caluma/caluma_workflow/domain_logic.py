@@ -1,3 +1,6 @@
+from collections import defaultdict
+from itertools import chain
+
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
@@ -5,7 +8,26 @@ from caluma.caluma_core.events import send_event
 
 from ..caluma_form.models import Document
 from . import events, models, utils, validators
-from .jexl import FlowJexl
+
+
+def close_work_items(work_items, validated_data):
+    """Update given work items with one query and write their history in bulk."""
+    validated_data["modified_at"] = validated_data["closed_at"]
+    models.WorkItem.objects.filter(
+        pk__in=[work_item.pk for work_item in work_items]
+    ).update(**validated_data)
+
+    for work_item in work_items:
+        for field, value in validated_data.items():
+            setattr(work_item, field, value)
+    models.WorkItem.history.bulk_history_create(work_items, update=True)
+
+
+def send_batch_events(sender, batches):
+    """Send batched events of an operation, except those without any objects."""
+    for event, kwargs in batches:
+        if all(kwargs.values()):
+            send_event(event, sender=sender, **kwargs)
 
 
 class StartCaseLogic:
@@ -16,19 +38,27 @@ class StartCaseLogic:
     for case creation is split in three parts (`validate_for_start`,
     `pre_start` and `post_start`) so that in between the appropriate create
     method can be called (`super().create(...)` for the serializer and
-    `Case.objects.create(...) for the python API`).
+    `Case.objects.create(...) for the python API`). The `*_many` variants
+    handle a batch of cases at once.
     """
 
     @staticmethod
-    def validate_for_start(data):
+    def validate_for_start(data, allowed_forms=None):
+        """Validate data of a case to start.
+
+        `allowed_forms` may hold the slugs of the forms allowed by the
+        workflow, so they don't need to be looked up for each case of a batch.
+        """
         form = data.get("form")
         workflow = data.get("workflow")
 
-        if form:
-            if (
-                not workflow.allow_all_forms
-                and not workflow.allow_forms.filter(pk=form.pk).exists()
-            ):
+        if form and not workflow.allow_all_forms:
+            if allowed_forms is not None:
+                allowed = form.pk in allowed_forms
+            else:
+                allowed = workflow.allow_forms.filter(pk=form.pk).exists()
+
+            if not allowed:
                 raise ValidationError(
                     f"Workflow {workflow.pk} does not allow to start case with form {form.pk}"
                 )
@@ -37,61 +67,89 @@ class StartCaseLogic:
 
     @staticmethod
     def pre_start(validated_data, user):
-        parent_work_item = validated_data.get("parent_work_item")
-        validated_data["status"] = models.Case.STATUS_RUNNING
+        return StartCaseLogic.pre_start_many([validated_data], user)[0]
 
-        form = validated_data.pop("form", None)
-        if form:
-            validated_data["document"] = Document.objects.create(
-                form=form, created_by_user=user.username, created_by_group=user.group
-            )
+    @staticmethod
+    def pre_start_many(validated_data_list, user):
+        documents = []
+        for validated_data in validated_data_list:
+            validated_data["status"] = models.Case.STATUS_RUNNING
+
+            form = validated_data.pop("form", None)
+            if form:
+                validated_data["document"] = Document(
+                    form=form,
+                    created_by_user=user.username,
+                    created_by_group=user.group,
+                )
+                documents.append(validated_data["document"])
 
-        if parent_work_item:
-            case = parent_work_item.case
-            while hasattr(case, "parent_work_item"):
-                case = case.parent_work_item.case
-            validated_data["family"] = case
+        # child cases belong to the family of the root case of their parent
+        family_roots = models.get_case_family_roots(
+            validated_data["parent_work_item"].case_id
+            for validated_data in validated_data_list
+            if validated_data.get("parent_work_item")
+        )
+        for validated_data in validated_data_list:
+            parent_work_item = validated_data.get("parent_work_item")
+            if parent_work_item:
+                validated_data["family_id"] = family_roots[parent_work_item.case_id]
 
-        return validated_data
+        Document.objects.bulk_create_documents(documents)
+        return validated_data_list
 
     @staticmethod
     def post_start(case, user, parent_work_item):
-        # Django doesn't save reverse one-to-one relationships automatically:
-        # https://code.djangoproject.com/ticket/18638
-        if parent_work_item:
-            parent_work_item.child_case = case
-            parent_work_item.save()
+        return StartCaseLogic.post_start_many([case], user, [parent_work_item])[0]
 
-        workflow = case.workflow
-        tasks = workflow.start_tasks.all()
+    @staticmethod
+    def post_start_many(cases, user, parent_work_items):
+        """Create the work items of the start tasks of given cases.
+
+        Start tasks are looked up once per workflow and group jexl once per
+        context. Events are sent after all work items have been created.
+        """
+        start_tasks = {}
+        evaluator = utils.GroupJexlEvaluator()
+        work_items = defaultdict(list)
+        for case, parent_work_item in zip(cases, parent_work_items):
+            # Django doesn't save reverse one-to-one relationships automatically:
+            # https://code.djangoproject.com/ticket/18638
+            if parent_work_item:
+                parent_work_item.child_case = case
+                parent_work_item.save()
+
+            if case.workflow_id not in start_tasks:
+                start_tasks[case.workflow_id] = list(case.workflow.start_tasks.all())
+
+            work_items[case.pk] = utils.build_work_items(
+                start_tasks[case.workflow_id], case, user, evaluator=evaluator
+            )
 
-        work_items = utils.bulk_create_work_items(tasks, case, user)
+        created_work_items = list(chain(*work_items.values()))
+        utils.save_work_items(created_work_items, cases)
 
-        send_event(events.created_case, sender="case_post_create", case=case)
-        for work_item in work_items:  # pragma: no cover
-            send_event(
-                events.created_work_item, sender="case_post_create", work_item=work_item
-            )
+        for case in cases:
+            send_event(events.created_case, sender="case_post_create", case=case)
+            for work_item in work_items[case.pk]:  # pragma: no cover
+                send_event(
+                    events.created_work_item,
+                    sender="case_post_create",
+                    work_item=work_item,
+                )
 
-        return case
+        send_batch_events(
+            "case_post_create",
+            [
+                (events.created_cases, {"cases": cases}),
+                (events.created_work_items, {"work_items": created_work_items}),
+            ],
+        )
 
+        return cases
 
-class CompleteWorkItemLogic:
-    @staticmethod
-    def _can_continue(work_item, task):
-        # If a "multiple instance" task has running siblings, the task is not completed
-        if task.is_multiple_instance:
-            return not work_item.case.work_items.filter(
-                task=task, status=models.WorkItem.STATUS_READY
-            ).exists()
-        return work_item.case.work_items.filter(
-            task=task,
-            status__in=(
-                models.WorkItem.STATUS_COMPLETED,
-                models.WorkItem.STATUS_SKIPPED,
-            ),
-        ).exists()
 
+class CompleteWorkItemLogic:
     @staticmethod
     def validate_for_complete(work_item, user):
         validators.WorkItemValidator().validate(
@@ -114,55 +172,159 @@ class CompleteWorkItemLogic:
 
     @staticmethod
     def post_complete(work_item, user):
-        case = work_item.case
-
-        if not CompleteWorkItemLogic._can_continue(work_item, work_item.task):
-            return work_item
+        return CompleteWorkItemLogic.post_complete_many([work_item], user)[0]
 
-        flow = models.Flow.objects.filter(task_flows__task=work_item.task_id).first()
-        flow_referenced_tasks = models.Task.objects.filter(task_flows__flow=flow)
+    @staticmethod
+    def _continues(work_item, awaited_tasks, key, continued):
+        """Return whether given work item is done and continues its case.
 
-        all_complete = all(
-            CompleteWorkItemLogic._can_continue(work_item, task)
-            for task in flow_referenced_tasks
+        A case is only continued once per `key`, which is added to `continued`.
+        """
+        continuable_tasks = models.get_continuable_tasks(
+            work_item.case, {work_item.task_id, *awaited_tasks}
         )
+        if work_item.task_id not in continuable_tasks:
+            return False, False
 
-        if flow and all_complete:
-            jexl = FlowJexl()
-            result = jexl.evaluate(flow.next)
-            if not isinstance(result, list):
-                result = [result]
+        if not continuable_tasks.issuperset(awaited_tasks) or key in continued:
+            return True, False
 
-            tasks = models.Task.objects.filter(pk__in=result)
+        continued.add(key)
+        return True, True
 
-            created_work_items = utils.bulk_create_work_items(
-                tasks, case, user, work_item
+    @staticmethod
+    def _continue_flows(work_items, continued, done, graphs):
+        """Return continued flows and work items of end tasks.
+
+        Done work items with a flow are added to `done`. Work items without a
+        flow are returned with the end tasks of their workflow. The flows of
+        each workflow are compiled once and kept in `graphs`, as they are only
+        cached with a shared cache.
+        """
+        continuations = []
+        end_work_items = []
+        for work_item in work_items:
+            workflow_id = work_item.case.workflow_id
+            if workflow_id not in graphs:
+                graphs[workflow_id] = models.get_workflow_graph(workflow_id)
+            graph = graphs[workflow_id]
+            flow = graph["flows"].get(work_item.task_id)
+            if not flow:
+                # without a flow, the case is completed once all end tasks are done
+                end_work_items.append((work_item, graph["end_tasks"]))
+                continue
+
+            key = (work_item.case_id, tuple(sorted(flow["predecessors"])))
+            is_done, continues = CompleteWorkItemLogic._continues(
+                work_item, flow["predecessors"], key, continued
             )
+            if is_done:
+                done.add(work_item.pk)
+            if continues:
+                continuations.append((flow["next"], work_item.case, work_item))
 
-            for created_work_item in created_work_items:  # pragma: no cover
-                send_event(
-                    events.created_work_item,
-                    sender="post_complete_work_item",
-                    work_item=created_work_item,
+        return continuations, end_work_items
+
+    @staticmethod
+    def _create_continuations(continuations, user):
+        """Create the next work items of given continued flows in one batch."""
+        if not continuations:
+            return []
+
+        tasks = models.Task.objects.in_bulk(
+            {task for next_tasks, _, _ in continuations for task in next_tasks}
+        )
+        evaluator = utils.GroupJexlEvaluator()
+        created_work_items = []
+        for next_tasks, case, work_item in continuations:
+            created_work_items.extend(
+                utils.build_work_items(
+                    [tasks[task] for task in next_tasks if task in tasks],
+                    case,
+                    user,
+                    work_item,
+                    evaluator,
                 )
-        elif not flow and all_complete:
-            # no more tasks, mark case as complete
-            case.status = models.Case.STATUS_COMPLETED
-            case.closed_at = timezone.now()
-            case.closed_by_user = user.username
-            case.closed_by_group = user.group
-            case.save()
+            )
+
+        return utils.save_work_items(
+            created_work_items, [case for _, case, _ in continuations]
+        )
+
+    @staticmethod
+    def _complete_case(case, user):
+        # no more tasks, mark case as complete
+        case.status = models.Case.STATUS_COMPLETED
+        case.closed_at = timezone.now()
+        case.closed_by_user = user.username
+        case.closed_by_group = user.group
+        case.save()
+        return case
+
+    @staticmethod
+    def post_complete_many(work_items, user):
+        """Continue the cases of given completed work items.
+
+        A flow is only continued once per case, so completing work items
+        awaited by the same flow together has the same result as completing
+        them one after another. The end tasks of the cases are only checked
+        after the work items of the continued flows have been created, as
+        those may still need to be done. Events are sent after all work items
+        of the continued flows have been created.
+        """
+        continued = set()
+        done = set()
+        continuations, end_work_items = CompleteWorkItemLogic._continue_flows(
+            work_items, continued, done, {}
+        )
+        created_work_items = CompleteWorkItemLogic._create_continuations(
+            continuations, user
+        )
+
+        completed_cases = []
+        for work_item, end_tasks in end_work_items:
+            case = work_item.case
+            is_done, continues = CompleteWorkItemLogic._continues(
+                work_item, end_tasks, (case.pk, None), continued
+            )
+            if is_done:
+                done.add(work_item.pk)
+            if continues:
+                completed_cases.append(CompleteWorkItemLogic._complete_case(case, user))
+
+        completed_work_items = [
+            work_item for work_item in work_items if work_item.pk in done
+        ]
+
+        for created_work_item in created_work_items:  # pragma: no cover
+            send_event(
+                events.created_work_item,
+                sender="post_complete_work_item",
+                work_item=created_work_item,
+            )
+
+        for case in completed_cases:
             send_event(
                 events.completed_case, sender="post_complete_work_item", case=case
             )
 
-        send_event(
-            events.completed_work_item,
-            sender="post_complete_work_item",
-            work_item=work_item,
+        for work_item in completed_work_items:
+            send_event(
+                events.completed_work_item,
+                sender="post_complete_work_item",
+                work_item=work_item,
+            )
+
+        send_batch_events(
+            "post_complete_work_item",
+            [
+                (events.created_work_items, {"work_items": created_work_items}),
+                (events.completed_cases, {"cases": completed_cases}),
+                (events.completed_work_items, {"work_items": completed_work_items}),
+            ],
         )
 
-        return work_item
+        return work_items
 
 
 class SkipWorkItemLogic:
@@ -181,10 +343,82 @@ class SkipWorkItemLogic:
 
     @staticmethod
     def post_skip(work_item, user):
-        work_item = CompleteWorkItemLogic.post_complete(work_item, user)
+        return SkipWorkItemLogic.post_skip_many([work_item], user)[0]
+
+    @staticmethod
+    def post_skip_many(work_items, user):
+        work_items = CompleteWorkItemLogic.post_complete_many(work_items, user)
+
+        for work_item in work_items:
+            send_event(
+                events.skipped_work_item,
+                sender="post_skip_work_item",
+                work_item=work_item,
+            )
+
+        send_batch_events(
+            "post_skip_work_item",
+            [(events.skipped_work_items, {"work_items": work_items})],
+        )
+
+        return work_items
+
+
+class CancelCaseLogic:
+    """
+    Shared domain logic for canceling cases.
+
+    Used in the `cancelCase` mutation and in the `cancel_cases` API.
+    """
+
+    @staticmethod
+    def validate_for_cancel(case):
+        if case.status != models.Case.STATUS_RUNNING:
+            raise ValidationError("Only running cases can be canceled.")
+
+    @staticmethod
+    def pre_cancel(validated_data, user):
+        validated_data["status"] = models.Case.STATUS_CANCELED
+        validated_data["closed_at"] = timezone.now()
+        validated_data["closed_by_user"] = user.username
+        validated_data["closed_by_group"] = user.group
+
+        return validated_data
+
+    @staticmethod
+    def post_cancel(cases, user, sender):
+        """Cancel all open work items of the given canceled cases.
+
+        The work items are updated with a single query and their history is
+        written in bulk. Events are only sent after all work items have been
+        canceled.
+        """
+        work_items = list(
+            models.WorkItem.objects.filter(case__in=cases).exclude(
+                status__in=[
+                    models.WorkItem.STATUS_COMPLETED,
+                    models.WorkItem.STATUS_CANCELED,
+                ]
+            )
+        )
+
+        if work_items:
+            validated_data = CancelCaseLogic.pre_cancel({}, user)
+            validated_data["status"] = models.WorkItem.STATUS_CANCELED
+            close_work_items(work_items, validated_data)
+
+        for work_item in work_items:
+            send_event(events.cancelled_work_item, sender=sender, work_item=work_item)
+
+        for case in cases:
+            send_event(events.cancelled_case, sender=sender, case=case)
 
-        send_event(
-            events.skipped_work_item, sender="post_skip_work_item", work_item=work_item
+        send_batch_events(
+            sender,
+            [
+                (events.cancelled_work_items, {"work_items": work_items}),
+                (events.cancelled_cases, {"cases": cases}),
+            ],
         )
 
-        return work_item
+        return cases
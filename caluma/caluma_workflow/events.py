@@ -7,3 +7,12 @@ skipped_work_item = Signal(providing_args=["work_item"])
 completed_case = Signal(providing_args=["case"])
 created_case = Signal(providing_args=["case"])
 cancelled_case = Signal(providing_args=["case"])
+
+# sent once per operation with all affected objects, next to the events above
+created_work_items = Signal(providing_args=["work_items"])
+cancelled_work_items = Signal(providing_args=["work_items"])
+completed_work_items = Signal(providing_args=["work_items"])
+skipped_work_items = Signal(providing_args=["work_items"])
+completed_cases = Signal(providing_args=["cases"])
+created_cases = Signal(providing_args=["cases"])
+cancelled_cases = Signal(providing_args=["cases"])
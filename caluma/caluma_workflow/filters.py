@@ -1,8 +1,17 @@
+from functools import reduce
+
 import graphene
-from django.db.models import OuterRef, Subquery
+from django.core import exceptions
+from django.db.models import F, Q
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import Filter
+from graphene import InputObjectType
+from graphene_django.forms.converter import convert_form_field
+from graphene_django.registry import get_global_registry
 
 from ..caluma_core.filters import (
     CharFilter,
+    CompositeFieldClass,
     FilterSet,
     GlobalIDFilter,
     JSONValueFilter,
@@ -14,9 +23,9 @@ from ..caluma_core.filters import (
     generate_list_filter_class,
 )
 from ..caluma_core.ordering import AttributeOrderingFactory, MetaFieldOrdering
+from ..caluma_core.relay import extract_global_id
 from ..caluma_form.filters import HasAnswerFilter, SearchAnswersFilter
-from ..caluma_form.models import Answer, Question
-from ..caluma_form.ordering import AnswerValueOrdering
+from ..caluma_form.ordering import AnswerValueOrdering, answer_value_subquery
 from . import models
 
 
@@ -103,29 +112,10 @@ class CaseFilterSet(MetaFilterSet):
         order_by = "-order_value" if question_slug.startswith("-") else "order_value"
         question_slug = question_slug.lstrip("-")
 
-        # Based on question type, set answer field to use for sorting
-        not_supported = (Question.TYPE_TABLE,)
-        question = Question.objects.get(slug=question_slug)
-        answer_value = "value"
-        if question.type in not_supported:
-            raise RuntimeError(
-                f'Questions with type "{question.type}" are not supported '
-                f'by "filterOrderByQuestionAnswerValue"'
-            )
-        elif question.type == Question.TYPE_DATE:
-            answer_value = "date"
-        elif question.type == Question.TYPE_FILE:
-            answer_value = "file__name"
-
-        # Initialize subquery
-        answers = Answer.objects.filter(
-            question=question, document=OuterRef("document")
-        )
-
         # Annotate the cases in the queryset with the value of the answer of the given
         # question and order by it.
         return queryset.annotate(
-            order_value=Subquery(answers.values(answer_value)[:1])
+            order_value=answer_value_subquery(question_slug, "document")
         ).order_by(order_by)
 
     class Meta:
@@ -190,16 +180,119 @@ class TaskOrderSet(FilterSet):
         fields = ("meta", "attribute")
 
 
+class InboxFilterType(InputObjectType):
+    groups = graphene.List(
+        graphene.String,
+        description="Groups the work items are addressed to or controlled by.",
+    )
+    users = graphene.List(
+        graphene.String, description="Users the work items are assigned to."
+    )
+    after = graphene.ID(
+        description="Only return work items following this one in the inbox."
+    )
+
+
+class InboxFilterField(CompositeFieldClass):
+    pass
+
+
+class InboxFilter(Filter):
+    """
+    Filter work items addressed to, controlled by or assigned to given groups and users.
+
+    Work items are sorted by deadline, those without a deadline last. The next
+    page of an inbox is fetched by passing the last work item of the previous
+    page as `after`, which unlike offsets stays fast on large inboxes. As this
+    relies on the order of the inbox, `after` can't be combined with another
+    order, see `WorkItemFilterSet.filter_queryset`.
+    """
+
+    field_class = InboxFilterField
+
+    def _after_predicate(self, after):
+        after_pk = extract_global_id(after)
+        try:
+            deadline = (
+                models.WorkItem.objects.filter(pk=after_pk)
+                .values_list("deadline", flat=True)
+                .get()
+            )
+        except (models.WorkItem.DoesNotExist, exceptions.ValidationError):
+            raise exceptions.ValidationError(f"Work item {after} does not exist.")
+
+        after_id = Q(pk__gt=after_pk)
+        if deadline is None:
+            return Q(deadline__isnull=True) & after_id
+
+        return (
+            Q(deadline__gt=deadline)
+            | Q(deadline=deadline) & after_id
+            | Q(deadline__isnull=True)
+        )
+
+    def get_predicate(self, qs, value):
+        predicates = [
+            Q(**{f"{field}__overlap": value[key]})
+            for field, key in [
+                ("addressed_groups", "groups"),
+                ("controlling_groups", "groups"),
+                ("assigned_users", "users"),
+            ]
+            if value.get(key)
+        ]
+        predicate = reduce(lambda a, b: a | b, predicates, Q(pk__in=[]))
+        if value.get("after"):
+            predicate &= self._after_predicate(value["after"])
+        return predicate
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+
+        return qs.filter(self.get_predicate(qs, value)).order_by(
+            F("deadline").asc(nulls_last=True), "pk"
+        )
+
+    @staticmethod
+    @convert_form_field.register(InboxFilterField)
+    def convert_inbox_field(field):
+        registry = get_global_registry()
+        converted = registry.get_converted_field(field)
+        if converted:
+            return converted
+
+        converted = InboxFilterType()
+        registry.register_converted_field(field, converted)
+        return converted
+
+
 class WorkItemFilterSet(MetaFilterSet):
     order_by = OrderingFilter(label="WorkItemOrdering", fields=("status", "deadline"))
     addressed_groups = StringListFilter(lookup_expr="overlap")
     controlling_groups = StringListFilter(lookup_expr="overlap")
     assigned_users = StringListFilter(lookup_expr="overlap")
+    inbox = InboxFilter()
 
     document_has_answer = HasAnswerFilter(document_id="document__pk")
     case_document_has_answer = HasAnswerFilter(document_id="case__document__pk")
     case_meta_value = JSONValueFilter(field_name="case__meta")
 
+    def filter_queryset(self, queryset):
+        data = self.form.cleaned_data
+        inbox_filters = [
+            data.get("inbox"),
+            *(flt.get("inbox") for flt in data.get("filter") or []),
+        ]
+        if any(inbox and inbox.get("after") for inbox in inbox_filters) and (
+            data.get("order") or data.get("order_by")
+        ):
+            raise exceptions.ValidationError(
+                "The `after` work item of an inbox cannot be combined with another order."
+            )
+
+        return super().filter_queryset(queryset)
+
     class Meta:
         model = models.WorkItem
         fields = (
@@ -4,7 +4,12 @@ from itertools import chain
 from pyjexl.analysis import ValidatingAnalyzer
 from pyjexl.evaluator import Context
 
-from ..caluma_core.jexl import JEXL, ExtractTransformSubjectAnalyzer
+from ..caluma_core.jexl import (
+    JEXL,
+    Cache,
+    ContextReferenceAnalyzer,
+    ExtractTransformSubjectAnalyzer,
+)
 
 
 class GroupValidatingAnalyzer(ValidatingAnalyzer):
@@ -59,12 +64,33 @@ class GroupJexl(JEXL):
     def validate(self, expression):
         return super().validate(expression, GroupValidatingAnalyzer)
 
+    # results of expressions which don't reference the context, or `None` if
+    # they do, as (is_constant, result) tuples per expression
+    constant_cache = Cache()
+
     def evaluate(self, expression, context=None):
         value = super().evaluate(expression, context)
         if isinstance(value, list) or value is None:
             return value
         return [value]
 
+    def fold_constant(self, expression):
+        """
+        Return (is_constant, result) tuple of given expression.
+
+        Expressions without references to `info` evaluate to the same groups
+        in any context, so they are evaluated only once per process.
+        """
+
+        def fold():
+            if any(self.analyze(expression, ContextReferenceAnalyzer)):
+                return False, None
+            return True, self.evaluate(expression, {})
+
+        is_constant, result = self.constant_cache.get_or_set(expression, fold)
+        # the cached result is shared, so callers get a copy they may change
+        return is_constant, list(result) if isinstance(result, list) else result
+
 
 class FlowJexl(JEXL):
     def __init__(self, **kwargs):
@@ -0,0 +1,88 @@
+# Generated by Django 2.2.13 on 2026-10-19 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POPULATE_GROUP_ACCESS = """
+INSERT INTO caluma_workflow_groupcaseaccess ("group", case_id)
+SELECT DISTINCT grp, wi.case_id
+FROM caluma_workflow_workitem wi, unnest(wi.addressed_groups) grp
+UNION
+SELECT DISTINCT grp, wi.child_case_id
+FROM caluma_workflow_workitem wi, unnest(wi.addressed_groups) grp
+WHERE wi.child_case_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO caluma_workflow_groupdocumentaccess ("group", family_id)
+SELECT DISTINCT grp, doc.family_id
+FROM caluma_workflow_workitem wi
+JOIN caluma_form_document doc ON doc.id = wi.document_id,
+unnest(wi.addressed_groups) grp
+UNION
+SELECT DISTINCT access."group", doc.family_id
+FROM caluma_workflow_case c
+JOIN caluma_form_document doc ON doc.id = c.document_id
+JOIN caluma_workflow_groupcaseaccess access ON access.case_id = c.id
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("caluma_form", "0034_fix_fk_lengths"),
+        ("caluma_workflow", "0022_workitem_name_description"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupDocumentAccess",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("group", models.CharField(max_length=150)),
+                (
+                    "family",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="caluma_form.Document",
+                    ),
+                ),
+            ],
+            options={"unique_together": {("group", "family")}},
+        ),
+        migrations.CreateModel(
+            name="GroupCaseAccess",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("group", models.CharField(max_length=150)),
+                (
+                    "case",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="caluma_workflow.Case",
+                    ),
+                ),
+            ],
+            options={"unique_together": {("group", "case")}},
+        ),
+        migrations.RunSQL(POPULATE_GROUP_ACCESS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.13 on 2026-10-19 14:37
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("caluma_workflow", "0023_group_access")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workitem",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["controlling_groups"], name="caluma_work_control_6ede39_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workitem",
+            index=models.Index(
+                fields=["status", "deadline"], name="caluma_work_status_785244_idx"
+            ),
+        ),
+    ]
@@ -1,14 +1,26 @@
+from collections import defaultdict
 from datetime import timedelta
 
 from django.contrib.postgres.fields import ArrayField, JSONField
 from django.contrib.postgres.indexes import GinIndex
-from django.db import models
-from django.db.models.signals import post_init, pre_save
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import Count, FilteredRelation, Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.utils import timezone
 from localized_fields.fields import LocalizedField
 
+from ..caluma_core.cache import is_shared_cache
 from ..caluma_core.models import ChoicesCharField, SlugModel, UUIDModel
+from ..caluma_form.models import Document
+from .jexl import FlowJexl
 
 
 class Task(SlugModel):
@@ -147,10 +159,78 @@ class Case(UUIDModel):
         null=True,
     )
 
+    def set_family(self, root_case):
+        """Set the family to the given root_case.
+
+        Apply the same to all child cases of the work items of this case,
+        recursively, with a single statement.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SET_CASE_FAMILY,
+                {"case": self.pk, "family": root_case.pk, "now": timezone.now()},
+            )
+            changed = [pk for pk, in cursor.fetchall()]
+
+        self.family = root_case
+        if changed:
+            Case.history.bulk_history_create(
+                Case.objects.filter(pk__in=changed), update=True
+            )
+
     class Meta:
         indexes = [GinIndex(fields=["meta"])]
 
 
+SET_CASE_FAMILY = """
+WITH RECURSIVE subtree(id) AS (
+    SELECT %(case)s::uuid
+    UNION
+    SELECT work_item.child_case_id
+    FROM subtree
+    JOIN caluma_workflow_workitem work_item ON work_item.case_id = subtree.id
+    WHERE work_item.child_case_id IS NOT NULL
+)
+UPDATE caluma_workflow_case
+SET family_id = %(family)s, modified_at = %(now)s
+WHERE id IN (SELECT id FROM subtree) AND family_id IS DISTINCT FROM %(family)s
+RETURNING id
+"""
+
+CASE_FAMILY_ROOTS = """
+WITH RECURSIVE ancestors(case_id, ancestor_id) AS (
+    SELECT id, id FROM caluma_workflow_case WHERE id = ANY(%(cases)s::uuid[])
+    UNION
+    SELECT ancestors.case_id, work_item.case_id
+    FROM ancestors
+    JOIN caluma_workflow_workitem work_item
+        ON work_item.child_case_id = ancestors.ancestor_id
+)
+SELECT case_id, ancestor_id
+FROM ancestors
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM caluma_workflow_workitem work_item
+    WHERE work_item.child_case_id = ancestors.ancestor_id
+)
+"""
+
+
+def get_case_family_roots(case_ids):
+    """Return dict of given case ids to the id of the root case of their family.
+
+    The root is found by following the parent work items up the case tree in
+    the database, instead of loading every ancestor.
+    """
+    case_ids = list({pk for pk in case_ids if pk is not None})
+    if not case_ids:
+        return {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(CASE_FAMILY_ROOTS, {"cases": case_ids})
+        return dict(cursor.fetchall())
+
+
 @receiver(post_init, sender=Case)
 def set_case_family(sender, instance, **kwargs):
     """
@@ -247,7 +327,9 @@ class WorkItem(UUIDModel):
         indexes = [
             GinIndex(fields=["addressed_groups"]),
             GinIndex(fields=["assigned_users"]),
+            GinIndex(fields=["controlling_groups"]),
             GinIndex(fields=["meta"]),
+            models.Index(fields=["status", "deadline"]),
         ]
 
 
@@ -262,3 +344,320 @@ def set_name_and_description(sender, instance, **kwargs):
         instance.name = instance.task.name
     if not any(instance.description.values()):
         instance.description = instance.task.description
+
+
+class GroupCaseAccess(models.Model):
+    """
+    Group which may access a case through an addressed work item.
+
+    This is derived data maintained by `update_group_access` and used by
+    visibilities to avoid scanning work items on every read.
+    """
+
+    group = models.CharField(max_length=150)
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ("group", "case")
+
+
+class GroupDocumentAccess(models.Model):
+    """
+    Group which may access a document family through a case or work item.
+
+    This is derived data maintained by `update_group_access`.
+    """
+
+    group = models.CharField(max_length=150)
+    family = models.ForeignKey(
+        "caluma_form.Document", on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        unique_together = ("group", "family")
+
+
+def _update_case_access(case_ids):
+    """Rebuild group access entries of given cases and return their families."""
+    work_items = WorkItem.objects.filter(
+        Q(case__in=case_ids) | Q(child_case__in=case_ids)
+    ).values_list("case_id", "child_case_id", "addressed_groups", "document__family")
+
+    case_groups = defaultdict(set)
+    families = set()
+    for case_id, child_case_id, groups, family_id in work_items:
+        for pk in (case_id, child_case_id):
+            if pk in case_ids:
+                case_groups[pk].update(groups)
+        if case_id in case_ids:
+            families.add(family_id)
+
+    cases = Case.objects.filter(pk__in=case_ids).values_list("document__family")
+    families.update(family_id for family_id, in cases)
+
+    GroupCaseAccess.objects.filter(case__in=case_ids).delete()
+    # ignore conflicts, as concurrent transactions may rebuild the same case
+    GroupCaseAccess.objects.bulk_create(
+        [
+            GroupCaseAccess(group=group, case_id=case_id)
+            for case_id, groups in case_groups.items()
+            for group in groups
+        ],
+        ignore_conflicts=True,
+    )
+    return families
+
+
+def _update_family_access(family_ids):
+    """
+    Rebuild group access entries of given document families.
+
+    The groups are collected from all work items and cases referencing a
+    family, not only from the cases being rebuilt, as a family may be
+    shared between cases.
+    """
+    family_groups = defaultdict(set)
+    work_items = WorkItem.objects.filter(document__family__in=family_ids).values_list(
+        "document__family", "addressed_groups"
+    )
+    for family_id, groups in work_items:
+        family_groups[family_id].update(groups)
+
+    case_access = GroupCaseAccess.objects.filter(
+        case__document__family__in=family_ids
+    ).values_list("case__document__family", "group")
+    for family_id, group in case_access:
+        family_groups[family_id].add(group)
+
+    GroupDocumentAccess.objects.filter(family__in=family_ids).delete()
+    GroupDocumentAccess.objects.bulk_create(
+        [
+            GroupDocumentAccess(group=group, family_id=family_id)
+            for family_id, groups in family_groups.items()
+            for group in groups
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def update_group_access(case_ids, detached_document_ids=()):
+    """
+    Rebuild group access entries of given cases.
+
+    A case is accessible to all groups its work items are addressed to,
+    as well as to the groups of the work item it is a child case of. The
+    document families of a case and of its work items are accessible to the
+    same groups.
+
+    Access to the families of `detached_document_ids` (documents which
+    are no longer attached to a case or work item) is rebuilt as well.
+    """
+    case_ids = {pk for pk in case_ids if pk is not None}
+    detached_document_ids = {pk for pk in detached_document_ids if pk is not None}
+
+    families = set()
+    if detached_document_ids:
+        families.update(
+            Document.objects.filter(pk__in=detached_document_ids).values_list(
+                "family", flat=True
+            )
+        )
+    if case_ids:
+        # case access needs to be rebuilt first, as family access is derived from it
+        families.update(_update_case_access(case_ids))
+
+    families.discard(None)
+    if families:
+        _update_family_access(families)
+
+
+def _work_item_access_state(instance):
+    # read from __dict__ so deferred fields are not loaded
+    fields = instance.__dict__
+    groups = fields.get("addressed_groups")
+    return (
+        None if groups is None else list(groups),
+        fields.get("child_case_id"),
+        fields.get("document_id"),
+    )
+
+
+@receiver(post_init, sender=WorkItem)
+def remember_work_item_access(sender, instance, **kwargs):
+    instance._access_state = _work_item_access_state(instance)
+
+
+@receiver(post_save, sender=WorkItem)
+def update_work_item_access(sender, instance, created, **kwargs):
+    """Keep group access in sync when addressing of a work item changes."""
+    state = _work_item_access_state(instance)
+    if created or state != instance._access_state:
+        _, old_child_case_id, old_document_id = instance._access_state
+        update_group_access(
+            [instance.case_id, instance.child_case_id, old_child_case_id],
+            [old_document_id] if old_document_id != instance.document_id else [],
+        )
+        instance._access_state = state
+
+
+@receiver(post_delete, sender=WorkItem)
+def delete_work_item_access(sender, instance, **kwargs):
+    update_group_access(
+        [instance.case_id, instance.child_case_id], [instance.document_id]
+    )
+
+
+@receiver(post_init, sender=Case)
+def remember_case_access(sender, instance, **kwargs):
+    instance._access_document_id = instance.document_id
+
+
+@receiver(post_save, sender=Case)
+def update_case_access(sender, instance, created, **kwargs):
+    """Keep group access in sync when the document of a case changes."""
+    if not created and instance.document_id != instance._access_document_id:
+        update_group_access([instance.pk], [instance._access_document_id])
+    instance._access_document_id = instance.document_id
+
+
+def _workflow_graph_cache_key(workflow_id):
+    return f"caluma_workflow.graph.{workflow_id}"
+
+
+def compile_workflow_graph(workflow_id):
+    """Return the flows between the tasks of a workflow.
+
+    `flows` maps each task having a flow to the tasks to create after it
+    (`next`) and to the tasks the flow waits for (`predecessors`), which are
+    all tasks sharing the flow. `end_tasks` are the tasks of the workflow
+    without a flow, which need to be done before a case is completed.
+
+    Flow expressions are evaluated without context, so their result doesn't
+    change until the flow does.
+    """
+    jexl = FlowJexl()
+    task_flows = list(
+        TaskFlow.objects.filter(workflow_id=workflow_id).values_list(
+            "task_id", "flow_id", "flow__next"
+        )
+    )
+
+    predecessors = defaultdict(list)
+    for task_id, flow_id, _ in task_flows:
+        predecessors[flow_id].append(task_id)
+
+    tasks = set(
+        Workflow.start_tasks.through.objects.filter(
+            workflow_id=workflow_id
+        ).values_list("task_id", flat=True)
+    )
+    next_tasks = {}
+    flows = {}
+    for task_id, flow_id, expression in task_flows:
+        if flow_id not in next_tasks:
+            result = jexl.evaluate(expression)
+            next_tasks[flow_id] = result if isinstance(result, list) else [result]
+            # static extraction also finds tasks of branches not evaluated
+            tasks.update(next_tasks[flow_id])
+            tasks.update(
+                task for task in jexl.extract_tasks(expression) if isinstance(task, str)
+            )
+
+        tasks.add(task_id)
+        flows[task_id] = {
+            "next": next_tasks[flow_id],
+            "predecessors": predecessors[flow_id],
+        }
+
+    return {"flows": flows, "end_tasks": sorted(tasks - flows.keys())}
+
+
+def get_workflow_graph(workflow_id):
+    """Return compiled flows of given workflow, see `compile_workflow_graph`.
+
+    The flows are only cached in a cache shared between processes, as other
+    processes couldn't invalidate them otherwise.
+    """
+    if not is_shared_cache():
+        return compile_workflow_graph(workflow_id)
+
+    key = _workflow_graph_cache_key(workflow_id)
+    graph = cache.get(key)
+    if graph is None:
+        graph = compile_workflow_graph(workflow_id)
+        cache.set(key, graph)
+
+    return graph
+
+
+def invalidate_workflow_graph(workflow_id):
+    """Drop compiled flows of given workflow.
+
+    They are dropped again on commit, so flows compiled from data of a
+    pending transaction are not used afterwards.
+    """
+    key = _workflow_graph_cache_key(workflow_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_continuable_tasks(case, task_ids):
+    """Return the given tasks which are done in given case.
+
+    A multiple instance task is done when no work item of it is ready anymore,
+    any other task when one of its work items has been completed or skipped.
+    """
+    tasks = (
+        Task.objects.filter(pk__in=task_ids)
+        .annotate(
+            case_work_items=FilteredRelation(
+                "work_items", condition=Q(work_items__case=case)
+            )
+        )
+        .annotate(
+            ready=Count(
+                "case_work_items",
+                filter=Q(case_work_items__status=WorkItem.STATUS_READY),
+            ),
+            done=Count(
+                "case_work_items",
+                filter=Q(
+                    case_work_items__status__in=(
+                        WorkItem.STATUS_COMPLETED,
+                        WorkItem.STATUS_SKIPPED,
+                    )
+                ),
+            ),
+        )
+        .values_list("pk", "is_multiple_instance", "ready", "done")
+    )
+
+    return {
+        pk
+        for pk, is_multiple_instance, ready, done in tasks
+        if (not ready if is_multiple_instance else done)
+    }
+
+
+@receiver(post_save, sender=TaskFlow)
+@receiver(post_delete, sender=TaskFlow)
+@receiver(post_save, sender=Workflow.start_tasks.through)
+@receiver(post_delete, sender=Workflow.start_tasks.through)
+def invalidate_task_flow_graph(sender, instance, **kwargs):
+    invalidate_workflow_graph(instance.workflow_id)
+
+
+@receiver(post_save, sender=Flow)
+def invalidate_flow_graph(sender, instance, created, **kwargs):
+    if not created:
+        for workflow_id in set(
+            instance.task_flows.values_list("workflow_id", flat=True)
+        ):
+            invalidate_workflow_graph(workflow_id)
+
+
+@receiver(m2m_changed, sender=Workflow.start_tasks.through)
+def invalidate_start_tasks_graph(sender, instance, action, **kwargs):
+    # start tasks have no reverse relation, so `instance` is always the workflow
+    if action.startswith("post_"):
+        invalidate_workflow_graph(instance.pk)
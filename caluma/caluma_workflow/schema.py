@@ -4,6 +4,7 @@ import graphene
 from django.db.models import Q
 from graphene import relay
 from graphene.types import generic
+from graphene_django.forms.converter import convert_form_field
 from graphene_django.rest_framework import serializer_converter
 
 from ..caluma_core.filters import (
@@ -13,6 +14,7 @@ from ..caluma_core.filters import (
 )
 from ..caluma_core.mutation import Mutation, UserDefinedPrimaryKeyMixin
 from ..caluma_core.types import CountableConnectionBase, DjangoObjectType, Node
+from ..caluma_form import models as form_models, schema as form_schema
 from . import filters, jexl, models, serializers
 
 
@@ -340,3 +342,37 @@ class Query(object):
             filters.WorkItemFilterSet, orderset_class=filters.WorkItemOrderSet
         ),
     )
+    case_answer_statistics = graphene.List(
+        graphene.NonNull(form_schema.AnswerStatistics),
+        required=True,
+        question=graphene.ID(required=True),
+        group_by=form_schema.AnswerStatisticsGroupBy(),
+        buckets=graphene.Int(),
+        filter=graphene.Argument(
+            lambda: convert_form_field(
+                CollectionFilterSetFactory(filters.CaseFilterSet, filters.CaseOrderSet)
+                .base_filters["filter"]
+                .field
+            )
+        ),
+        description=(
+            "Statistics of the answers to a question in the documents of all "
+            "cases matching `filter`, optionally grouped."
+        ),
+    )
+
+    def resolve_case_answer_statistics(
+        self, info, question, group_by=None, buckets=None, **kwargs
+    ):
+        filterset_class = CollectionFilterSetFactory(
+            filters.CaseFilterSet, filters.CaseOrderSet
+        )
+        cases = Case.get_queryset(models.Case.objects.all(), info)
+        cases = filterset_class(data=kwargs, queryset=cases, request=info.context).qs
+        documents = form_schema.Document.get_queryset(
+            form_models.Document.objects.filter(case__in=cases.values("pk")), info
+        )
+
+        return form_schema.answer_statistics(
+            info, documents, question, group_by, buckets
+        )
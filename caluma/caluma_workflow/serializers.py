@@ -1,7 +1,7 @@
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.utils import timezone
 from rest_framework import exceptions
+from rest_framework.fields import empty
 from rest_framework.serializers import CharField, ListField
 from simple_history.utils import bulk_create_with_history
 
@@ -22,6 +22,19 @@ class GroupJexlField(serializers.JexlField):
     def __init__(self, **kwargs):
         super().__init__(GroupJexl(), **kwargs)
 
+    def run_validation(self, data=empty):
+        value = super().run_validation(data)
+        if not value:
+            return value
+
+        try:
+            # fold expressions without context references right away, which
+            # also reports errors evaluating them on save
+            GroupJexl().fold_constant(value)
+        except Exception as e:
+            raise exceptions.ValidationError(f"{value} could not be evaluated: {e}")
+        return value
+
 
 class SaveWorkflowSerializer(serializers.ModelSerializer):
     class Meta:
@@ -83,6 +96,8 @@ class AddWorkflowFlowSerializer(serializers.ModelSerializer):
             models.TaskFlow(task=task, workflow=instance, flow=flow) for task in tasks
         ]
         bulk_create_with_history(task_flows, models.TaskFlow)
+        # bulk_create doesn't send post_save, hence invalidate explicitly
+        models.invalidate_workflow_graph(instance.pk)
 
         return instance
 
@@ -202,11 +217,13 @@ class SaveCaseSerializer(CaseSerializer):
     def create(self, validated_data):  # pragma: no cover
         instance = super().create(validated_data)
         self.send_event(events.created_case, case=instance)
+        self.send_event(events.created_cases, cases=[instance])
         return instance
 
     def update(self, instance, validated_data):
         instance = super().update(instance, validated_data)
         self.send_event(events.created_case, case=instance)
+        self.send_event(events.created_cases, cases=[instance])
         return instance
 
     class Meta(CaseSerializer.Meta):
@@ -225,10 +242,7 @@ class CancelCaseSerializer(SendEventSerializerMixin, serializers.ModelSerializer
             raise exceptions.ValidationError("Only running cases can be canceled.")
 
         user = self.context["request"].user
-        data["status"] = models.Case.STATUS_CANCELED
-        data["closed_at"] = timezone.now()
-        data["closed_by_user"] = user.username
-        data["closed_by_group"] = user.group
+        data = domain_logic.CancelCaseLogic.pre_cancel(data, user)
         return super().validate(data)
 
     @transaction.atomic
@@ -236,25 +250,9 @@ class CancelCaseSerializer(SendEventSerializerMixin, serializers.ModelSerializer
         instance = super().update(instance, validated_data)
         user = self.context["request"].user
 
-        work_items = instance.work_items.exclude(
-            status__in=[
-                models.WorkItem.STATUS_COMPLETED,
-                models.WorkItem.STATUS_CANCELED,
-            ]
+        domain_logic.CancelCaseLogic.post_cancel(
+            [instance], user, sender=self.context["mutation"]
         )
-
-        for work_item in work_items:
-            work_item.status = models.WorkItem.STATUS_CANCELED
-            work_item.closed_at = timezone.now()
-            work_item.closed_by_user = user.username
-            work_item.closed_by_group = user.group
-            work_item.save()
-
-        # send events in separate loop in order to be sure all operations are finished
-        for work_item in work_items:
-            self.send_event(events.cancelled_work_item, work_item=work_item)
-
-        self.send_event(events.cancelled_case, case=instance)
         return instance
 
 
@@ -333,6 +331,7 @@ class SaveWorkItemSerializer(SendEventSerializerMixin, serializers.ModelSerializ
     def update(self, instance, validated_data):
         instance = super().update(instance, validated_data)
         self.send_event(events.created_work_item, work_item=instance)
+        self.send_event(events.created_work_items, work_items=[instance])
         return instance
 
     class Meta:
@@ -406,6 +405,7 @@ class CreateWorkItemSerializer(SendEventSerializerMixin, serializers.ModelSerial
     def create(self, validated_data):
         instance = super().create(validated_data)
         self.send_event(events.created_work_item, work_item=instance)
+        self.send_event(events.created_work_items, work_items=[instance])
         return instance
 
     class Meta:
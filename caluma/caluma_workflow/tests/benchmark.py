@@ -0,0 +1,160 @@
+"""
+Simulation of case lifecycles on generated workflows, measuring each step.
+
+A workflow consists of `depth` levels of `breadth` parallel tasks. All tasks
+of a level share a flow to all tasks of the next level, so each level waits
+for the previous one to be completed. The first task of every level can be
+a multiple instance task addressed to `instances` groups. Tasks complete a
+form with `questions` questions each, and cases are started with a form as
+well.
+
+Cases are started with `api.start_case` and their ready work items completed
+with `api.complete_work_item` until the cases are completed. Latency and SQL
+query count of every step are recorded.
+
+Run `BENCHMARK_REPORT=true pytest -n 0 caluma/caluma_workflow/tests/test_benchmark.py`
+to print the report of a small simulation, or use `build_workflow` and
+`simulate` with larger parameters.
+"""
+import math
+import time
+from collections import defaultdict
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ...caluma_form.factories import FormFactory, FormQuestionFactory
+from ...caluma_form.models import Question
+from .. import api, models
+from ..factories import TaskFactory, TaskFlowFactory, WorkflowFactory
+
+
+def build_form(questions):
+    form = FormFactory()
+    for sort in range(questions):
+        FormQuestionFactory(
+            form=form,
+            sort=sort,
+            question__type=Question.TYPE_TEXT,
+            question__is_required="false",
+            question__is_hidden="false",
+        )
+    return form
+
+
+def build_workflow(breadth=2, depth=3, instances=0, questions=3):
+    """Create a workflow with `depth` levels of `breadth` parallel tasks.
+
+    Returns the workflow and a form to start its cases with.
+    """
+    workflow = WorkflowFactory(allow_all_forms=True)
+    levels = []
+    for level in range(depth):
+        tasks = []
+        for index in range(breadth):
+            multiple_instance = bool(instances) and index == 0
+            tasks.append(
+                TaskFactory(
+                    slug=f"{workflow.slug}-{level}-{index}",
+                    type=models.Task.TYPE_COMPLETE_TASK_FORM,
+                    form=build_form(questions),
+                    is_multiple_instance=multiple_instance,
+                    address_groups=str(
+                        [f"group-{i}" for i in range(instances)]
+                        if multiple_instance
+                        else ["group"]
+                    )
+                    + "|groups",
+                )
+            )
+        levels.append(tasks)
+
+    workflow.start_tasks.set(levels[0])
+    for tasks, next_tasks in zip(levels, levels[1:]):
+        next_slugs = [task.slug for task in next_tasks]
+        flow = TaskFlowFactory(
+            workflow=workflow, task=tasks[0], flow__next=f"{next_slugs}|tasks"
+        ).flow
+        for task in tasks[1:]:
+            TaskFlowFactory(workflow=workflow, task=task, flow=flow)
+
+    return workflow, build_form(questions)
+
+
+def percentile(values, percent):
+    """Return percentile of given values using the nearest rank method."""
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class Measurements:
+    def __init__(self):
+        self.steps = defaultdict(list)
+
+    def measure(self, step, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            duration = time.perf_counter() - start
+
+        self.steps[step].append((duration * 1000, len(queries)))
+        return result
+
+    def report(self):
+        """Return dict of step to count, latency percentiles in ms and queries."""
+        report = {}
+        for step, measurements in self.steps.items():
+            durations = [duration for duration, _ in measurements]
+            queries = [count for _, count in measurements]
+            report[step] = {
+                "count": len(measurements),
+                "p50": percentile(durations, 50),
+                "p90": percentile(durations, 90),
+                "p99": percentile(durations, 99),
+                "max_queries": max(queries),
+                "mean_queries": sum(queries) / len(queries),
+            }
+        return report
+
+    def format_report(self):
+        lines = [
+            f"{'step':<20} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+            f" {'queries':>8} {'max':>5}"
+        ]
+        for step, stats in self.report().items():
+            lines.append(
+                f"{step:<20} {stats['count']:>6} {stats['p50']:>8.1f}"
+                f" {stats['p90']:>8.1f} {stats['p99']:>8.1f}"
+                f" {stats['mean_queries']:>8.1f} {stats['max_queries']:>5}"
+            )
+        return "\n".join(lines)
+
+
+def simulate(workflow, form, user, cases=10, measurements=None, max_rounds=100):
+    """Drive `cases` cases of given workflow through their whole lifecycle.
+
+    In each round, all ready work items of a case are completed. A case not
+    completed after `max_rounds` rounds raises a `RuntimeError`.
+    """
+    measurements = measurements or Measurements()
+    for _ in range(cases):
+        case = measurements.measure(
+            "start_case", api.start_case, workflow=workflow, form=form, user=user
+        )
+        rounds = 0
+        while case.status == models.Case.STATUS_RUNNING:
+            if rounds == max_rounds:
+                raise RuntimeError(
+                    f"Case {case.pk} is still running after {max_rounds} rounds"
+                )
+            rounds += 1
+
+            for work_item in case.work_items.filter(
+                status=models.WorkItem.STATUS_READY
+            ):
+                measurements.measure(
+                    "complete_work_item", api.complete_work_item, work_item, user
+                )
+            case.refresh_from_db()
+
+    return measurements
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from .. import models
+from .benchmark import Measurements, build_workflow, percentile, simulate
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 90) == 5
+    assert percentile(values, 0) == 1
+
+
+def test_format_report():
+    measurements = Measurements()
+    measurements.steps["start_case"] = [(12.0, 10), (8.0, 12)]
+    measurements.steps["complete_work_item"] = [(4.0, 20)]
+
+    rows = [line.split() for line in measurements.format_report().split("\n")]
+    assert rows == [
+        "step count p50 ms p90 ms p99 ms queries max".split(),
+        "start_case 2 8.0 12.0 12.0 11.0 12".split(),
+        "complete_work_item 1 4.0 4.0 4.0 20.0 20".split(),
+    ]
+
+
+@pytest.mark.parametrize("breadth,depth,instances", [(1, 2, 0), (2, 3, 3)])
+def test_benchmark(db, admin_user, capsys, breadth, depth, instances):
+    workflow, form = build_workflow(breadth, depth, instances)
+    measurements = simulate(workflow, form, admin_user, cases=2)
+    if os.environ.get("BENCHMARK_REPORT") == "true":  # pragma: no cover
+        with capsys.disabled():
+            print(
+                f"\n{breadth}x{depth}, {instances} instances\n"
+                f"{measurements.format_report()}"
+            )
+
+    assert not models.Case.objects.exclude(status=models.Case.STATUS_COMPLETED)
+    report = measurements.report()
+    assert report["start_case"]["count"] == 2
+    work_items_per_case = depth * breadth + (instances - 1 if instances else 0) * depth
+    assert report["complete_work_item"]["count"] == 2 * work_items_per_case
+
+    # the number of queries of a step must not depend on the size of the workflow
+    assert report["start_case"]["max_queries"] <= 25
+    assert report["complete_work_item"]["max_queries"] <= 30
+
+
+def test_simulate_max_rounds(db, admin_user):
+    workflow, form = build_workflow(breadth=1, depth=3)
+
+    with pytest.raises(RuntimeError, match="still running after 2 rounds"):
+        simulate(workflow, form, admin_user, cases=1, max_rounds=2)
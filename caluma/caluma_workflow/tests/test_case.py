@@ -1,9 +1,10 @@
 import pytest
+from django.core.exceptions import ValidationError
 from graphql_relay import to_global_id
 
 from ...caluma_core.relay import extract_global_id
 from ...caluma_form.models import Question
-from .. import api, models
+from .. import api, events, models
 
 
 @pytest.mark.parametrize(
@@ -139,6 +140,29 @@ def test_start_sub_sub_case(
     assert child_child_case.family == child_case.family == case.family == case
 
 
+def test_case_family(db, case_factory, work_item_factory, django_assert_num_queries):
+    case = case_factory()
+    cases = [case]
+    for _ in range(3):
+        child_case = case_factory(family=case)
+        work_item_factory(case=cases[-1], child_case=child_case)
+        cases.append(child_case)
+    other = case_factory()
+
+    with django_assert_num_queries(1):
+        roots = models.get_case_family_roots([cases[-1].pk, cases[1].pk, other.pk])
+    assert roots == {cases[-1].pk: case.pk, cases[1].pk: case.pk, other.pk: other.pk}
+
+    # re-home the tree below the first child case
+    with django_assert_num_queries(3):
+        cases[1].set_family(cases[1])
+
+    assert [
+        models.Case.objects.get(pk=child_case.pk).family_id for child_case in cases
+    ] == [case.pk, *[cases[1].pk] * 3]
+    assert models.Case.history.filter(id=cases[-1].pk).latest().family_id == cases[1].pk
+
+
 def test_start_case_invalid_form(db, workflow, form, schema_executor):
     query = """
         mutation StartCase($input: StartCaseInput!) {
@@ -569,6 +593,42 @@ def test_work_item_document(
     assert len(result.data["allCases"]["edges"]) == result_count
 
 
+def test_work_item_document_has_answers(
+    db, case, work_item_factory, answer_factory, question_factory, schema_executor
+):
+    question_a, question_b = question_factory.create_batch(2, type="text")
+    for question in [question_a, question_b]:
+        work_item = work_item_factory(case=case)
+        answer_factory(document=work_item.document, question=question, value="hello")
+
+    query = """
+        query workitems ($filter: [HasAnswerFilterType]){
+          allCases(filter: [
+            {workItemDocumentHasAnswer: $filter}
+          ]) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+    # each answer may belong to the document of another work item
+    result = schema_executor(
+        query,
+        variable_values={
+            "filter": [
+                {"question": question.slug, "value": "hello"}
+                for question in [question_a, question_b]
+            ]
+        },
+    )
+
+    assert not result.errors
+    assert len(result.data["allCases"]["edges"]) == 1
+
+
 @pytest.mark.parametrize("task__lead_time", [100, None])
 @pytest.mark.parametrize("task__address_groups", ['["group-name"]|groups', None])
 def test_api_start_case(
@@ -588,3 +648,161 @@ def test_api_start_case(
     assert case.document.form == form
     assert work_item.document.form == form
     assert work_item.status == models.WorkItem.STATUS_READY
+
+
+@pytest.mark.parametrize("task__address_groups", ['["group-name"]|groups'])
+def test_api_start_cases(
+    db,
+    workflow,
+    workflow_allow_forms,
+    workflow_start_tasks,
+    task,
+    form,
+    form_factory,
+    admin_user,
+    django_assert_max_num_queries,
+):
+    # the number of queries doesn't depend on the number of cases
+    with django_assert_max_num_queries(26):
+        cases = api.start_cases(
+            workflow, admin_user, [{"form": form, "meta": {"id": i}} for i in range(10)]
+        )
+
+    assert sorted(case.meta["id"] for case in cases) == list(range(10))
+    for case in cases:
+        case.refresh_from_db()
+        work_item = case.work_items.get(task_id=task.pk)
+        assert case.family_id == case.pk
+        assert case.history.count() == 1
+        assert case.document.form == form
+        assert case.document.family_id == case.document_id
+        assert work_item.addressed_groups == ["group-name"]
+        assert work_item.document.form == form
+
+    with pytest.raises(ValidationError):
+        api.start_cases(workflow, admin_user, [{"form": form_factory()}])
+
+
+def test_api_cancel_cases(
+    db, case_factory, work_item_factory, admin_user, django_assert_num_queries
+):
+    cases = case_factory.create_batch(3)
+    for case in cases:
+        work_item_factory.create_batch(
+            2, case=case, child_case=None, status=models.WorkItem.STATUS_READY
+        )
+        work_item_factory(
+            case=case, child_case=None, status=models.WorkItem.STATUS_COMPLETED
+        )
+
+    cancelled_work_items = []
+    cancelled_cases = []
+
+    def on_cancelled_work_item(sender, work_item, **kwargs):
+        cancelled_work_items.append(work_item)
+
+    def on_cancelled_case(sender, case, **kwargs):
+        cancelled_cases.append(case)
+
+    batches = []
+
+    def on_cancelled_batch(sender, signal, **kwargs):
+        batches.append((signal, kwargs))
+
+    events.cancelled_work_item.connect(on_cancelled_work_item)
+    events.cancelled_case.connect(on_cancelled_case)
+    events.cancelled_work_items.connect(on_cancelled_batch)
+    events.cancelled_cases.connect(on_cancelled_batch)
+    try:
+        # update and history of cases, select, update and history of work items
+        # and the savepoint of the transaction
+        with django_assert_num_queries(5 + 2):
+            api.cancel_cases(cases, admin_user)
+    finally:
+        events.cancelled_work_item.disconnect(on_cancelled_work_item)
+        events.cancelled_case.disconnect(on_cancelled_case)
+        events.cancelled_work_items.disconnect(on_cancelled_batch)
+        events.cancelled_cases.disconnect(on_cancelled_batch)
+
+    assert len(cancelled_cases) == 3
+    assert len(cancelled_work_items) == 6
+    assert batches == [
+        (events.cancelled_work_items, {"work_items": cancelled_work_items}),
+        (events.cancelled_cases, {"cases": cancelled_cases}),
+    ]
+    assert not models.Case.objects.exclude(status=models.Case.STATUS_CANCELED).exists()
+    assert (
+        models.WorkItem.objects.filter(
+            status=models.WorkItem.STATUS_CANCELED, closed_by_user=admin_user.username
+        ).count()
+        == 6
+    )
+    assert (
+        models.WorkItem.objects.filter(status=models.WorkItem.STATUS_COMPLETED).count()
+        == 3
+    )
+    assert cases[0].history.first().status == models.Case.STATUS_CANCELED
+    work_item = cancelled_work_items[0]
+    assert work_item.history.first().status == models.WorkItem.STATUS_CANCELED
+
+    with pytest.raises(ValidationError):
+        api.cancel_cases([cases[0]], admin_user)
+
+
+def test_case_answer_statistics(
+    db,
+    case_factory,
+    question_factory,
+    answer_factory,
+    document_factory,
+    schema_executor,
+):
+    question = question_factory(type=Question.TYPE_INTEGER)
+    running, completed = case_factory.create_batch(2)
+    completed.status = models.Case.STATUS_COMPLETED
+    completed.save()
+    for document, value in [
+        (running.document, 1),
+        (completed.document, 2),
+        # documents without a case are left out
+        (document_factory(), 4),
+    ]:
+        answer_factory(document=document, question=question, value=value)
+
+    query = """
+        query ($question: ID!, $filter: [CaseFilterSetType]) {
+          caseAnswerStatistics(
+            question: $question, groupBy: CASE_STATUS, filter: $filter
+          ) {
+            group
+            documentCount
+            sum
+          }
+        }
+    """
+    result = schema_executor(
+        query,
+        variable_values={
+            "question": question.slug,
+            "filter": [{"status": ["RUNNING", "COMPLETED"]}],
+        },
+    )
+
+    assert not result.errors
+    assert result.data["caseAnswerStatistics"] == [
+        {"group": "completed", "documentCount": 1, "sum": 2},
+        {"group": "running", "documentCount": 1, "sum": 1},
+    ]
+
+    result = schema_executor(
+        query,
+        variable_values={
+            "question": question.slug,
+            "filter": [{"status": ["RUNNING"]}],
+        },
+    )
+
+    assert not result.errors
+    assert result.data["caseAnswerStatistics"] == [
+        {"group": "running", "documentCount": 1, "sum": 1}
+    ]
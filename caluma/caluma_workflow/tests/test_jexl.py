@@ -1,6 +1,7 @@
 import pytest
 
 from ..jexl import FlowJexl, GroupJexl
+from ..utils import GroupJexlEvaluator
 
 
 @pytest.mark.parametrize(
@@ -49,3 +50,45 @@ def test_flow_jexl_validate(expression, num_errors):
 def test_group_jexl_validate(expression, num_errors):
     jexl = GroupJexl()
     assert len(list(jexl.validate(expression))) == num_errors
+
+
+@pytest.mark.parametrize(
+    "expression,folded",
+    [
+        ('["group1", "group2"]|groups', (True, ["group1", "group2"])),
+        ("'group1'", (True, ["group1"])),
+        ("info.case.created_by_group", (False, None)),
+        ("['group1', info.work_item.created_by_group]|groups", (False, None)),
+        ("{groups: [info.case.created_by_group]}", (False, None)),
+    ],
+)
+def test_group_jexl_fold_constant(expression, folded):
+    assert GroupJexl().fold_constant(expression) == folded
+
+
+def test_group_jexl_fold_constant_copy():
+    expression = '["group1", "group2"]|groups'
+    _, result = GroupJexl().fold_constant(expression)
+    result.append("group3")
+
+    assert GroupJexl().fold_constant(expression) == (True, ["group1", "group2"])
+
+
+def test_group_jexl_evaluator(db, case, mocker):
+    evaluator = GroupJexlEvaluator()
+    evaluate = mocker.spy(evaluator.jexl, "evaluate")
+
+    expression = "[info.case.created_by_group, info.work_item.created_by_group]"
+    for _ in range(3):
+        assert evaluator.evaluate(expression, case, "group") == [
+            case.created_by_group,
+            "group",
+        ]
+    assert evaluator.evaluate(expression, case, "other")[1] == "other"
+    assert evaluate.call_count == 2
+
+
+def test_group_jexl_validation_context():
+    jexl = GroupJexl(validation_context={"case": {"created_by_group": "group1"}})
+
+    assert jexl.evaluate("info.case.created_by_group") == ["group1"]
@@ -130,3 +130,67 @@ def test_workitem_name_description(transactional_db):
     for wi in [work_item, *historical_work_items]:
         assert wi.name == wi.task.name
         assert wi.description == wi.task.description
+
+
+def test_populate_group_access(transactional_db):
+    executor = MigrationExecutor(connection)
+    app = "caluma_workflow"
+    migrate_from = [
+        (app, "0022_workitem_name_description"),
+        ("caluma_form", "0034_fix_fk_lengths"),
+    ]
+    migrate_to = [(app, "0023_group_access")]
+
+    executor.migrate(migrate_from)
+    old_apps = executor.loader.project_state(migrate_from).apps
+
+    # Create some old data. Can't use factories here
+
+    Case = old_apps.get_model(app, "Case")
+    Workflow = old_apps.get_model(app, "Workflow")
+    WorkItem = old_apps.get_model(app, "WorkItem")
+    Task = old_apps.get_model(app, "Task")
+    Form = old_apps.get_model("caluma_form", "Form")
+    Document = old_apps.get_model("caluma_form", "Document")
+
+    form = Form.objects.create(slug="main-form")
+    case_document = Document.objects.create(form=form)
+    case_document.family = case_document
+    case_document.save()
+    work_item_document = Document.objects.create(form=form)
+    work_item_document.family = work_item_document
+    work_item_document.save()
+
+    workflow = Workflow.objects.create(slug="main-workflow")
+    case = Case.objects.create(workflow=workflow, document=case_document)
+    child_case = Case.objects.create(workflow=workflow)
+    task = Task.objects.create()
+    WorkItem.objects.create(
+        case=case,
+        child_case=child_case,
+        task=task,
+        document=work_item_document,
+        addressed_groups=["group1", "group2"],
+    )
+
+    # Migrate forwards.
+    executor.loader.build_graph()  # reload.
+    executor.migrate(migrate_to)
+    new_apps = executor.loader.project_state(migrate_to).apps
+
+    # Test the new data.
+    GroupCaseAccess = new_apps.get_model(app, "GroupCaseAccess")
+    GroupDocumentAccess = new_apps.get_model(app, "GroupDocumentAccess")
+
+    assert set(GroupCaseAccess.objects.values_list("group", "case_id")) == {
+        ("group1", case.pk),
+        ("group2", case.pk),
+        ("group1", child_case.pk),
+        ("group2", child_case.pk),
+    }
+    assert set(GroupDocumentAccess.objects.values_list("group", "family_id")) == {
+        ("group1", case_document.pk),
+        ("group2", case_document.pk),
+        ("group1", work_item_document.pk),
+        ("group2", work_item_document.pk),
+    }
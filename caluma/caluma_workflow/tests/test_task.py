@@ -77,3 +77,39 @@ def test_save_comlete_task_form_task(db, snapshot, task, schema_executor):
     result = schema_executor(query, variable_values=inp)
     assert not result.errors
     snapshot.assert_match(result.data)
+
+
+@pytest.mark.parametrize(
+    "address_groups,error",
+    [
+        ("['group1']|groups", None),
+        ("info.case.created_by_group", None),
+        ("1 / 0", "1 / 0 could not be evaluated"),
+    ],
+)
+def test_save_task_address_groups(db, task, schema_executor, address_groups, error):
+    query = """
+        mutation SaveSimpleTask($input: SaveSimpleTaskInput!) {
+          saveSimpleTask(input: $input) {
+            task {
+              addressGroups
+            }
+          }
+        }
+    """
+
+    inp = {
+        "input": {
+            **extract_serializer_input_fields(serializers.SaveTaskSerializer, task),
+            "addressGroups": address_groups,
+        }
+    }
+    result = schema_executor(query, variable_values=inp)
+
+    if error:
+        assert error in str(result.errors)
+        return
+
+    assert not result.errors
+    task.refresh_from_db()
+    assert task.address_groups == address_groups
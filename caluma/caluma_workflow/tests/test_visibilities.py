@@ -1,5 +1,9 @@
+from copy import copy
+from types import SimpleNamespace
+
 import pytest
 
+from ...caluma_core.visibilities import filter_queryset_for
 from ...caluma_form import models as form_models
 from ...caluma_form.schema import Answer, Document
 from .. import models
@@ -47,3 +51,133 @@ def test_assigned_groups_answer_visibility(db, admin_info, size, work_item, answ
         Answer, form_models.Answer.objects, admin_info
     )
     assert queryset.count() == size
+
+
+@pytest.mark.parametrize("work_item__addressed_groups", [["admin"]])
+def test_addressed_groups_visibility_cached(
+    db, admin_info, work_item, django_assert_num_queries
+):
+    admin_info.operation = SimpleNamespace(operation="query")
+    visibility = AddressedGroups()
+
+    with django_assert_num_queries(2):
+        # first call materializes the visible work items
+        queryset = visibility.filter_queryset(
+            WorkItem, models.WorkItem.objects, admin_info
+        )
+        assert queryset.count() == 1
+
+    with django_assert_num_queries(1):
+        queryset = visibility.filter_queryset(
+            WorkItem, models.WorkItem.objects, admin_info
+        )
+        assert queryset.count() == 1
+
+
+def test_addressed_groups_access_maintained(db, admin_info, work_item_factory):
+    work_item = work_item_factory(addressed_groups=["other"])
+
+    def visible(node, queryset):
+        # avoid cached results from previous calls
+        admin_info.context = copy(admin_info.context)
+        return set(AddressedGroups().filter_queryset(node, queryset, admin_info))
+
+    assert not visible(Case, models.Case.objects)
+    assert not visible(Document, form_models.Document.objects)
+
+    work_item.addressed_groups = ["admin"]
+    work_item.save()
+
+    assert visible(Case, models.Case.objects) == {work_item.case, work_item.child_case}
+    assert visible(Document, form_models.Document.objects) == {
+        work_item.document,
+        work_item.case.document,
+        work_item.child_case.document,
+    }
+
+    work_item.child_case = None
+    work_item.save()
+
+    assert visible(Case, models.Case.objects) == {work_item.case}
+
+    work_item.delete()
+
+    assert not visible(Case, models.Case.objects)
+    assert not visible(Document, form_models.Document.objects)
+
+
+def test_addressed_groups_access_case_document(
+    db, admin_info, work_item_factory, document_factory
+):
+    work_item = work_item_factory(addressed_groups=["admin"], child_case=None)
+    case = work_item.case
+    old_document = case.document
+
+    case.document = document_factory()
+    case.save()
+
+    queryset = AddressedGroups().filter_queryset(
+        Document, form_models.Document.objects, admin_info
+    )
+    assert case.document in queryset
+    assert old_document not in queryset
+
+
+def test_addressed_groups_access_shared_family(
+    db, admin_info, work_item_factory, document_factory
+):
+    work_item = work_item_factory(addressed_groups=["admin"])
+    # work item of another case sharing the document family
+    other = work_item_factory(
+        addressed_groups=["other"], document=document_factory(family=work_item.document)
+    )
+
+    other.addressed_groups = ["unknown"]
+    other.save()
+
+    queryset = AddressedGroups().filter_queryset(
+        Document, form_models.Document.objects, admin_info
+    )
+    assert work_item.document in queryset
+
+
+@pytest.mark.parametrize(
+    "node,model,method",
+    [
+        (WorkItem, models.WorkItem, "filter_querset_for_work_item"),
+        (Case, models.Case, "filter_queryset_for_case"),
+        (Document, form_models.Document, "filter_queryset_for_document"),
+        (Answer, form_models.Answer, "filter_queryset_for_answer"),
+    ],
+)
+def test_addressed_groups_former_filter_queryset(
+    db, admin_info, work_item_factory, answer_factory, node, model, method
+):
+    for groups in [["admin"], ["other"]]:
+        work_item = work_item_factory(addressed_groups=groups)
+        answer_factory(document=work_item.document)
+
+    visibility = AddressedGroups()
+    queryset = getattr(visibility, method)(node, model.objects.all(), admin_info)
+    assert set(queryset) == set(
+        visibility.filter_queryset(node, model.objects.all(), admin_info)
+    )
+    assert 0 < queryset.count() < model.objects.count()
+
+
+def test_addressed_groups_override_filter_queryset(db, admin_info, work_item_factory):
+    visible = work_item_factory(addressed_groups=["admin"])
+    work_item_factory(addressed_groups=["admin"])
+    work_item_factory(addressed_groups=["other"])
+
+    class CustomVisibility(AddressedGroups):
+        @filter_queryset_for(Case)
+        def filter_queryset_for_case(self, node, queryset, info):
+            return (
+                super()
+                .filter_queryset_for_case(node, queryset, info)
+                .filter(pk=visible.case.pk)
+            )
+
+    queryset = CustomVisibility().filter_queryset(Case, models.Case.objects, admin_info)
+    assert list(queryset) == [visible.case]
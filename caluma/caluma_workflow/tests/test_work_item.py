@@ -1,12 +1,14 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from graphene.utils.str_converters import to_const
 
 from ...caluma_core.relay import extract_global_id
 from ...caluma_form.models import Question
 from ...caluma_user.models import BaseUser
-from .. import api, models
+from .. import api, events, models, utils
 
 
 def test_query_all_work_items_filter_status(db, work_item_factory, schema_executor):
@@ -84,6 +86,101 @@ def test_query_all_work_items_filter_groups(
     assert len(result.data["allWorkItems"]["edges"]) == 0
 
 
+def test_query_all_work_items_filter_inbox(db, work_item_factory, schema_executor):
+    inbox = [
+        work_item_factory(addressed_groups=["A"], deadline="2020-01-02T00:00:00Z"),
+        work_item_factory(controlling_groups=["B"], deadline="2020-01-01T00:00:00Z"),
+        work_item_factory(assigned_users=["user"], deadline="2020-01-01T00:00:00Z"),
+        work_item_factory(addressed_groups=["B"], deadline=None),
+        work_item_factory(assigned_users=["user"], deadline=None),
+    ]
+    work_item_factory(addressed_groups=["C"], assigned_users=["other"])
+    work_item_factory(
+        addressed_groups=["A"], status=models.WorkItem.STATUS_COMPLETED, deadline=None
+    )
+
+    expected = [
+        str(work_item.pk)
+        for work_item in sorted(
+            inbox,
+            key=lambda work_item: (
+                work_item.deadline is None,
+                work_item.deadline or "",
+                str(work_item.pk),
+            ),
+        )
+    ]
+
+    query = """
+        query WorkItems($inbox: InboxFilterType!) {
+          allWorkItems(status: READY, inbox: $inbox, first: 2) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+
+    ids = []
+    inbox_filter = {"groups": ["A", "B"], "users": ["user"]}
+    while True:
+        result = schema_executor(query, variable_values={"inbox": inbox_filter})
+        assert not result.errors
+
+        page = [edge["node"]["id"] for edge in result.data["allWorkItems"]["edges"]]
+        if not page:
+            break
+        ids += page
+        inbox_filter["after"] = page[-1]
+
+    assert [extract_global_id(id) for id in ids] == expected
+
+    result = schema_executor(
+        query, variable_values={"inbox": {"groups": ["A"], "after": "unknown"}}
+    )
+    assert result.errors
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        "inbox: {groups: $groups, after: $after}, order: [{attribute: CREATED_AT}]",
+        "inbox: {groups: $groups, after: $after}, orderBy: [DEADLINE_DESC]",
+        "filter: [{inbox: {groups: $groups, after: $after}}], "
+        "order: [{attribute: CREATED_AT}]",
+    ],
+)
+def test_query_all_work_items_filter_inbox_order(
+    db, work_item_factory, schema_executor, arguments
+):
+    work_item = work_item_factory(addressed_groups=["A"])
+    query = f"""
+        query WorkItems($groups: [String], $after: ID) {{
+          allWorkItems({arguments}) {{
+            edges {{
+              node {{
+                id
+              }}
+            }}
+          }}
+        }}
+    """
+
+    # the inbox order is required to continue after a work item
+    result = schema_executor(
+        query, variable_values={"groups": ["A"], "after": str(work_item.pk)}
+    )
+    assert [str(error) for error in result.errors] == [
+        "['The `after` work item of an inbox cannot be combined with another order.']"
+    ]
+
+    result = schema_executor(query, variable_values={"groups": ["A"], "after": None})
+    assert not result.errors
+    assert len(result.data["allWorkItems"]["edges"]) == 1
+
+
 @pytest.mark.parametrize("task__type,task__form", [(models.Task.TYPE_SIMPLE, None)])
 @pytest.mark.parametrize(
     "work_item__status,case__status,success",
@@ -302,7 +399,7 @@ def test_complete_multiple_instance_task_form_work_item_next(
     task_next = task_factory(
         type=models.Task.TYPE_SIMPLE, form=None, address_groups='["group-name"]|groups'
     )
-    task_flow = task_flow_factory(task=task)
+    task_flow = task_flow_factory(task=task, workflow=work_item.case.workflow)
     task_flow.flow.next = f"'{task_next.slug}'|task"
     task_flow.flow.save()
 
@@ -533,6 +630,38 @@ def test_complete_work_item_with_next_multiple_instance_task(
         assert len(work_item.addressed_groups) == 1
 
 
+def test_bulk_create_work_items_documents(db, case, form, task_factory, admin_user):
+    task = task_factory(
+        form=form,
+        is_multiple_instance=True,
+        address_groups=json.dumps([f"group{i}" for i in range(10)]),
+    )
+    with CaptureQueriesContext(connection) as context:
+        work_items = utils.bulk_create_work_items([task], case, admin_user)
+
+    document_inserts = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(
+            (
+                'INSERT INTO "caluma_form_document"',
+                'INSERT INTO "caluma_form_historical',
+            )
+        )
+    ]
+    assert len(document_inserts) == 2
+
+    assert len({work_item.document_id for work_item in work_items}) == 10
+    for work_item in work_items:
+        work_item.refresh_from_db()
+        document = work_item.document
+        assert document.form == form
+        assert document.family_id == document.pk
+        assert document.created_by_user == admin_user.username
+        assert document.history.count() == 1
+        assert document.search_vector
+
+
 @pytest.mark.parametrize(
     "work_item__status,work_item__child_case,task__type",
     [(models.WorkItem.STATUS_COMPLETED, None, models.Task.TYPE_SIMPLE)],
@@ -1065,3 +1194,106 @@ def test_complete_work_item_parallel(
             assert case.status == models.Case.STATUS_COMPLETED
         else:
             assert case.status == models.Case.STATUS_RUNNING
+
+
+@pytest.mark.parametrize("api_function", [api.complete_work_items, api.skip_work_items])
+def test_api_complete_work_items(
+    db,
+    case_factory,
+    workflow,
+    task_factory,
+    task_flow_factory,
+    work_item_factory,
+    admin_user,
+    mocker,
+    api_function,
+):
+    task = task_factory(
+        type=models.Task.TYPE_SIMPLE, form=None, is_multiple_instance=True
+    )
+    task_next = task_factory(
+        type=models.Task.TYPE_SIMPLE, address_groups='["next-group"]|groups'
+    )
+    task_flow_factory(
+        task=task, workflow=workflow, flow__next=f"'{task_next.slug}'|task"
+    )
+
+    cases = case_factory.create_batch(2, workflow=workflow)
+    work_items = [
+        work_item_factory(
+            case=case, task=task, child_case=None, status=models.WorkItem.STATUS_READY
+        )
+        for case in cases
+        for _ in range(3)
+    ]
+
+    created_batches = []
+
+    def on_created_work_items(sender, work_items, **kwargs):
+        created_batches.append(work_items)
+
+    compile_graph = mocker.spy(models, "compile_workflow_graph")
+    events.created_work_items.connect(on_created_work_items)
+    try:
+        # multiple instances of the same case only continue it once
+        api_function(work_items, admin_user)
+    finally:
+        events.created_work_items.disconnect(on_created_work_items)
+
+    # the flows are compiled once per workflow, even without a shared cache
+    compile_graph.assert_called_once_with(workflow.pk)
+
+    for case in cases:
+        assert (
+            case.work_items.filter(status=models.WorkItem.STATUS_READY).get().task
+            == task_next
+        )
+    assert not models.WorkItem.objects.filter(
+        task=task, status=models.WorkItem.STATUS_READY
+    ).exists()
+    assert work_items[0].history.first().closed_by_user == admin_user.username
+    assert len(created_batches) == 1
+    assert {work_item.task for work_item in created_batches[0]} == {task_next}
+    assert {work_item.case for work_item in created_batches[0]} == set(cases)
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_api_complete_work_items_end_task_continued(
+    db, case, task_factory, task_flow_factory, work_item_factory, admin_user, batch
+):
+    task = task_factory(type=models.Task.TYPE_SIMPLE, form=None)
+    end_task = task_factory(
+        type=models.Task.TYPE_SIMPLE,
+        form=None,
+        is_multiple_instance=True,
+        address_groups='["group-a"]|groups',
+    )
+    task_flow_factory(
+        task=task, workflow=case.workflow, flow__next=f"'{end_task.slug}'|task"
+    )
+    work_items = [
+        work_item_factory(
+            case=case, task=task, child_case=None, status=models.WorkItem.STATUS_READY
+        ),
+        work_item_factory(
+            case=case,
+            task=end_task,
+            child_case=None,
+            status=models.WorkItem.STATUS_READY,
+        ),
+    ]
+
+    if batch:
+        api.complete_work_items(work_items, admin_user)
+    else:
+        for work_item in work_items:
+            api.complete_work_item(work_item, admin_user)
+
+    # the end task is continued by the first work item before the second one
+    # could complete the case
+    case.refresh_from_db()
+    assert case.status == models.Case.STATUS_RUNNING
+    assert (
+        case.work_items.filter(status=models.WorkItem.STATUS_READY).get().task
+        == end_task
+    )
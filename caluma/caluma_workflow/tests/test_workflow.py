@@ -232,3 +232,84 @@ def test_add_workflow_flow_reuse_task(
         task_flows.get(workflow=workflow_a).flow.next
         == task_flows.get(workflow=workflow_b).flow.next
     )
+
+
+@pytest.fixture
+def workflow_graph_tasks(
+    workflow, task_factory, task_flow_factory, workflow_start_tasks_factory
+):
+    start, end = task_factory.create_batch(2)
+    workflow_start_tasks_factory(workflow=workflow, task=start)
+    flow = task_flow_factory(
+        workflow=workflow, task=start, flow__next=f"'{end.slug}'|task"
+    ).flow
+    return start, end, flow
+
+
+def test_workflow_graph_local_cache(
+    db, workflow, workflow_graph_tasks, django_assert_num_queries
+):
+    start, end, flow = workflow_graph_tasks
+    assert models.get_workflow_graph(workflow.pk)["end_tasks"] == [end.pk]
+
+    # another process changing the flow couldn't invalidate a local cache
+    models.Flow.objects.filter(pk=flow.pk).update(next=f"'{start.slug}'|task")
+    with django_assert_num_queries(2):
+        graph = models.get_workflow_graph(workflow.pk)
+    assert graph["flows"][start.pk]["next"] == [start.pk]
+
+
+def test_workflow_graph(
+    db,
+    mocker,
+    workflow,
+    task_factory,
+    task_flow_factory,
+    workflow_start_tasks_factory,
+    django_assert_num_queries,
+):
+    # the local memory cache is shared within the tests
+    mocker.patch("caluma.caluma_workflow.models.is_shared_cache", return_value=True)
+    start, branch_a, branch_b, join, end = task_factory.create_batch(5)
+    workflow_start_tasks_factory(workflow=workflow, task=start)
+    task_flow_factory(
+        workflow=workflow,
+        task=start,
+        flow__next=f"['{branch_a.slug}', '{branch_b.slug}']|tasks",
+    )
+    join_flow = task_flow_factory(
+        workflow=workflow, task=branch_a, flow__next=f"'{join.slug}'|task"
+    ).flow
+    task_flow_factory(workflow=workflow, task=branch_b, flow=join_flow)
+    task_flow_factory(
+        workflow=workflow,
+        task=join,
+        flow__next=f"false ? '{join.slug}'|task : '{end.slug}'|task",
+    )
+
+    graph = models.get_workflow_graph(workflow.pk)
+    assert graph["flows"][start.pk]["next"] == [branch_a.pk, branch_b.pk]
+    assert set(graph["flows"][branch_a.pk]["predecessors"]) == {
+        branch_a.pk,
+        branch_b.pk,
+    }
+    assert graph["flows"][join.pk]["next"] == [end.pk]
+    assert graph["end_tasks"] == [end.pk]
+
+    with django_assert_num_queries(0):
+        assert models.get_workflow_graph(workflow.pk) == graph
+
+    join_flow.next = f"'{end.slug}'|task"
+    join_flow.save()
+    assert models.get_workflow_graph(workflow.pk)["flows"][branch_b.pk]["next"] == [
+        end.pk
+    ]
+
+    other = task_factory()
+    workflow.start_tasks.add(other)
+    assert models.get_workflow_graph(workflow.pk)["end_tasks"] == sorted(
+        [end.pk, other.pk]
+    )
+
+    task_flow_factory(workflow=workflow, task=other, flow__next=f"'{end.slug}'|task")
+    assert models.get_workflow_graph(workflow.pk)["end_tasks"] == [end.pk]
@@ -1,3 +1,5 @@
+import json
+
 from simple_history.utils import bulk_create_with_history
 
 from ..caluma_form.models import Document
@@ -17,28 +19,61 @@ def get_group_jexl_structure(work_item_created_by_group, case, prev_work_item=No
     }
 
 
-def get_jexl_groups(jexl, case, work_item_created_by_group, prev_work_item=None):
-    context = get_group_jexl_structure(work_item_created_by_group, case, prev_work_item)
-    if jexl:
-        return GroupJexl(validation_context=context).evaluate(jexl)
-    return []
+class GroupJexlEvaluator:
+    """
+    Evaluator of group jexl of the tasks of one operation.
 
+    All expressions are evaluated with the same `GroupJexl`, and results are
+    memoized per expression and context. Expressions without references to
+    the context are folded to their result.
+    """
 
-def bulk_create_work_items(tasks, case, user, prev_work_item=None):
+    def __init__(self):
+        self.jexl = GroupJexl()
+        self._results = {}
+
+    def evaluate(
+        self, expression, case, work_item_created_by_group, prev_work_item=None
+    ):
+        is_constant, result = self.jexl.fold_constant(expression)
+        if is_constant:
+            return result
+
+        context = get_group_jexl_structure(
+            work_item_created_by_group, case, prev_work_item
+        )
+        key = (expression, json.dumps(context, sort_keys=True))
+        if key not in self._results:
+            self._results[key] = self.jexl.evaluate(expression, {"info": context})
+        result = self._results[key]
+        return list(result) if isinstance(result, list) else result
+
+
+def get_jexl_groups(
+    jexl, case, work_item_created_by_group, prev_work_item=None, evaluator=None
+):
+    """Evaluate group jexl in the context of given case and previous work item.
+
+    An evaluator can be passed to share memoized results within an operation.
+    """
+    if not jexl:
+        return []
+
+    evaluator = evaluator or GroupJexlEvaluator()
+    return evaluator.evaluate(jexl, case, work_item_created_by_group, prev_work_item)
+
+
+def build_work_items(tasks, case, user, prev_work_item=None, evaluator=None):
+    """Return unsaved work items of given tasks, to be saved with `save_work_items`."""
+    evaluator = evaluator or GroupJexlEvaluator()
     work_items = []
     for task in tasks:
         controlling_groups = get_jexl_groups(
-            task.control_groups,
-            case,
-            user.group,
-            prev_work_item if prev_work_item else None,
+            task.control_groups, case, user.group, prev_work_item, evaluator
         )
         addressed_groups = [
             get_jexl_groups(
-                task.address_groups,
-                case,
-                user.group,
-                prev_work_item if prev_work_item else None,
+                task.address_groups, case, user.group, prev_work_item, evaluator
             )
         ]
         if task.is_multiple_instance:
@@ -51,7 +86,7 @@ def bulk_create_work_items(tasks, case, user, prev_work_item=None):
                     controlling_groups=controlling_groups,
                     task_id=task.pk,
                     deadline=task.calculate_deadline(),
-                    document=Document.objects.create_document_for_task(task, user),
+                    document=Document.objects.build_document_for_task(task, user),
                     case=case,
                     status=models.WorkItem.STATUS_READY,
                     created_by_user=user.username,
@@ -59,5 +94,20 @@ def bulk_create_work_items(tasks, case, user, prev_work_item=None):
                 )
             )
 
+    return work_items
+
+
+def save_work_items(work_items, cases):
+    """Create work items of given cases with one batch of inserts per model."""
+    Document.objects.bulk_create_documents(
+        [work_item.document for work_item in work_items if work_item.document]
+    )
     bulk_create_with_history(work_items, models.WorkItem)
+    # bulk_create doesn't send post_save, hence update group access explicitly
+    models.update_group_access([case.pk for case in cases])
     return work_items
+
+
+def bulk_create_work_items(tasks, case, user, prev_work_item=None):
+    work_items = build_work_items(tasks, case, user, prev_work_item)
+    return save_work_items(work_items, [case])
@@ -1,6 +1,11 @@
 from django.db.models import Q
 
-from ..caluma_core.visibilities import BaseVisibility, filter_queryset_for
+from ..caluma_core.visibilities import (
+    BaseVisibility,
+    VisibilityContext,
+    cached_for_request,
+    predicate_for,
+)
 from ..caluma_form import models as form_models
 from ..caluma_form.schema import Answer, Document
 from . import models
@@ -10,41 +15,57 @@ from .schema import Case, WorkItem
 class AddressedGroups(BaseVisibility):
     """Only show case, work item and document to addressed users through group."""
 
+    @cached_for_request
     def get_visible_work_items(self, node, queryset, info):
         groups = info.context.user.groups
         return models.WorkItem.objects.filter(addressed_groups__overlap=groups)
 
+    @cached_for_request
     def get_visible_cases(self, node, queryset, info):
-        work_items = self.get_visible_work_items(node, queryset, info)
-        cases = models.Case.objects.filter(
-            Q(work_items__in=work_items) | Q(parent_work_item__in=work_items)
-        )
-        return cases
+        groups = info.context.user.groups
+        access = models.GroupCaseAccess.objects.filter(group__in=groups)
+        return models.Case.objects.filter(pk__in=access.values("case"))
 
+    @cached_for_request
     def get_visible_documents(self, node, queryset, info):
+        groups = info.context.user.groups
+        access = models.GroupDocumentAccess.objects.filter(group__in=groups)
+        return form_models.Document.objects.filter(family__in=access.values("family"))
+
+    @predicate_for(WorkItem)
+    def predicate_for_work_item(self, node, queryset, info):
         work_items = self.get_visible_work_items(node, queryset, info)
+        context = VisibilityContext.for_info(info)
+        return Q(pk__in=context.materialize(work_items, info))
+
+    @predicate_for(Case)
+    def predicate_for_case(self, node, queryset, info):
         cases = self.get_visible_cases(node, queryset, info)
-        families = form_models.Document.objects.filter(
-            Q(work_item__in=work_items) | Q(case__in=cases)
-        ).values("family")
-        return form_models.Document.objects.filter(family__in=families)
+        context = VisibilityContext.for_info(info)
+        return Q(pk__in=context.materialize(cases, info))
+
+    @predicate_for(Document)
+    def predicate_for_document(self, node, queryset, info):
+        documents = self.get_visible_documents(node, queryset, info)
+        context = VisibilityContext.for_info(info)
+        return Q(pk__in=context.materialize(documents, info))
 
-    @filter_queryset_for(WorkItem)
+    @predicate_for(Answer)
+    def predicate_for_answer(self, node, queryset, info):
+        documents = self.get_visible_documents(node, queryset, info)
+        context = VisibilityContext.for_info(info)
+        return Q(document__in=context.materialize(documents, info))
+
+    # the former queryset filters are kept for subclasses calling them, but the
+    # visibility is defined by the predicates above
     def filter_querset_for_work_item(self, node, queryset, info):
-        work_items = self.get_visible_work_items(node, queryset, info)
-        return queryset.filter(pk__in=work_items)
+        return queryset.filter(self.predicate_for_work_item(node, queryset, info))
 
-    @filter_queryset_for(Case)
     def filter_queryset_for_case(self, node, queryset, info):
-        cases = self.get_visible_cases(node, queryset, info)
-        return queryset.filter(pk__in=cases)
+        return queryset.filter(self.predicate_for_case(node, queryset, info))
 
-    @filter_queryset_for(Document)
     def filter_queryset_for_document(self, node, queryset, info):
-        documents = self.get_visible_documents(node, queryset, info)
-        return queryset.filter(pk__in=documents)
+        return queryset.filter(self.predicate_for_document(node, queryset, info))
 
-    @filter_queryset_for(Answer)
     def filter_queryset_for_answer(self, node, queryset, info):
-        documents = self.get_visible_documents(node, queryset, info)
-        return queryset.filter(document__in=documents)
+        return queryset.filter(self.predicate_for_answer(node, queryset, info))
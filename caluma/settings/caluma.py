@@ -41,6 +41,8 @@ MINIO_STORAGE_AUTO_CREATE_MEDIA_BUCKET = env.str(
     "MINIO_STORAGE_AUTO_CREATE_MEDIA_BUCKET", default=True
 )
 MINIO_PRESIGNED_TTL_MINUTES = env.str("MINIO_PRESIGNED_TTL_MINUTES", default=15)
+MINIO_COPY_WORKERS = env.int("MINIO_COPY_WORKERS", default=8)
+MINIO_COPY_RETRIES = env.int("MINIO_COPY_RETRIES", default=2)
 
 
 # GraphQL
@@ -67,6 +69,10 @@ VISIBILITY_CLASSES = env.list(
     "VISIBILITY_CLASSES", default=default(["caluma.caluma_core.visibilities.Any"])
 )
 
+# Visible id sets up to this size are evaluated once per request and embedded
+# as a list instead of a subquery. Set to 0 to disable.
+VISIBILITY_MATERIALIZE_LIMIT = env.int("VISIBILITY_MATERIALIZE_LIMIT", default=1000)
+
 PERMISSION_CLASSES = env.list(
     "PERMISSION_CLASSES", default=default(["caluma.caluma_core.permissions.AllowAny"])
 )
@@ -79,12 +85,32 @@ FORMAT_VALIDATOR_CLASSES = env.list("FORMAT_VALIDATOR_CLASSES", default=[])
 
 EVENT_RECEIVER_MODULES = env.list("EVENT_RECEIVER_MODULES", default=[])
 
+EVENT_OUTBOX = env.bool("EVENT_OUTBOX", default=False)
+
+# Seconds question types are cached with a process local cache backend, which
+# can't be invalidated by other processes
+QUESTION_TYPE_CACHE_TIMEOUT = env.int("QUESTION_TYPE_CACHE_TIMEOUT", default=10)
+
 # simple history
 SIMPLE_HISTORY_HISTORY_ID_USE_UUID = True
 
 # Historical API
 ENABLE_HISTORICAL_API = env.bool("ENABLE_HISTORICAL_API", default=False)
 
+# PostgreSQL text search configuration used for the stored search vectors
+# of documents. Uses the database default if not set.
+DOCUMENT_SEARCH_CONFIG = env.str("DOCUMENT_SEARCH_CONFIG", default=None)
+
+# Maintain pg_trgm indexes on the text of answer values, used by the
+# searchAnswers filter. Indexes are limited to the given questions, or cover
+# all answers if no question is configured.
+ANSWER_TRIGRAM_INDEX = env.bool("ANSWER_TRIGRAM_INDEX", default=False)
+ANSWER_TRIGRAM_INDEX_QUESTIONS = env.list("ANSWER_TRIGRAM_INDEX_QUESTIONS", default=[])
+
 # Configure the fields you intend to use in the "meta" fields. This will
 # provide corresponding constants in the ordreBy filter.
 META_FIELDS = env.list("META_FIELDS", default=[])
+
+# Create and drop expression indexes on the configured "meta" fields of all
+# models after running migrations.
+META_FIELDS_INDEX = env.bool("META_FIELDS_INDEX", default=False)
@@ -1,3 +1,6 @@
 from django.conf.urls import include, url
 
-urlpatterns = [url(r"^graphql", include("caluma.caluma_core.urls"))]
+urlpatterns = [
+    url(r"^graphql", include("caluma.caluma_core.urls")),
+    url(r"^export/", include("caluma.caluma_form.urls")),
+]